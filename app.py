@@ -1,115 +1,442 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+#!/usr/bin/env python3
+"""Batch export of marketplace listings, without the Discord bot.
 
-import time
+Crawls the full catalog (or a list of search keywords) with the shared
+scraper and streams every listing to JSONL, CSV or Parquet. Pages flow
+from the crawler threads through a bounded queue and a chain of generators
+straight into the output file, so memory stays flat however big the dump.
+
+    python app.py --output catalog.jsonl --max-pages 200 --concurrency 3 --rate 1
+    python app.py --keywords-file terms.txt --output terms.csv
+    python app.py --output catalog.jsonl --resume   # continue an interrupted run
+    python app.py --output catalog.jsonl --replay corpus.jsonl.gz --rate 0   # offline
 
-url = "https://msu.io/marketplace/nft"
+Progress is checkpointed after every page (next to the output file), so
+--resume picks up where an interrupted run stopped.
+"""
 
-# --- Setup Chrome Options ---
-chrome_options = Options()
-chrome_options.add_argument("--headless")  # Run in headless mode (no GUI)
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-# Optional: Add a custom User-Agent to mimic a real browser more closely
-chrome_options.add_argument(
-    "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-)
+import argparse
+import csv
+import io
+import json
+import os
+import queue
+import threading
+import time
 
-# --- Use webdriver-manager to automatically handle ChromeDriver ---
-service = Service(ChromeDriverManager().install())
+from governor import TokenBucket, backoff_delay
+from replay import Corpus, CorpusRecorder, ReplayScraper
+from scraper import NFTScraper, parse_price
 
-driver = None
 try:
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    driver.get(url)
-
-    # --- Wait for page to load and add some debugging ---
-    print("Waiting for page to load...")
-    time.sleep(5)  # Give the page time to load
-    
-    # Try to find any common elements instead of specific class
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+FIELDS = [
+    "keyword", "page", "name", "price", "price_value", "category", "level", "star_force", "seller",
+    "listing_id", "scraped_at",
+]
+FORMATS = {".jsonl": "jsonl", ".csv": "csv", ".parquet": "parquet"}
+# Parsed pages buffered per crawler thread before the crawlers wait for the writer
+QUEUE_PAGES_PER_WORKER = 2
+# Rows buffered before a Parquet row group is written
+PARQUET_ROW_GROUP = 10_000
+
+
+def load_keywords(keywords=None, keywords_file=None):
+    """Keywords from a comma separated list and/or a file (one per line, # for comments)"""
+    terms = [term.strip() for term in (keywords or "").split(",")]
+    if keywords_file:
+        with open(keywords_file, encoding="utf-8") as f:
+            terms.extend(line.split("#", 1)[0].strip() for line in f)
+    # Keep the given order, drop blanks and repeats
+    return list(dict.fromkeys(term for term in terms if term))
+
+
+def plan_jobs(keywords, concurrency):
+    """Crawl jobs as (keyword, start_page, step).
+
+    Keywords are one job each and run in parallel with each other; the full
+    catalog is split into `concurrency` interleaved page stripes instead.
+    """
+    if keywords:
+        return [(keyword, 1, 1) for keyword in keywords]
+    return [(None, start, concurrency) for start in range(1, concurrency + 1)]
+
+
+def job_key(job):
+    return json.dumps(job)
+
+
+def to_records(keyword, page, listings, scraped_at):
+    """Flat export records for one crawled page"""
+    for nft in listings:
+        record = dict.fromkeys(FIELDS)
+        record.update({field: nft.get(field) for field in FIELDS if field in nft})
+        record.update(keyword=keyword, page=page, scraped_at=scraped_at)
+        try:
+            record["price_value"] = parse_price(nft["price"])
+        except (KeyError, ValueError):
+            pass
+        yield record
+
+
+class JsonlWriter:
+    resumable = True
+
+    def __init__(self, path, offset=0):
+        self._file = _open_at(path, offset)
+
+    def write(self, records):
+        count = 0
+        for record in records:
+            self._file.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+            count += 1
+        return count
+
+    def position(self):
+        """Flush and return the byte offset everything written so far ends at"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class CsvWriter(JsonlWriter):
+    def __init__(self, path, offset=0):
+        self._file = _open_at(path, offset)
+        self._text = io.TextIOWrapper(self._file, encoding="utf-8", newline="", write_through=True)
+        self._writer = csv.DictWriter(self._text, fieldnames=FIELDS, extrasaction="ignore")
+        if offset == 0:
+            self._writer.writeheader()
+
+    def write(self, records):
+        count = 0
+        for record in records:
+            self._writer.writerow(record)
+            count += 1
+        return count
+
+    def close(self):
+        self._text.close()
+
+
+class ParquetWriter:
+    # A Parquet file is only readable once its footer is written, so progress
+    # is checkpointed when the file is closed, and each resumed run writes a
+    # new part file next to the first one.
+    resumable = False
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self._schema = pyarrow.schema([
+            ("keyword", pyarrow.string()), ("page", pyarrow.int32()), ("name", pyarrow.string()),
+            ("price", pyarrow.string()), ("price_value", pyarrow.int64()), ("category", pyarrow.string()),
+            ("level", pyarrow.int32()), ("star_force", pyarrow.int32()), ("seller", pyarrow.string()),
+            ("listing_id", pyarrow.string()), ("scraped_at", pyarrow.float64()),
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+        self._rows = []
+
+    def write(self, records):
+        count = 0
+        for record in records:
+            self._rows.append(record)
+            count += 1
+            if len(self._rows) >= PARQUET_ROW_GROUP:
+                self._flush()
+        return count
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(pyarrow.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def position(self):
+        return 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+def _open_at(path, offset):
+    """Open a file for writing, keeping only its first `offset` bytes"""
+    if offset and os.path.exists(path):
+        f = open(path, "r+b")
+        f.seek(offset)
+        f.truncate()
+        return f
+    return open(path, "wb")
+
+
+class Checkpoint:
+    """Pages done per job, records written and where the output file ends"""
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {"jobs": {}, "done": [], "records": 0, "offset": 0, "parts": []}
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as f:
+            self.state.update(json.load(f))
+        return self
+
+    def save(self):
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(temporary, self.path)
+
+    def next_page(self, job):
+        """First page a job still has to crawl"""
+        last = self.state["jobs"].get(job_key(job))
+        return job[1] if last is None else last + job[2]
+
+    def is_done(self, job):
+        return job_key(job) in self.state["done"]
+
+    def page_done(self, job, page):
+        self.state["jobs"][job_key(job)] = page
+
+    def job_done(self, job):
+        self.state["done"].append(job_key(job))
+
+
+def _crawl_worker(jobs, pages, stop, make_scraper, bucket, last_page, retries, next_page):
+    """Crawler thread: take jobs and push ("page", ...) / ("end", ...) events to `pages`"""
+
+    def put(event):
+        # Block while the writer is behind, but notice a stop request
+        while not stop.is_set():
+            try:
+                pages.put(event, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def before_page(page):
+        if bucket is not None:
+            bucket.acquire_blocking()
+
+    scraper = None
+    while not stop.is_set():
+        try:
+            job = jobs.get_nowait()
+        except queue.Empty:
+            return
+        if scraper is None:
+            try:
+                scraper = make_scraper()
+            except Exception as e:
+                # e.g. ChromeDriver could not be installed
+                put(("end", job, e))
+                continue
+        keyword, _, step = job
+        page = next_page(job)
+        error = None
+        for attempt in range(retries + 1):
+            if attempt:
+                delay = backoff_delay(attempt - 1)
+                print(f"🔁 Retrying {keyword or 'catalog'} from page {page} in {delay:.1f}s after: {error}")
+                time.sleep(delay)
+            count = len(range(page, last_page + 1, step))
+            if count <= 0:
+                error = None
+                break
+            for listings in scraper.iter_pages(keyword, max_pages=count, start_page=page, step=step,
+                                               before_page=before_page):
+                if not put(("page", job, page, listings)):
+                    return
+                page += step
+                if stop.is_set():
+                    return
+            error = scraper.last_error
+            if error is None:
+                break
+        if not put(("end", job, error)):
+            return
+
+
+def iter_crawl_events(jobs, make_scraper, concurrency=1, rate=None, last_page=1, retries=2, next_page=None):
+    """Run the jobs on `concurrency` crawler threads and yield their events as they arrive.
+
+    Yields ("page", job, page, listings) for every crawled page and
+    ("end", job, error) when a job finishes (error is None on success).
+    Closing the generator stops the crawlers after their current page.
+    """
+    next_page = next_page or (lambda job: job[1])
+    pending = queue.Queue()
+    for job in jobs:
+        pending.put(job)
+    workers_count = max(1, min(concurrency, len(jobs)))
+    pages = queue.Queue(maxsize=workers_count * QUEUE_PAGES_PER_WORKER)
+    stop = threading.Event()
+    bucket = TokenBucket(rate, burst=workers_count) if rate else None
+
+    workers = [
+        threading.Thread(
+            target=_crawl_worker, name=f"export-crawler-{i}", daemon=True,
+            args=(pending, pages, stop, make_scraper, bucket, last_page, retries, next_page)
+        )
+        for i in range(workers_count)
+    ]
+    for worker in workers:
+        worker.start()
     try:
-        # Wait for body to be present (basic check)
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
+        ended = 0
+        while ended < len(jobs):
+            try:
+                event = pages.get(timeout=0.5)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers) and pages.empty():
+                    break
+                continue
+            if event[0] == "end":
+                ended += 1
+            yield event
+    finally:
+        stop.set()
+        for worker in workers:
+            # Let each crawler finish its page and quit Chrome
+            worker.join(timeout=60)
+
+
+def run_export(jobs, writer, checkpoint, make_scraper=NFTScraper, concurrency=1, rate=None, last_page=1, retries=2):
+    """Crawl the jobs into the writer; returns a throughput summary"""
+    todo = [job for job in jobs if not checkpoint.is_done(job)]
+    started = time.perf_counter()
+    records = pages = finished = 0
+    events = iter_crawl_events(todo, make_scraper, concurrency, rate, last_page, retries, checkpoint.next_page)
+    try:
+        for event in events:
+            if event[0] == "page":
+                _, job, page, listings = event
+                records += writer.write(to_records(job[0], page, listings, time.time()))
+                pages += 1
+                checkpoint.page_done(job, page)
+                if writer.resumable:
+                    checkpoint.state["offset"] = writer.position()
+                    checkpoint.state["records"] += len(listings)
+                    checkpoint.save()
+            else:
+                _, job, error = event
+                if error is None:
+                    checkpoint.job_done(job)
+                    finished += 1
+                else:
+                    print(f"❌ {job[0] or 'catalog'} (pages from {job[1]}, every {job[2]}) failed: {error}")
+    finally:
+        events.close()
+        writer.close()
+        if not writer.resumable:
+            checkpoint.state["records"] += records
+        checkpoint.save()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "records": records,
+        "pages": pages,
+        "elapsed_s": round(elapsed, 2),
+        "records_per_s": round(records / elapsed, 1) if elapsed else None,
+        "pages_per_s": round(pages / elapsed, 2) if elapsed else None,
+        "jobs": len(jobs),
+        "jobs_skipped": len(jobs) - len(todo),
+        # Includes jobs never finished because every crawler thread died
+        "jobs_failed": len(todo) - finished,
+        "total_records": checkpoint.state["records"],
+    }
+
+
+def _part_path(path, part):
+    stem, extension = os.path.splitext(path)
+    return f"{stem}.part{part}{extension}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", "-o", required=True, help="Output file (.jsonl, .csv or .parquet)")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="Output format (default: from the file extension)")
+    parser.add_argument("--keywords", help="Comma separated search terms (default: the full catalog)")
+    parser.add_argument("--keywords-file", help="File with one search term per line")
+    parser.add_argument("--max-pages", type=int, default=50, help="Last page crawled per keyword or for the catalog")
+    parser.add_argument("--concurrency", type=int, default=2, help="Browser sessions crawling at once")
+    parser.add_argument("--rate", type=float, default=1.0, help="Page loads per second across all sessions (0 = unlimited)")
+    parser.add_argument("--retries", type=int, default=2, help="Retries of a failed crawl, with jittered backoff")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint of an earlier run")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument("--base-url", default="https://msu.io/marketplace/nft")
+    parser.add_argument("--settle-time", type=float, default=5, help="Seconds to let each page render")
+    parser.add_argument("--summary", help="Also write the throughput summary as JSON to this file")
+    parser.add_argument("--record", help="Also record every fetched page into this corpus (see replay.py)")
+    parser.add_argument("--replay", help="Export from a recorded corpus instead of the live site")
+    args = parser.parse_args()
+
+    output_format = args.format or FORMATS.get(os.path.splitext(args.output)[1].lower())
+    if output_format is None:
+        parser.error("cannot tell the format from the output name; pass --format")
+    if output_format == "parquet" and pyarrow is None:
+        parser.error("Parquet output needs pyarrow (pip install pyarrow)")
+    keywords = load_keywords(args.keywords, args.keywords_file)
+    jobs = plan_jobs(keywords, max(1, args.concurrency))
+
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output}.checkpoint.json")
+    output = args.output
+    if args.resume and os.path.exists(checkpoint.path):
+        checkpoint.load()
+        if checkpoint.state.get("plan") != [job_key(job) for job in jobs]:
+            parser.error("the checkpoint is for different keywords or concurrency; rerun without --resume")
+        if output_format == "parquet":
+            output = _part_path(args.output, len(checkpoint.state["parts"]))
+        print(f"⏯️  Resuming: {len(checkpoint.state['done'])}/{len(jobs)} jobs done, "
+              f"{checkpoint.state['records']:,} records written")
+    checkpoint.state["plan"] = [job_key(job) for job in jobs]
+    if output_format == "parquet":
+        checkpoint.state["parts"].append(output)
+    writer = WRITERS[output_format](output, checkpoint.state["offset"] if output_format != "parquet" else 0)
+
+    target = ", ".join(keywords) if keywords else "full catalog"
+    print(f"📦 Exporting {target} (up to page {args.max_pages}) to {output} "
+          f"with {args.concurrency} session(s) at {args.rate or 'unlimited'} pages/s")
+
+    recorder = CorpusRecorder(args.record) if args.record else None
+    corpus = Corpus.load(args.replay) if args.replay else None
+
+    def make_scraper():
+        if corpus is not None:
+            return ReplayScraper(corpus, base_url=args.base_url)
+        return NFTScraper(base_url=args.base_url, settle_time=args.settle_time, recorder=recorder)
+
+    try:
+        summary = run_export(
+            jobs, writer, checkpoint, make_scraper, concurrency=args.concurrency, rate=args.rate or None,
+            last_page=args.max_pages, retries=args.retries
         )
-        print("Page body loaded successfully")
-    except Exception as e:
-        print(f"Timeout waiting for page to load: {e}")
-        # Continue anyway to see what we can get
-
-    print(f"Page title: {driver.title}")
-    print(f"Current URL: {driver.current_url}")
-
-    # --- Get the page source and extract NFT data ---
-    page_source = driver.page_source
-    
-    # Parse HTML with BeautifulSoup
-    soup = BeautifulSoup(page_source, 'html.parser')
-    
-    # Extract NFT names and prices
-    nft_names = soup.find_all(class_="BaseCard_itemName__Z2GfD")
-    nft_prices = soup.find_all(class_="CardPrice_number__OYpdb")
-    
-    print(f"Found {len(nft_names)} NFT names and {len(nft_prices)} prices")
-    
-    # Display the NFT data
-    for i, (name, price) in enumerate(zip(nft_names, nft_prices)):
-        print(f"NFT {i+1}:")
-        print(f"  Name: {name.get_text().strip()}")
-        print(f"  Price: {price.get_text().strip()}")
-        print()
-    
-    # If no data found, let's see what classes are available
-    if len(nft_names) == 0 or len(nft_prices) == 0:
-        print("No NFT data found with those classes. Let's check what's available:")
-
-        # Check for any elements that might contain price-like data or item names
-        all_text_elements = soup.find_all(['div', 'span', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p'])
-        price_like_elements = []
-        for elem in all_text_elements:
-            text = elem.get_text().strip()
-            # Look for text that might be prices (contain numbers and $ or specific formats)
-            if any(char.isdigit() for char in text):
-                if len(text) < 20:  # Reasonable length for price
-                    price_like_elements.append((elem.get('class'), text))
-
-        print(f"Found {len(price_like_elements)} possible price elements:")
-        for i, (classes, text) in enumerate(price_like_elements[:10]):
-            print(f"  {i+1}. Classes: {classes} - Text: '{text}'")
-
-        # Look for item name-like elements
-        name_like_elements = []
-        for elem in all_text_elements:
-            text = elem.get_text().strip()
-            if (2 <= len(text.split()) <= 5 and  # Reasonable word count for item names
-                not any(char.isdigit() for char in text[:5]) and  # Not starting with numbers
-                len(text) > 3):  # Longer than just symbols
-                name_like_elements.append((elem.get('class'), text))
-
-        print(f"\nFound {len(name_like_elements)} possible item name elements:")
-        for i, (classes, text) in enumerate(name_like_elements[:10]):
-            print(f"  {i+1}. Classes: {classes} - Text: '{text}'")
-
-        # Save page source for manual inspection
-        with open('page_source.html', 'w', encoding='utf-8') as f:
-            f.write(page_source)
-        print("\n💾 Saved page source to 'page_source.html' for manual inspection")
-
-        # Let's also check for any elements containing "Card" or "Price"
-        card_elements = soup.find_all(class_=lambda x: x and any('card' in cls.lower() or 'price' in cls.lower() for cls in x))
-        print(f"\nFound {len(card_elements)} elements with 'card' or 'price' in class name:")
-        for elem in card_elements[:5]:  # Show first 5
-            print(f"  Class: {elem.get('class')} - Text: {elem.get_text().strip()[:50]}...")
-
-except Exception as e:
-    print(f"An error occurred: {e}")
-finally:
-    if driver:
-        driver.quit() # Always close the browser
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Interrupted; progress saved to {checkpoint.path}, rerun with --resume to continue")
+        raise SystemExit(130)
+
+    print(f"\n📊 {summary['records']:,} records from {summary['pages']} pages in {summary['elapsed_s']}s: "
+          f"{summary['records_per_s']} records/s, {summary['pages_per_s']} pages/s")
+    if summary["jobs_skipped"]:
+        print(f"   {summary['jobs_skipped']} job(s) already done in an earlier run, "
+              f"{summary['total_records']:,} records in total")
+    if summary["jobs_failed"]:
+        print(f"⚠️  {summary['jobs_failed']} job(s) failed; rerun with --resume to retry them")
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    raise SystemExit(1 if summary["jobs_failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
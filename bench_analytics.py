@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Benchmark the NumPy price analytics against the pure-Python implementation"""
+
+import argparse
+import math
+import time
+
+import price_analytics
+from bench_scrape import summarize
+from fixture_server import build_catalog
+
+
+def _same(a, b):
+    """Results agree up to float rounding"""
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same(a[key], b[key]) for key in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9)
+    return a == b
+
+
+def time_calls(function, catalog, terms, repeat, version):
+    samples = []
+    for _ in range(repeat):
+        for term in terms:
+            started = time.perf_counter()
+            function(catalog, term, 10, version)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated catalog sizes")
+    parser.add_argument("--terms", default=",zakum,dagger", help="Comma separated search terms ('' = whole catalog)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if price_analytics.np is None:
+        print("❌ NumPy is not installed")
+        return
+
+    terms = [term or None for term in args.terms.split(",")]
+    for size in (int(size) for size in args.sizes.split(",")):
+        catalog = build_catalog(size)
+        version = f"bench-{size}"
+        for term in terms:
+            numpy_result = price_analytics.analyze_numpy(catalog, term, 10, version)
+            assert _same(numpy_result, price_analytics.analyze_python(catalog, term)), f"results differ for {term!r}"
+
+        # Price arrays are built once per snapshot version; time that separately
+        price_analytics._arrays.clear()
+        started = time.perf_counter()
+        price_analytics._numpy_arrays(catalog, version)
+        prepare = time.perf_counter() - started
+
+        print(f"📊 {size:,} listings (price arrays built once per snapshot in {prepare * 1000:.1f}ms)")
+        for term in terms:
+            numpy_stats = summarize(time_calls(price_analytics.analyze_numpy, catalog, [term], args.repeat, version))
+            python_stats = summarize(time_calls(price_analytics.analyze_python, catalog, [term], args.repeat, version))
+            speedup = python_stats["p50_ms"] / numpy_stats["p50_ms"] if numpy_stats["p50_ms"] else float("inf")
+            print(f"  {term or '(all)':<10} numpy p50={numpy_stats['p50_ms']}ms p95={numpy_stats['p95_ms']}ms · "
+                  f"python p50={python_stats['p50_ms']}ms p95={python_stats['p95_ms']}ms · {speedup:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""End-to-end scrape benchmark against the local fixture marketplace"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import platform
+import resource
+import threading
+import time
+from dotenv import load_dotenv
+load_dotenv()
+
+from fixture_server import start_server
+from replay import Corpus, CorpusRecorder, ReplayScraper
+from scraper import ListingParser, NFTScraper, SCRAPE_STAGES
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(values):
+    """p50/p95/p99 summary in milliseconds"""
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2) if values else None,
+        "p95_ms": round(percentile(values, 95) * 1000, 2) if values else None,
+        "p99_ms": round(percentile(values, 99) * 1000, 2) if values else None,
+    }
+
+
+class PeakRSSSampler:
+    """Samples RSS of this process plus its children (Chrome, chromedriver)"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.peak = max(self.peak, self._sample())
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if psutil:
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if psutil:
+            self._thread.join()
+            return self.peak
+        # Without psutil fall back to getrusage (KiB on Linux)
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return (own + children) * 1024
+
+
+def build_scenarios(keywords, pages):
+    """(search_term, page) pairs to scrape each iteration"""
+    scenarios = [(None, page) for page in range(1, pages + 1)]
+    for keyword in keywords:
+        scenarios.extend((keyword, page) for page in range(1, pages + 1))
+    return scenarios
+
+
+def run_benchmark(iterations=5, keywords=None, pages=2, settle_time=0.5, block_resources=True, record=None,
+                  replay=None, latency_scale=0.0, parse_cache=True, capture_xhr=False):
+    """Run NFTScraper end to end against the fixture server and collect stage timings.
+
+    With `replay` (a corpus path) pages come from the corpus instead, which
+    profiles the parser alone at full speed; `record` saves the fetched
+    pages as a corpus. parse_cache=False parses every page from scratch
+    instead of reusing unchanged pages and cards from earlier iterations.
+    capture_xhr reads the listings from the fixture's API response instead
+    of the rendered page.
+    """
+    keywords = keywords if keywords is not None else ["dagger", "staff"]
+    server, base_url = (None, None) if replay else start_server()
+    sampler = PeakRSSSampler()
+    stage_samples = {stage: [] for stage in SCRAPE_STAGES}
+    total_samples = []
+    bytes_samples = []
+    listings = 0
+    parse_stats = collections.Counter()
+
+    sampler.start()
+    try:
+        if replay:
+            corpus = Corpus.load(replay)
+            scraper = ReplayScraper(corpus, latency_scale=latency_scale)
+            scenarios = [(keyword or None, page) for keyword, page in corpus.keys()]
+        else:
+            recorder = CorpusRecorder(record) if record else None
+            scraper = NFTScraper(
+                base_url=base_url, block_resources=block_resources, settle_time=settle_time, recorder=recorder,
+                capture_xhr=capture_xhr
+            )
+            scenarios = build_scenarios(keywords, pages)
+        for iteration in range(iterations):
+            for search_term, page in scenarios:
+                if not parse_cache:
+                    scraper.parser = ListingParser()
+                started = time.perf_counter()
+                results = scraper.scrape_nfts(search_term, page=page)
+                parse_stats.update(scraper.last_parse_stats)
+                total_samples.append(time.perf_counter() - started)
+                listings += len(results)
+                bytes_samples.append(scraper.last_bytes_downloaded)
+                for stage, seconds in scraper.last_timings.items():
+                    stage_samples[stage].append(seconds)
+            print(f"⏱️  Iteration {iteration + 1}/{iterations} done")
+            # One recording of each page is enough
+            scraper.recorder = None
+    finally:
+        peak_rss = sampler.stop()
+        if server:
+            server.shutdown()
+
+    return {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "config": {
+            "iterations": iterations,
+            "keywords": keywords,
+            "pages": pages,
+            "settle_time": settle_time,
+            "block_resources": block_resources,
+            "replay": replay,
+            "parse_cache": parse_cache,
+            "capture_xhr": capture_xhr,
+        },
+        "stages": {stage: summarize(samples) for stage, samples in stage_samples.items()},
+        "total": summarize(total_samples),
+        "listings_scraped": listings,
+        "parse": dict(parse_stats),
+        "bytes_per_scrape": round(sum(bytes_samples) / len(bytes_samples)) if bytes_samples else 0,
+        "peak_rss_bytes": peak_rss,
+    }
+
+
+def compare(baseline, results):
+    """Print p50/p95 deltas against a previous results file"""
+    print(f"\n🔁 Compared to baseline ({time.ctime(baseline['timestamp'])})")
+    for stage in SCRAPE_STAGES + ["total"]:
+        old = baseline["stages"].get(stage) if stage != "total" else baseline["total"]
+        new = results["stages"].get(stage) if stage != "total" else results["total"]
+        if not old or not new or old["p50_ms"] is None or new["p50_ms"] is None:
+            continue
+        print(f"  {stage:<15} p50 {old['p50_ms']} -> {new['p50_ms']}ms ({new['p50_ms'] - old['p50_ms']:+.2f}), "
+              f"p95 {old['p95_ms']} -> {new['p95_ms']}ms ({new['p95_ms'] - old['p95_ms']:+.2f})")
+    print(f"  {'bytes':<15} {baseline['bytes_per_scrape']:,} -> {results['bytes_per_scrape']:,} per scrape")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--keywords", default="dagger,staff", help="Comma separated search terms")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per search term")
+    parser.add_argument("--settle-time", type=float, default=0.5, help="Seconds to sleep after navigation")
+    parser.add_argument("--no-block", action="store_true", help="Disable resource filtering")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="Previous results file to compare against")
+    parser.add_argument("--record", help="Save the fetched pages as a replay corpus (.jsonl.gz)")
+    parser.add_argument("--replay", help="Scrape the pages of a recorded corpus instead of the fixture server")
+    parser.add_argument("--latency-scale", type=float, default=0.0, help="With --replay: recorded stage time factor")
+    parser.add_argument("--capture-xhr", action="store_true", help="Decode the page's API response instead of the DOM")
+    parser.add_argument("--no-parse-cache", action="store_true", help="Parse every page in full, even unchanged ones")
+    args = parser.parse_args()
+
+    keywords = [k.strip() for k in args.keywords.split(",") if k.strip()]
+    results = run_benchmark(
+        args.iterations, keywords, args.pages, args.settle_time, not args.no_block,
+        record=args.record, replay=args.replay, latency_scale=args.latency_scale,
+        parse_cache=not args.no_parse_cache, capture_xhr=args.capture_xhr
+    )
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\n📊 Results ({results['listings_scraped']} listings scraped)")
+    for stage, summary in results["stages"].items():
+        print(f"  {stage:<15} p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms")
+    print(f"  {'total':<15} p50={results['total']['p50_ms']}ms p95={results['total']['p95_ms']}ms")
+    parse = results["parse"]
+    print(f"  ♻️  {parse.get('pages_skipped', 0)} unchanged pages skipped, "
+          f"{parse.get('cards_reused', 0)} cards reused, {parse.get('cards_parsed', 0)} parsed, "
+          f"{parse.get('pages_decoded', 0)} pages decoded from API responses")
+    print(f"  📦 {results['bytes_per_scrape'] / 1024:,.1f} KiB per scrape, peak RSS {results['peak_rss_bytes'] / 2**20:,.1f} MiB")
+    print(f"💾 Saved results to {os.path.abspath(args.out)}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
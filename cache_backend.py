@@ -0,0 +1,355 @@
+"""Pluggable cache backends shared between bot replicas.
+
+`MemoryCacheBackend` keeps everything in-process (the default, same as a
+single bot). `RedisCacheBackend` talks the Redis protocol directly over
+asyncio streams, so every replica pointed at the same Redis reads one
+shared snapshot. `SharedCache` adds the refresh protocol on top: only the
+replica holding the refresh lock scrapes, the others wait for its result.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+import zlib
+from urllib.parse import urlparse, unquote
+
+
+class CacheBackendError(Exception):
+    pass
+
+
+class MemoryCacheBackend:
+    """In-process backend; values expire lazily on read"""
+
+    # Values never leave the process, so SharedCache stores entries as-is
+    in_process = True
+
+    def __init__(self):
+        self._data = {}
+
+    def _alive(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key):
+        return self._alive(key)
+
+    async def set(self, key, value, ttl=None, only_if_missing=False):
+        if only_if_missing and self._alive(key) is not None:
+            return False
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires_at)
+        return True
+
+    async def delete(self, key):
+        self._data.pop(key, None)
+
+    async def delete_if(self, key, value):
+        """Delete key if it holds value; nothing can run in between on one event loop"""
+        current = self._alive(key)
+        if current is None or current != value:
+            return False
+        del self._data[key]
+        return True
+
+    async def expire_if(self, key, value, ttl):
+        """Reset key's expiry to ttl seconds if it holds value"""
+        current = self._alive(key)
+        if current is None or current != value:
+            return False
+        self._data[key] = (value, time.monotonic() + ttl)
+        return True
+
+    async def close(self):
+        pass
+
+
+# KEYS[1] is deleted only while it still holds ARGV[1]
+DELETE_IF_SCRIPT = "if redis.call('get',KEYS[1])==ARGV[1] then return redis.call('del',KEYS[1]) end return 0"
+# KEYS[1] gets a new expiry of ARGV[2] ms only while it still holds ARGV[1]
+EXPIRE_IF_SCRIPT = "if redis.call('get',KEYS[1])==ARGV[1] then return redis.call('pexpire',KEYS[1],ARGV[2]) end return 0"
+
+
+class RedisCacheBackend:
+    """Minimal Redis (RESP2) client: GET, SET [PX] [NX], DEL and compare-and-delete/expire scripts"""
+
+    in_process = False
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_url(cls, url):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        password = unquote(parsed.password) if parsed.password else None
+        return cls(parsed.hostname or "127.0.0.1", parsed.port or 6379, db, password)
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        if self.password:
+            await self._roundtrip("AUTH", self.password)
+        if self.db:
+            await self._roundtrip("SELECT", str(self.db))
+
+    @staticmethod
+    def _encode(*args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _read_reply(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("connection closed by server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise CacheBackendError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length == -1:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(rest)
+            if count == -1:
+                return None
+            return [await self._read_reply() for _ in range(count)]
+        raise CacheBackendError(f"unexpected reply: {line!r}")
+
+    async def _roundtrip(self, *args):
+        self._writer.write(self._encode(*args))
+        await self._writer.drain()
+        return await asyncio.wait_for(self._read_reply(), self.timeout)
+
+    async def execute(self, *args):
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None:
+                        await self._connect()
+                    return await self._roundtrip(*args)
+                except (ConnectionError, OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    await self._reset()
+                    if attempt:
+                        raise
+
+    async def _reset(self):
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def get(self, key):
+        return await self.execute("GET", key)
+
+    async def set(self, key, value, ttl=None, only_if_missing=False):
+        args = ["SET", key, value]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        if only_if_missing:
+            args.append("NX")
+        return await self.execute(*args) == "OK"
+
+    async def delete(self, key):
+        await self.execute("DEL", key)
+
+    async def delete_if(self, key, value):
+        """Delete key only if it holds value, atomically on the server"""
+        return await self.execute("EVAL", DELETE_IF_SCRIPT, 1, key, value) == 1
+
+    async def expire_if(self, key, value, ttl):
+        """Reset key's expiry to ttl seconds only if it holds value, atomically on the server"""
+        return await self.execute("EVAL", EXPIRE_IF_SCRIPT, 1, key, value, int(ttl * 1000)) == 1
+
+    async def close(self):
+        async with self._lock:
+            await self._reset()
+
+
+def create_backend(url=None):
+    """Backend from a URL: memory:// (default) or redis://[:password@]host:port/db"""
+    if not url or url.startswith("memory"):
+        return MemoryCacheBackend()
+    if url.startswith("redis://"):
+        return RedisCacheBackend.from_url(url)
+    raise ValueError(f"Unsupported cache backend URL: {url}")
+
+
+class SharedCache:
+    """Snapshot cache with cross-replica refresh locking.
+
+    Entries are dicts with `timestamp`, `version` and `items`, stored as
+    zlib-compressed JSON in out-of-process backends.
+    """
+
+    def __init__(self, backend, namespace="nft", lock_ttl=120, poll_interval=0.5):
+        self.backend = backend
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self.replica_id = uuid.uuid4().hex
+        # Refreshes in flight in this process, so local callers share them too
+        self._inflight = {}
+        self.refreshes = 0
+
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def refreshing(self, key):
+        """Whether this process is currently refreshing `key`"""
+        task = self._inflight.get(key)
+        return task is not None and not task.done()
+
+    def _dump(self, entry):
+        if self.backend.in_process:
+            return entry
+        return zlib.compress(json.dumps(entry, separators=(",", ":")).encode("utf-8"))
+
+    def _load(self, raw):
+        if raw is None or self.backend.in_process:
+            return raw
+        return json.loads(zlib.decompress(raw))
+
+    async def get_entry(self, key):
+        try:
+            return self._load(await self.backend.get(self._key(key)))
+        except (CacheBackendError, ConnectionError, OSError, asyncio.TimeoutError, ValueError, zlib.error) as e:
+            print(f"⚠️  Cache backend read failed: {e}")
+            return None
+
+    async def put_entry(self, key, entry, ttl=None):
+        try:
+            await self.backend.set(self._key(key), self._dump(entry), ttl=ttl)
+        except (CacheBackendError, ConnectionError, OSError, asyncio.TimeoutError) as e:
+            print(f"⚠️  Cache backend write failed: {e}")
+
+    async def get_or_refresh(self, key, max_age, refresh, ttl=None, force=False):
+        """Return (entry, result) where result is "hit", "stale", "miss" or "shared".
+
+        `refresh` is an async callable returning (items, version). Only the
+        replica that wins the refresh lock calls it; the lock is kept alive
+        for as long as the refresh runs, and the others wait for the entry
+        it writes ("shared"). Entries are kept for `ttl` seconds so
+        stale data is still available if a refresh fails.
+        """
+        entry = await self.get_entry(key)
+        if not force and entry and time.time() - entry["timestamp"] < max_age:
+            return entry, "hit"
+
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._refresh(key, entry, refresh, ttl))
+            self._inflight[key] = task
+        new_entry, shared = await asyncio.shield(task)
+        if shared:
+            return new_entry, "shared"
+        return new_entry, "stale" if entry else "miss"
+
+    async def _refresh(self, key, previous, refresh, ttl):
+        lock_key = self._key(f"lock:{key}")
+        token = f"{self.replica_id}:{uuid.uuid4().hex}"
+        while True:
+            try:
+                acquired = await self.backend.set(lock_key, token, ttl=self.lock_ttl, only_if_missing=True)
+            except (CacheBackendError, ConnectionError, OSError, asyncio.TimeoutError) as e:
+                print(f"⚠️  Cache lock unavailable, refreshing locally: {e}")
+                lock_key = None
+                break
+            if acquired:
+                break
+            # Another replica is refreshing: wait for its result, or for its
+            # lock to go (failed or crashed) and try to take it ourselves
+            entry = await self._wait_for_newer(key, previous)
+            if entry is not None:
+                return entry, True
+
+        stop = asyncio.Event()
+        heartbeat = asyncio.ensure_future(self._heartbeat(lock_key, token, stop)) if lock_key else None
+        try:
+            items, version = await refresh()
+            self.refreshes += 1
+            entry = {"timestamp": time.time(), "version": version, "items": items}
+            if items or previous is None:
+                await self.put_entry(key, entry, ttl=ttl)
+            elif previous is not None:
+                # Keep serving the previous data when a refresh comes back empty
+                entry = previous
+            return entry, False
+        finally:
+            if heartbeat is not None:
+                # Stopped, not cancelled, so it never abandons a command half-read
+                stop.set()
+                await heartbeat
+                await self._release(lock_key, token)
+
+    async def _wait_for_newer(self, key, previous):
+        """The entry the lock holder writes, or None once the lock is gone without one"""
+        previous_timestamp = previous["timestamp"] if previous else 0
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            entry = await self.get_entry(key)
+            if entry and entry["timestamp"] > previous_timestamp:
+                return entry
+            try:
+                lock_holder = await self.backend.get(self._key(f"lock:{key}"))
+            except (CacheBackendError, ConnectionError, OSError, asyncio.TimeoutError):
+                return None
+            if lock_holder is None:
+                # Lock released (or expired) without a new entry: stop waiting
+                entry = await self.get_entry(key)
+                if entry and entry["timestamp"] > previous_timestamp:
+                    return entry
+                return None
+
+    async def _heartbeat(self, lock_key, token, stop):
+        """Extend the lock every third of its TTL until `stop` is set"""
+        while True:
+            try:
+                await asyncio.wait_for(stop.wait(), self.lock_ttl / 3)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                if not await self.backend.expire_if(lock_key, token, self.lock_ttl):
+                    print(f"⚠️  Lost cache lock {lock_key} during a refresh")
+                    return
+            except (CacheBackendError, ConnectionError, OSError, asyncio.TimeoutError) as e:
+                print(f"⚠️  Could not extend cache lock: {e}")
+
+    async def _release(self, lock_key, token):
+        """Delete the lock if we still hold it (it expires on its own otherwise).
+
+        The check and the delete are one atomic step, so a lock that expired
+        and was taken by another replica in between is left alone.
+        """
+        try:
+            await self.backend.delete_if(lock_key, token)
+        except (CacheBackendError, ConnectionError, OSError, asyncio.TimeoutError) as e:
+            print(f"⚠️  Could not release cache lock: {e}")
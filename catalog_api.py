@@ -0,0 +1,232 @@
+"""Read-only JSON API over the bot's cached catalog.
+
+Every response carries the snapshot version as its ETag, so consumers
+polling with If-None-Match get a 304 until the bot scrapes new data.
+Bodies are rendered once per snapshot and compressed once per encoding.
+"""
+
+import gzip
+import json
+
+from aiohttp import web
+
+import discord_bot
+from scraper import parse_price
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MAX_LIMIT = 500
+# Rendered bodies kept per snapshot (search terms make this open-ended)
+MAX_CACHED_BODIES = 1000
+
+routes = web.RouteTableDef()
+
+# (version, cache key, encoding) -> body bytes; cleared whenever the snapshot changes
+_body_cache = {}
+_body_cache_version = None
+
+
+async def current_snapshot():
+    """Cached catalog and its version, scraping only if the cache is empty or expired.
+
+    While the marketplace is unavailable the last snapshot is served at any age.
+    """
+    nfts = await discord_bot.get_nft_data_or_cached()
+    return nfts, discord_bot.snapshot_version
+
+
+def _etag(version, encoding='identity'):
+    """Strong ETag of a snapshot's body in one content-coding (each coding is different bytes)"""
+    if version is None:
+        return None
+    return f'"{version}"' if encoding == 'identity' else f'"{version}-{encoding}"'
+
+
+def _not_modified(request, etag):
+    if etag is None:
+        return False
+    tags = [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]
+    # If-None-Match uses weak comparison: W/"v1" matches "v1" (proxies weaken ETags of compressed bodies)
+    tags = [tag[2:] if tag.startswith('W/') else tag for tag in tags]
+    return (etag[2:] if etag.startswith('W/') else etag) in tags or '*' in tags
+
+
+def _choose_encoding(request):
+    accepted = request.headers.get('Accept-Encoding', '').lower()
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return 'identity'
+
+
+def _encode(raw, encoding):
+    if encoding == 'br':
+        return brotli.compress(raw)
+    if encoding == 'gzip':
+        return gzip.compress(raw, compresslevel=6)
+    return raw
+
+
+def _cached_body(version, key, encoding, build):
+    """Render (and compress) a response body once per snapshot version"""
+    global _body_cache_version
+    if version != _body_cache_version or len(_body_cache) > MAX_CACHED_BODIES:
+        _body_cache.clear()
+        _body_cache_version = version
+    cache_key = (key, encoding)
+    body = _body_cache.get(cache_key)
+    if body is None:
+        raw = _body_cache.get((key, 'identity'))
+        if raw is None:
+            raw = json.dumps(build(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            _body_cache[(key, 'identity')] = raw
+        body = _encode(raw, encoding)
+        _body_cache[cache_key] = body
+    return body
+
+
+def _section(request):
+    """?section= of a request (None for the whole catalog); 400 if it is not configured"""
+    section = discord_bot.section_name(request.query.get('section'))
+    if discord_bot.section_error_reply(section) is not None:
+        raise web.HTTPBadRequest(text=f'unknown section: {section}')
+    return section
+
+
+async def json_endpoint(request, key, build):
+    section = _section(request)
+    nfts, version = await current_snapshot()
+    if section is not None:
+        nfts = discord_bot.section_view(nfts, section)
+        key = (key, section)
+    encoding = _choose_encoding(request)
+    etag = _etag(version, encoding)
+    headers = {'Cache-Control': 'public, max-age=30', 'Vary': 'Accept-Encoding'}
+    if etag is not None:
+        headers['ETag'] = etag
+    if _not_modified(request, etag):
+        return web.Response(status=304, headers=headers)
+
+    body = _cached_body(version, key, encoding, lambda: build(nfts))
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return web.Response(body=body, content_type='application/json', charset='utf-8', headers=headers)
+
+
+def _limit(request, default):
+    try:
+        return max(1, min(MAX_LIMIT, int(request.query.get('limit', default))))
+    except ValueError:
+        raise web.HTTPBadRequest(text='limit must be an integer')
+
+
+def _envelope(items):
+    return {
+        'version': discord_bot.snapshot_version,
+        'scraped_at': discord_bot.cache_timestamp,
+        'count': len(items),
+        'items': items,
+    }
+
+
+@routes.get('/api/nfts')
+async def list_nfts(request):
+    """Full listing as one JSON document (?section= for one marketplace section)"""
+    return await json_endpoint(request, 'all', lambda nfts: _envelope(nfts))
+
+
+@routes.get('/api/nfts.jsonl')
+async def dump_nfts(request):
+    """Full listing streamed as JSON Lines (one listing per line)"""
+    section = _section(request)
+    nfts, version = await current_snapshot()
+    if section is not None:
+        nfts = discord_bot.section_view(nfts, section)
+    # aiohttp picks the stream's content-coding, so the tag only promises equivalent content
+    etag = f'W/{_etag(version)}' if version is not None else None
+    headers = {'Cache-Control': 'public, max-age=30', 'Vary': 'Accept-Encoding'}
+    if etag is not None:
+        headers['ETag'] = etag
+    if _not_modified(request, etag):
+        return web.Response(status=304, headers=headers)
+
+    response = web.StreamResponse(headers=headers)
+    response.content_type = 'application/x-ndjson'
+    response.enable_compression()
+    await response.prepare(request)
+
+    chunk = []
+    for nft in nfts:
+        chunk.append(json.dumps(nft, ensure_ascii=False))
+        if len(chunk) >= 200:
+            await response.write(('\n'.join(chunk) + '\n').encode('utf-8'))
+            chunk = []
+    if chunk:
+        await response.write(('\n'.join(chunk) + '\n').encode('utf-8'))
+    await response.write_eof()
+    return response
+
+
+@routes.get('/api/search')
+async def search_nfts(request):
+    """Listings whose name contains ?q=, cheapest first"""
+    term = request.query.get('q', '').strip().lower()
+    if not term:
+        raise web.HTTPBadRequest(text='missing q parameter')
+    limit = _limit(request, 50)
+
+    def build(nfts):
+        matches = [nft for nft in nfts if term in nft['name'].lower()]
+        matches.sort(key=lambda nft: parse_price(nft['price']))
+        return dict(_envelope(matches[:limit]), query=term, total_matches=len(matches))
+
+    return await json_endpoint(request, ('search', term, limit), build)
+
+
+@routes.get('/api/top')
+async def top_nfts(request):
+    """Most expensive listings (?limit=, default 10)"""
+    limit = _limit(request, 10)
+
+    def build(nfts):
+        ordered = sorted(nfts, key=lambda nft: parse_price(nft['price']), reverse=True)
+        return _envelope(ordered[:limit])
+
+    return await json_endpoint(request, ('top', limit), build)
+
+
+@routes.get('/api/stats')
+async def stats(request):
+    """Count, average, min/max and cheapest/most expensive listing"""
+
+    section = _section(request)
+
+    def build(nfts):
+        if not nfts:
+            return {'version': discord_bot.snapshot_version, 'count': 0}
+        return dict(
+            discord_bot.catalog_stats(nfts, section).summary(),
+            version=discord_bot.snapshot_version,
+            scraped_at=discord_bot.cache_timestamp,
+        )
+
+    return await json_endpoint(request, 'stats', build)
+
+
+@routes.get('/api/sections')
+async def sections(request):
+    """Configured marketplace sections with their listing count, version and scrape time"""
+    await current_snapshot()
+    return web.json_response({
+        'version': discord_bot.snapshot_version,
+        'sections': discord_bot.section_catalog.summary(),
+    })
+
+
+def register(app):
+    """Add the catalog API routes to an aiohttp application"""
+    app.add_routes(routes)
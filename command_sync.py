@@ -0,0 +1,99 @@
+"""Sync the slash command tree with Discord only when it changed.
+
+`bot.tree.sync()` overwrites every global command and counts against a
+tight Discord rate limit, yet the tree only changes when the code does.
+`CommandSync` hashes the command payloads the sync would send (names,
+descriptions, options, permissions) into a fingerprint, keeps the last
+synced fingerprint, and skips the sync on startup and reconnects while
+they match.
+
+The fingerprint is written to a small JSON file and, when the shared
+cache uses Redis, to Redis too, which outlives restarts on hosts with an
+ephemeral disk such as Render. Without Redis, point COMMAND_SYNC_STATE_PATH
+at a persistent disk to keep the file across deploys.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from cache_backend import CacheBackendError
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".command_sync.json")
+
+
+def tree_fingerprint(tree, application_id=None):
+    """Hash of the global command payloads a sync would upload"""
+    payloads = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda p: p["name"])
+    payload = json.dumps({"application_id": application_id, "commands": payloads}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class CommandSync:
+    def __init__(self, path=DEFAULT_STATE_PATH, backend=None, key="nft:command_sync"):
+        self.path = path
+        # Shared cache backend (e.g. Redis) the state is also kept in, under `key`
+        self.backend = backend
+        self.key = key
+        self.state = self._load()
+        self.syncs = 0
+        self.skipped = 0
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    async def _load_shared(self):
+        try:
+            raw = await self.backend.get(self.key)
+            return json.loads(raw) if raw else None
+        except (CacheBackendError, ConnectionError, OSError, asyncio.TimeoutError, ValueError) as e:
+            print(f"⚠️  Could not read command sync state from the cache backend: {e}")
+            return None
+
+    async def _save(self):
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, indent=2)
+        except OSError as e:
+            print(f"⚠️  Could not save command sync state: {e}")
+        if self.backend is not None:
+            try:
+                await self.backend.set(self.key, json.dumps(self.state))
+            except (CacheBackendError, ConnectionError, OSError, asyncio.TimeoutError) as e:
+                print(f"⚠️  Could not save command sync state to the cache backend: {e}")
+
+    async def sync(self, tree, application_id=None, force=False):
+        """Sync the tree unless its fingerprint matches the last sync; returns the synced commands or None"""
+        fingerprint = tree_fingerprint(tree, application_id)
+        if self.backend is not None and not force:
+            # Another process (or this one before a restart on a fresh disk) may have synced
+            self.state = await self._load_shared() or self.state
+        if not force and self.state.get("fingerprint") == fingerprint:
+            self.skipped += 1
+            return None
+        synced = await tree.sync()
+        self.syncs += 1
+        self.state = {
+            "fingerprint": fingerprint,
+            "synced_at": time.time(),
+            "commands": sorted(command.name for command in synced),
+        }
+        await self._save()
+        return synced
+
+    def summary(self):
+        return {
+            "fingerprint": self.state.get("fingerprint"),
+            "synced_at": self.state.get("synced_at"),
+            "commands": self.state.get("commands", []),
+            "syncs": self.syncs,
+            "skipped": self.skipped,
+            "state_path": self.path,
+            "shared": self.backend is not None,
+        }
@@ -2,22 +2,36 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
+import collections
+import hashlib
 import json
 import os
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import time
 
 # Load environment variables from .env file
 load_dotenv()
 
+from scraper import NFTScraper, SCRAPE_STAGES, parse_price
+import metrics
+import perf
+from loop_monitor import LoopMonitor
+from cache_backend import SharedCache, create_backend
+from market_stats import MarketStats
+import price_analytics
+from facet_index import FacetIndex
+from prefetch import DecayingCounter, Prefetcher
+from name_index import NameIndex
+from governor import CircuitOpenError, UpstreamError, UpstreamGovernor
+from replay import Corpus, CorpusRecorder, ReplayScraper
+from sections import SectionCatalog, load_sections
+from refresh_scheduler import RefreshScheduler
+from fair_queue import FairQueue, Throttled
+from command_sync import DEFAULT_STATE_PATH, CommandSync
+
+# Startup-to-ready time is measured from here (importing this module is the first thing both entry points do)
+STARTED_AT = time.monotonic()
+
 # Bot configuration
 intents = discord.Intents.default()
 # Remove message_content intent since we're using slash commands
@@ -28,116 +42,618 @@ bot = commands.Bot(command_prefix='!', intents=intents)
 nft_cache = {}
 cache_timestamp = 0
 CACHE_DURATION = 300  # 5 minutes
+SEARCH_CACHE_DURATION = int(os.getenv('SEARCH_CACHE_DURATION', 120))  # per search term
+# Content hash of nft_cache, used as ETag by the HTTP API
+snapshot_version = None
 
-class NFTScraper:
-    def __init__(self):
-        self.base_url = "https://msu.io/marketplace/nft"
-        self.setup_driver()
-    
-    def setup_driver(self):
-        """Setup Chrome driver with options"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument(
-            "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        )
-        self.service = Service(ChromeDriverManager().install())
-        self.chrome_options = chrome_options
+# Snapshot and search results live in a shared backend (CACHE_BACKEND_URL=redis://...)
+# so several replicas can share one scrape; defaults to in-process memory
+shared_cache = SharedCache(create_backend(os.getenv('CACHE_BACKEND_URL')))
+
+# Count, sum, min/max of the catalog, updated from snapshot diffs instead of recomputed
+market_stats = MarketStats(parse_price)
+# Item names seen in snapshots and search results, for nombre_item autocomplete
+name_index = NameIndex()
+
+metrics.scraper_queue_depth.set(0)
+metrics.Gauge(
+    "nft_snapshot_age_seconds", "Seconds since the cached catalog was scraped",
+    function=lambda: time.time() - cache_timestamp if cache_timestamp else None
+)
+metrics.Gauge("nft_snapshot_listings", "Listings in the cached catalog", function=lambda: len(nft_cache))
+
+# Event loop lag monitor (LOOP_MONITOR_DEBUG=1 also samples the stack of whatever blocks the loop)
+loop_monitor = LoopMonitor(
+    threshold=float(os.getenv('LOOP_LAG_THRESHOLD_MS', 250)) / 1000,
+    debug=os.getenv('LOOP_MONITOR_DEBUG', '0') == '1'
+)
+
+# Pages crawled per scrape; results stream into the reply as each page lands
+CATALOG_MAX_PAGES = int(os.getenv('CATALOG_MAX_PAGES', 1))
+SEARCH_MAX_PAGES = int(os.getenv('SEARCH_MAX_PAGES', 3))
+
+# Marketplace sections merged into the catalog, each scraped on its own
+# interval (MARKETPLACE_SECTIONS, see sections.py; default: the NFT marketplace)
+SECTIONS = load_sections(refresh=CACHE_DURATION, pages=CATALOG_MAX_PAGES)
+section_catalog = SectionCatalog(SECTIONS)
+
+# Refresh intervals learned from how often each section and search term
+# changes, within [min, max] and with jitter (ADAPTIVE_REFRESH=0: fixed
+# CACHE_DURATION / section refresh and SEARCH_CACHE_DURATION)
+ADAPTIVE_REFRESH = os.getenv('ADAPTIVE_REFRESH', '1') != '0'
+REFRESH_JITTER = float(os.getenv('REFRESH_JITTER', 0.1))
+catalog_scheduler = RefreshScheduler(
+    default_interval=CACHE_DURATION,
+    min_interval=float(os.getenv('REFRESH_MIN_SECONDS', 60)),
+    max_interval=float(os.getenv('REFRESH_MAX_SECONDS', 1800)),
+    jitter=REFRESH_JITTER,
+    adaptive=ADAPTIVE_REFRESH
+)
+search_scheduler = RefreshScheduler(
+    default_interval=SEARCH_CACHE_DURATION,
+    min_interval=float(os.getenv('SEARCH_REFRESH_MIN_SECONDS', 30)),
+    max_interval=float(os.getenv('SEARCH_REFRESH_MAX_SECONDS', 900)),
+    jitter=REFRESH_JITTER,
+    adaptive=ADAPTIVE_REFRESH
+)
+metrics.Gauge(
+    "nft_catalog_scrapes_per_hour", "Catalog section snapshots taken over the last hour",
+    function=lambda: catalog_scheduler.scrapes_per_hour()
+)
+metrics.Gauge(
+    "nft_search_scrapes_per_hour", "Search term snapshots taken over the last hour",
+    function=lambda: search_scheduler.scrapes_per_hour()
+)
+
+def section_interval(section):
+    """Current refresh interval of a catalog section"""
+    return catalog_scheduler.interval(section.cache_key, default=section.refresh)
+
+
+# Offline mode: serve scrapes from a recorded corpus (replay.py) instead of msu.io
+REPLAY_PATH = os.getenv('SCRAPER_REPLAY_PATH')
+REPLAY_LATENCY_SCALE = float(os.getenv('SCRAPER_REPLAY_LATENCY_SCALE', 0))
+replay_corpus = Corpus.load(REPLAY_PATH) if REPLAY_PATH else None
+# Record every page the bot fetches into a corpus for later replay
+scrape_recorder = CorpusRecorder(os.getenv('SCRAPER_RECORD_PATH')) if os.getenv('SCRAPER_RECORD_PATH') else None
+
+def create_scraper(base_url=None):
+    """Live scraper (of base_url, default the NFT marketplace), or the replay backend when SCRAPER_REPLAY_PATH is set"""
+    if replay_corpus is not None:
+        return ReplayScraper(replay_corpus, latency_scale=REPLAY_LATENCY_SCALE)
+    if base_url:
+        return NFTScraper(base_url=base_url, recorder=scrape_recorder)
+    return NFTScraper(recorder=scrape_recorder)
+
+def _crawl_in_thread(search_term, max_pages, loop, queue, base_url=None):
+    """Build the scraper and crawl page by page; runs in a worker thread.
     
-    def scrape_nfts(self, search_term=None):
-        """Scrape NFT data from the marketplace"""
-        driver = None
+    Each page's listings are handed to the event loop as soon as they are
+    parsed; None marks the end of the crawl.
+    """
+    scraper = None
+    try:
+        # NFTScraper() resolves the ChromeDriver path, which can hit the network,
+        # so it must not run on the event loop either
+        scraper = create_scraper(base_url)
+        if max_pages > 1:
+            for batch in scraper.iter_pages(search_term, max_pages=max_pages):
+                loop.call_soon_threadsafe(queue.put_nowait, batch)
+        else:
+            batch = scraper.scrape_nfts(search_term)
+            if batch:
+                loop.call_soon_threadsafe(queue.put_nowait, batch)
+    finally:
+        loop.call_soon_threadsafe(queue.put_nowait, None)
+    return scraper
+
+async def stream_scrape(search_term=None, max_pages=1, report=None, base_url=None):
+    """Async generator of listing batches (one per page) from a worker-thread crawl.
+    
+    When the crawl finishes, its stage timings, page content hashes, parse
+    cache stats and the error that ended it (None if it completed) are
+    stored in `report`.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    crawl = loop.run_in_executor(None, _crawl_in_thread, search_term, max_pages, loop, queue, base_url)
+    try:
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                break
+            yield batch
         try:
-            driver = webdriver.Chrome(service=self.service, options=self.chrome_options)
-            
-            # Use search URL if search term is provided
-            if search_term:
-                # URL encode the search term
-                from urllib.parse import quote_plus
-                encoded_term = quote_plus(search_term)
-                url = f"{self.base_url}?keyword={encoded_term}"
-                print(f"🔍 Searching URL: {url}")
-            else:
-                url = self.base_url
-                print(f"📄 Loading general page: {url}")
-            
-            driver.get(url)
-            
-            # Wait for page to load
-            time.sleep(5)
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # Extract NFT data
-            nft_names = soup.find_all(class_="BaseCard_itemName__Z2GfD")
-            nft_prices = soup.find_all(class_="CardPrice_number__OYpdb")
-            
-            print(f"📊 Found {len(nft_names)} names and {len(nft_prices)} prices")
-            
-            nfts = []
-            for name, price in zip(nft_names, nft_prices):
-                nfts.append({
-                    'name': name.get_text().strip(),
-                    'price': price.get_text().strip()
-                })
+            scraper = await crawl
+            error = getattr(scraper, "last_error", None)
+        except Exception as e:
+            # The scraper could not even be built (e.g. ChromeDriver download failed)
+            scraper, error = None, e
+        if report is not None:
+            report['timings'] = getattr(scraper, "last_timings", {})
+            report['page_hashes'] = getattr(scraper, "last_page_hashes", [])
+            report['parse'] = getattr(scraper, "last_parse_stats", {})
+            report['error'] = error
+    finally:
+        if not crawl.done():
+            # Consumer gave up early; let the crawl finish in the background
+            crawl.add_done_callback(lambda f: f.exception())
+
+# Rate, concurrency and circuit breaker for everything that hits msu.io
+governor = UpstreamGovernor(
+    rate=float(os.getenv('UPSTREAM_RATE', 0.5)),
+    burst=int(os.getenv('UPSTREAM_BURST', 3)),
+    max_concurrency=int(os.getenv('UPSTREAM_MAX_CONCURRENCY', 4)),
+    slow_threshold=float(os.getenv('UPSTREAM_SLOW_SECONDS', 20)),
+    failure_threshold=int(os.getenv('UPSTREAM_FAILURE_THRESHOLD', 3)),
+    open_seconds=float(os.getenv('UPSTREAM_OPEN_SECONDS', 60))
+)
+# Extra attempts for a scrape that failed before returning any listing
+SCRAPE_RETRIES = int(os.getenv('SCRAPE_RETRIES', 2))
+metrics.Gauge(
+    "nft_upstream_concurrency_limit", "Concurrent scrapes currently allowed by the AIMD limit",
+    function=lambda: governor.limit
+)
+metrics.Gauge(
+    "nft_upstream_circuit_open", "1 while the marketplace circuit breaker is open or probing",
+    function=lambda: 0 if governor.state == governor.CLOSED else 1
+)
+
+def upstream_latency(report, elapsed, pages):
+    """Seconds per page the marketplace took, for the governor's slow threshold.
+    
+    Uses the crawl's stage timings when the scraper reports them, else the
+    attempt's wall time without the time spent in on_batch (Discord edits).
+    """
+    timings = report.get('timings')
+    total = sum(timings.values()) if timings else elapsed
+    return total / max(1, pages)
+
+async def run_scrape(search_term=None, max_pages=1, on_batch=None, report=None, base_url=None):
+    """Crawl in a worker thread under the upstream governor, record metrics and return all listings.
+    
+    on_batch(results_so_far, page) is awaited after every page so callers
+    can show partial results while the crawl continues. The last attempt's
+    report (see stream_scrape) is copied into `report`. A crawl that fails
+    before any listing arrives is retried with jittered backoff; raises
+    UpstreamError when every attempt failed and CircuitOpenError without
+    scraping while the marketplace is considered down.
+    """
+    kind = "search" if search_term else "catalog"
+    
+    metrics.scraper_queue_depth.inc()
+    started = time.perf_counter()
+    outcome = "error"
+    results = []
+    attempt_report = {}
+    try:
+        for attempt in range(SCRAPE_RETRIES + 1):
+            if attempt:
+                delay = governor.backoff(attempt - 1)
+                print(f"🔁 Retrying {kind} scrape in {delay:.1f}s after: {attempt_report['error']}")
+                metrics.scrape_retries.inc(kind=kind)
+                await asyncio.sleep(delay)
+            try:
+                await governor.acquire()
+            except CircuitOpenError:
+                outcome = "rejected"
+                metrics.upstream_rejections.inc()
+                raise
             
-            return nfts
+            attempt_report = {}
+            attempt_started = time.perf_counter()
+            consumer_seconds = 0.0
+            page = 0
+            try:
+                async for batch in stream_scrape(search_term, max_pages, attempt_report, base_url):
+                    page += 1
+                    if not results:
+                        metrics.scrape_first_batch_seconds.observe(time.perf_counter() - started, kind=kind)
+                    results.extend(batch)
+                    attempt_report.setdefault('page_sizes', []).append(len(batch))
+                    if on_batch is not None:
+                        consumer_started = time.perf_counter()
+                        await on_batch(results, page)
+                        consumer_seconds += time.perf_counter() - consumer_started
+            finally:
+                elapsed = time.perf_counter() - attempt_started - consumer_seconds
+                await governor.release(
+                    upstream_latency(attempt_report, elapsed, page), ok=attempt_report.get('error') is None
+                )
+            for stage, seconds in attempt_report.get('timings', {}).items():
+                metrics.scrape_stage_seconds.observe(seconds, stage=stage)
+            parse = attempt_report.get('parse', {})
+            metrics.parse_pages.inc(parse.get('pages_parsed', 0), result="parsed")
+            metrics.parse_pages.inc(parse.get('pages_skipped', 0), result="skipped")
+            metrics.parse_pages.inc(parse.get('pages_decoded', 0), result="decoded")
+            metrics.parse_cards.inc(parse.get('cards_parsed', 0), result="parsed")
+            metrics.parse_cards.inc(parse.get('cards_reused', 0), result="reused")
             
-        except Exception as e:
-            print(f"Error scraping NFTs: {e}")
-            return []
-        finally:
-            if driver:
-                driver.quit()
+            # Listings already shown to the user are not thrown away by a retry
+            if results or attempt_report.get('error') is None or governor.state != governor.CLOSED:
+                break
+        
+        if report is not None:
+            report.update(attempt_report)
+        if attempt_report.get('error') is not None and not results:
+            raise UpstreamError(f"{kind} scrape failed: {attempt_report['error']}")
+        outcome = "ok" if results else "empty"
+        return results
+    finally:
+        metrics.scraper_queue_depth.dec()
+        metrics.scrapes.inc(kind=kind, outcome=outcome)
+        metrics.scrape_seconds.observe(time.perf_counter() - started, kind=kind)
 
-async def get_nft_data():
-    """Get NFT data with caching (async version)"""
-    global nft_cache, cache_timestamp
-    current_time = time.time()
-    
-    # Check if cache is still valid
-    if current_time - cache_timestamp < CACHE_DURATION and nft_cache:
-        return nft_cache
-    
+def compute_snapshot_version(nfts):
+    """Short content hash of a catalog snapshot"""
+    payload = json.dumps(nfts, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+# Page content hashes of the last scrape per (section URL, search term), with its snapshot
+SNAPSHOT_MEMORY = int(os.getenv('SNAPSHOT_MEMORY', 256))
+last_snapshots = collections.OrderedDict()
+# version -> (previous version, version, added, removed) for snapshots whose scrape knows what changed
+snapshot_changes = collections.OrderedDict()
+
+def page_changes(previous, page_hashes, page_sizes, nfts):
+    """(added, removed) listings since the previous crawl of the same pages, or None if unknown.
+    
+    A page whose content hash did not change holds the same listings, so
+    only the listings of changed, new and vanished pages are collected.
+    """
+    old_hashes, old_nfts, _, old_sizes = previous
+    if sum(page_sizes) != len(nfts) or len(page_sizes) > len(page_hashes) or len(old_sizes) > len(old_hashes):
+        return None
+    added, removed = [], []
+    old_start = new_start = 0
+    for page in range(max(len(old_sizes), len(page_sizes))):
+        old_size = old_sizes[page] if page < len(old_sizes) else 0
+        new_size = page_sizes[page] if page < len(page_sizes) else 0
+        if page >= len(old_sizes) or page >= len(page_sizes) or old_hashes[page] != page_hashes[page]:
+            removed.extend(old_nfts[old_start:old_start + old_size])
+            added.extend(nfts[new_start:new_start + new_size])
+        old_start += old_size
+        new_start += new_size
+    return added, removed
+
+async def scrape_snapshot(search_term=None, max_pages=1, on_batch=None, base_url=None):
+    """Scrape and return (listings, version), reusing the previous snapshot if no page changed.
+    
+    When every page hashes the same as last time, the previous list object
+    and version come back, so the stats, facet index, name index and
+    analytics built for it are reused instead of rebuilt.
+    """
+    kind = "search" if search_term else "catalog"
+    key = (base_url or "", (search_term or "").strip().lower())
+    report = {}
     # Scrape new data in a thread to avoid blocking the event loop
-    loop = asyncio.get_event_loop()
-    scraper = NFTScraper()
+    nfts = await run_scrape(search_term, max_pages=max_pages, on_batch=on_batch, report=report, base_url=base_url)
+    page_hashes = tuple(report.get('page_hashes', ()))
+    
+    previous = last_snapshots.get(key)
+    if previous is not None and page_hashes and previous[0] == page_hashes and report.get('error') is None:
+        last_snapshots.move_to_end(key)
+        metrics.snapshot_reuses.inc(kind=kind)
+        print(f"♻️  {kind.capitalize()} unchanged since the last scrape, keeping snapshot {previous[2]}")
+        return previous[1], previous[2]
+    
+    version = compute_snapshot_version(nfts)
+    if page_hashes and report.get('error') is None:
+        page_sizes = tuple(report.get('page_sizes', ()))
+        changes = page_changes(previous, page_hashes, page_sizes, nfts) if previous is not None else None
+        if changes is not None and previous[2] != version:
+            # Lets the stats of this snapshot be updated from the changed pages only
+            snapshot_changes[version] = (previous[2], version) + changes
+            while len(snapshot_changes) > SNAPSHOT_MEMORY:
+                snapshot_changes.popitem(last=False)
+        last_snapshots[key] = (page_hashes, nfts, version, page_sizes)
+        last_snapshots.move_to_end(key)
+        while len(last_snapshots) > SNAPSHOT_MEMORY:
+            last_snapshots.popitem(last=False)
+    return nfts, version
+
+async def scrape_catalog(section, on_batch=None):
+    """Scrape every listing of a marketplace section; used as its shared cache refresh"""
+    return await scrape_snapshot(max_pages=section.pages, on_batch=on_batch, base_url=section.url)
+
+async def refresh_section(section, force=False, on_batch=None):
+    """Shared cache entry of a section, scraped first if it is older than the section's refresh interval"""
+    async def on_section_batch(results, page):
+        # Show the partial section alongside what the other sections already have
+        await on_batch(section_catalog.merged_with(section.name, results), page)
+    
+    # Only one replica (and one caller per process) scrapes an expired
+    # section, everyone else waits for its result
+    entry, result = await shared_cache.get_or_refresh(
+        section.cache_key, section_interval(section),
+        lambda: scrape_catalog(section, on_section_batch if on_batch is not None else None),
+        ttl=max(section.refresh, catalog_scheduler.max_interval) * 12, force=force
+    )
+    metrics.cache_requests.inc(cache="catalog", result=result)
+    if catalog_scheduler.observe(section.cache_key, entry['version'], entry['timestamp'], default=section.refresh):
+        print(f"📈 Section '{section.name}' changed, next refresh in {section_interval(section):.0f}s")
+    return entry
+
+async def get_nft_data(force=False, on_batch=None):
+    """Get NFT data with caching (async version): every section merged into one catalog.
+    
+    Expired sections are scraped concurrently. A section that fails keeps
+    its previous snapshot; UpstreamError is raised only if all of them fail.
+    on_batch sees the partial catalog when this call triggers a scrape.
+    """
+    global nft_cache, cache_timestamp, snapshot_version
+    
+    # Check if the local copy is still valid
+    if not force and nft_cache and time.time() < section_catalog.expires_at(section_interval):
+        metrics.cache_requests.inc(cache="catalog", result="hit")
+        metrics.served_data_age_seconds.observe(time.time() - cache_timestamp, kind="catalog")
+        return nft_cache
     
-    # Run the scraping in a thread executor to avoid event loop conflicts
-    nft_cache = await loop.run_in_executor(None, scraper.scrape_nfts)
-    cache_timestamp = current_time
+    entries = await asyncio.gather(
+        *(refresh_section(section, force, on_batch) for section in SECTIONS), return_exceptions=True
+    )
+    failures = []
+    for section, entry in zip(SECTIONS, entries):
+        if isinstance(entry, asyncio.CancelledError):
+            raise entry
+        if isinstance(entry, Exception):
+            print(f"⚠️  Section '{section.name}' could not be refreshed: {entry}")
+            failures.append(entry)
+            if section.name not in section_catalog.entries:
+                stale = await shared_cache.get_entry(section.cache_key)
+                if stale:
+                    section_catalog.update(section.name, stale)
+            continue
+        section_catalog.update(section.name, entry, snapshot_changes.get(entry['version']))
+    if len(failures) == len(SECTIONS):
+        raise failures[0]
+    
+    nft_cache = section_catalog.items
+    cache_timestamp = section_catalog.oldest_timestamp()
+    snapshot_version = section_catalog.version
+    market_stats.sync(nft_cache, *section_catalog.history())
+    name_index.update_snapshot(nft_cache, snapshot_version)
+    metrics.served_data_age_seconds.observe(time.time() - cache_timestamp, kind="catalog")
     
     return nft_cache
 
+async def get_nft_data_or_cached():
+    """get_nft_data(), or the last snapshot of any age while the marketplace is unavailable"""
+    try:
+        return await get_nft_data()
+    except UpstreamError as e:
+        print(f"⚠️  Marketplace unavailable, serving cached catalog: {e}")
+        fallback = await cached_catalog()
+        if fallback is None:
+            return []
+        metrics.upstream_cached_fallbacks.inc(kind="catalog")
+        return fallback[0]
+
+# Facet index of the current snapshot, rebuilt when the snapshot changes
+facet_index = None
+
+def catalog_index(nfts):
+    """Faceted index (category, level, star force, seller, section, price) of a catalog snapshot"""
+    global facet_index
+    if facet_index is None or facet_index.items is not nfts:
+        facet_index = FacetIndex(nfts, parse_price)
+    return facet_index
+
+# Stats of each section's listings, maintained the same way as market_stats
+section_stats = {}
+
+def catalog_stats(nfts, section=None):
+    """Aggregate stats for a catalog snapshot, or a section's listings (O(1) when it is the current one)"""
+    current = nfts is (section_catalog.by_section.get(section) if section else section_catalog.items)
+    if not section:
+        stats = market_stats
+    else:
+        stats = section_stats.get(section)
+        if stats is None:
+            stats = section_stats[section] = MarketStats(parse_price)
+    if current:
+        # Apply only what the last scrapes changed
+        stats.sync(nfts, *section_catalog.history(section))
+    else:
+        stats.sync(nfts)
+    return stats
+
+def section_name(seccion):
+    """Configured section name for a command option (None for the whole catalog)"""
+    if not seccion or not seccion.strip():
+        return None
+    return seccion.strip().lower()
+
+def section_error_reply(section):
+    """Reply for an unknown section, None if the section is configured"""
+    if section is None or section in section_catalog.sections:
+        return None
+    known = ", ".join(f"`{name}`" for name in section_catalog.sections)
+    return {'content': f"❌ Sección desconocida: '{section}'. Secciones disponibles: {known}"}
+
+def section_view(nfts, section):
+    """Listings of one section of a catalog snapshot (all of them when section is None)"""
+    if section is None:
+        return nfts
+    if nfts is section_catalog.items:
+        # The current catalog keeps a ready-made list per section
+        return section_catalog.section_items(section)
+    return [nft for nft in nfts if nft.get('section') == section]
+
+def section_title(title, section):
+    """Command title, with the section label when the reply covers only one section"""
+    if section is None or len(SECTIONS) == 1:
+        return title
+    return f"{title} · {section_catalog.sections[section].label}"
+
+async def seccion_autocomplete(interaction: discord.Interaction, current: str):
+    """Suggest configured marketplace sections"""
+    current = current.strip().lower()
+    return [
+        app_commands.Choice(name=section.label[:100], value=section.name)
+        for section in SECTIONS if current in section.name or current in section.label.lower()
+    ][:25]
+
+# Search scrapes triggered by users take turns: deficit round robin over
+# guilds (FAIR_QUEUE_GUILD_WEIGHTS gives some guilds a bigger share), round
+# robin over each guild's users, at most as many at once as the upstream
+# concurrency limit. Within a cooldown a user gets cached answers instead of new scrapes.
+fair_queue = FairQueue(
+    limit=lambda: governor.limit,
+    weights={str(guild): float(weight) for guild, weight in json.loads(os.getenv('FAIR_QUEUE_GUILD_WEIGHTS') or '{}').items()},
+    user_cooldown=float(os.getenv('SCRAPE_COOLDOWN_USER_SECONDS', 15)),
+    guild_cooldown=float(os.getenv('SCRAPE_COOLDOWN_GUILD_SECONDS', 0)),
+    max_pending_per_user=int(os.getenv('FAIR_QUEUE_MAX_PENDING_PER_USER', 1))
+)
+metrics.Gauge(
+    "nft_fair_queue_depth", "User-triggered scrapes waiting for their turn",
+    function=lambda: fair_queue.queued()
+)
+
+def interaction_requester(interaction):
+    """(guild, user) an interaction's scrapes are queued and throttled under; DMs share the "dm" guild"""
+    guild = 'dm' if interaction.guild_id is None else str(interaction.guild_id)
+    return guild, str(interaction.user.id)
+
+def _search_refresh(search_term, on_batch=None):
+    """Shared cache refresh callable for a search term"""
+    async def scrape_search():
+        # Searches run against the first configured section
+        return await scrape_snapshot(search_term, max_pages=SEARCH_MAX_PAGES, on_batch=on_batch, base_url=SECTIONS[0].url)
+    return scrape_search
+
+async def search_needs_scrape(term):
+    """Whether asking for a term now would start a new scrape (not fresh, and nobody here is scraping it)"""
+    if shared_cache.refreshing(f"search:{term}"):
+        return False
+    entry = await shared_cache.get_entry(f"search:{term}")
+    return not entry or time.time() - entry['timestamp'] >= search_interval(term)
+
+async def get_search_results(search_term, on_batch=None, requester=None):
+    """Marketplace search results for a term, cached per term in the shared backend.
+    
+    on_batch sees the partial results when this call triggers the crawl.
+    requester is the (guild, user) asking: a scrape they trigger waits for
+    its fair turn, and raises Throttled instead while they are in cooldown.
+    """
+    term = search_term.strip().lower()
+    
+    async def lookup():
+        return await shared_cache.get_or_refresh(
+            f"search:{term}", search_interval(term), _search_refresh(search_term, on_batch),
+            ttl=max(SEARCH_CACHE_DURATION, search_scheduler.max_interval) * 10
+        )
+    
+    if requester is not None and await search_needs_scrape(term):
+        throttled = fair_queue.check(*requester)
+        if throttled is not None:
+            metrics.fair_queue_rejections.inc(guild=requester[0], reason=throttled.reason)
+            fair_queue.reject(requester[0], throttled)
+        # The turn is taken before the refresh lock: a long wait cannot outlast
+        # the lock, and callers joining the scrape do not inherit this queue position
+        async with fair_queue.slot(*requester) as slot:
+            metrics.fair_queue_wait_seconds.observe(slot.waited, guild=requester[0])
+            entry, result = await lookup()
+    else:
+        entry, result = await lookup()
+    metrics.cache_requests.inc(cache="search", result=result)
+    search_scheduler.observe(f"search:{term}", entry['version'], entry['timestamp'])
+    metrics.served_data_age_seconds.observe(time.time() - entry['timestamp'], kind="search")
+    prefetcher.record_query(term, result)
+    if result != "hit":
+        name_index.add_names(nft['name'] for nft in entry['items'])
+    return entry['items']
+
+# Popular search terms are re-scraped while the bot is idle (driven by render.py's keep-alive loop)
+PREFETCH_IDLE_SECONDS = int(os.getenv('PREFETCH_IDLE_SECONDS', 30))
+# Refresh prefetched terms this many seconds before their cache entry expires
+PREFETCH_LEAD_SECONDS = int(os.getenv('PREFETCH_LEAD_SECONDS', 60))
+
+def search_interval(term):
+    """Refresh interval of a search term: learned from how often its results change, shorter when popular"""
+    return search_scheduler.interval(f"search:{term}", popularity=prefetcher.counter.score(term))
+
+async def search_prefetch_due(term):
+    """Whether a term's cached results are missing or expire within PREFETCH_LEAD_SECONDS"""
+    entry = await shared_cache.get_entry(f"search:{term}")
+    return entry is None or time.time() - entry['timestamp'] > search_interval(term) - PREFETCH_LEAD_SECONDS
+
+async def prefetch_search(term):
+    """Scrape a term into the search cache ahead of user requests"""
+    entry, _ = await shared_cache.get_or_refresh(
+        f"search:{term}", search_interval(term), _search_refresh(term),
+        ttl=max(SEARCH_CACHE_DURATION, search_scheduler.max_interval) * 10, force=True
+    )
+    search_scheduler.observe(f"search:{term}", entry['version'], entry['timestamp'])
+
+prefetcher = Prefetcher(
+    DecayingCounter(half_life=float(os.getenv('PREFETCH_HALF_LIFE_SECONDS', 3600))),
+    prefetch_search,
+    search_prefetch_due,
+    top_n=int(os.getenv('PREFETCH_TOP_N', 5)),
+    budget_per_hour=int(os.getenv('PREFETCH_BUDGET_PER_HOUR', 30)),
+    entry_lifetime=SEARCH_CACHE_DURATION
+)
+metrics.Gauge(
+    "nft_prefetch_hit_rate", "Share of prefetched search entries used by a search before expiring",
+    function=prefetcher.hit_rate
+)
+
+# Fingerprint of the last synced command tree, so startups and reconnects skip unneeded syncs
+# (kept in Redis when the shared cache uses it: Render's disk does not survive restarts)
+command_sync = CommandSync(
+    os.getenv('COMMAND_SYNC_STATE_PATH', DEFAULT_STATE_PATH),
+    backend=None if shared_cache.backend.in_process else shared_cache.backend
+)
+startup_to_ready = metrics.Gauge(
+    "nft_startup_to_ready_seconds", "Seconds from process start until the bot was ready (commands synced if needed)"
+)
+
 @bot.event
 async def on_ready():
     print(f'{bot.user} has connected to Discord!')
     
-    # Force sync slash commands to fix signature mismatches
+    loop_monitor.start()
+    
+    # Sync slash commands only when their signatures changed since the last sync
     try:
-        print('Syncing slash commands...')
-        synced = await bot.tree.sync()
-        print(f'✅ Synced {len(synced)} command(s)')
-        
-        # List the synced commands
-        for cmd in synced:
-            print(f'  - /{cmd.name}')
+        with perf.span('startup.command_sync'):
+            synced = await command_sync.sync(bot.tree, application_id=bot.application_id)
+        if synced is None:
+            print(f'✅ Slash commands unchanged ({command_sync.state["fingerprint"]}), sync skipped')
+        else:
+            print(f'✅ Synced {len(synced)} command(s)')
+            
+            # List the synced commands
+            for cmd in synced:
+                print(f'  - /{cmd.name}')
             
     except Exception as e:
         print(f'❌ Failed to sync commands: {e}')
+    
+    # on_ready fires again after reconnects; only the first one is startup
+    if not startup_to_ready.get():
+        ready = time.monotonic() - STARTED_AT
+        startup_to_ready.set(ready)
+        perf.record('startup.ready', ready)
+        print(f'⏱️  Ready {ready:.2f}s after startup')
+
+def seconds_since(created_at):
+    """Seconds since a Discord timestamp (e.g. interaction.created_at)"""
+    return (discord.utils.utcnow() - created_at).total_seconds()
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    """Record slash command latency from interaction creation to completion"""
+    elapsed = seconds_since(interaction.created_at)
+    metrics.command_seconds.observe(elapsed, command=command.qualified_name)
 
 @bot.command(name='nft')
 async def search_nft(ctx, *, search_term: str = None):
     """Search for NFTs by name"""
     await ctx.send("🔍 Fetching NFT data... This may take a moment.")
     
-    nfts = await get_nft_data()
+    nfts = await get_nft_data_or_cached()
     
     if not nfts:
         await ctx.send("❌ Failed to fetch NFT data. Please try again later.")
@@ -201,7 +717,7 @@ async def get_nft_price(ctx, *, nft_name: str):
     """Get the exact price of a specific NFT"""
     await ctx.send("🔍 Searching for NFT price...")
     
-    nfts = await get_nft_data()
+    nfts = await get_nft_data_or_cached()
     
     if not nfts:
         await ctx.send("❌ Failed to fetch NFT data. Please try again later.")
@@ -246,22 +762,22 @@ async def nft_stats(ctx):
     """Get marketplace statistics"""
     await ctx.send("📊 Calculating marketplace statistics...")
     
-    nfts = await get_nft_data()
+    nfts = await get_nft_data_or_cached()
     
     if not nfts:
         await ctx.send("❌ Failed to fetch NFT data. Please try again later.")
         return
     
-    # Calculate statistics
-    prices = [int(nft['price'].replace(',', '')) for nft in nfts]
-    total_nfts = len(nfts)
-    avg_price = sum(prices) / len(prices)
-    min_price = min(prices)
-    max_price = max(prices)
+    # Statistics are maintained incrementally as snapshots change
+    stats = catalog_stats(nfts)
+    total_nfts = stats.count
+    avg_price = stats.average_price
+    min_price = stats.min_price
+    max_price = stats.max_price
     
     # Find cheapest and most expensive NFTs
-    cheapest = min(nfts, key=lambda x: int(x['price'].replace(',', '')))
-    most_expensive = max(nfts, key=lambda x: int(x['price'].replace(',', '')))
+    cheapest = stats.cheapest
+    most_expensive = stats.most_expensive
     
     embed = discord.Embed(
         title="📊 MSU Marketplace Statistics",
@@ -331,26 +847,205 @@ async def help_nft(ctx):
 # Removed prefix commands - using only slash commands
 
 # Slash Commands
-@bot.tree.command(name="buscar", description="Buscar items NFT en el marketplace de MSU")
-@app_commands.describe(nombre_item="Nombre del item que quieres buscar")
-async def buscar(interaction: discord.Interaction, nombre_item: str):
-    """Slash command to search for NFT items by name"""
-    await interaction.response.defer()  # Let Discord know we're processing
+
+# Latency budget for slash commands: past it we answer from cache and edit in fresh data later
+COMMAND_DEADLINE = float(os.getenv('COMMAND_DEADLINE_SECONDS', 3))
+
+def format_age(seconds):
+    """Human readable age for stale-data labels"""
+    if seconds < 90:
+        return f"{seconds:.0f} s"
+    if seconds < 90 * 60:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+def label_stale(reply, age):
+    """Mark a reply as cached data of the given age"""
+    return add_label(reply, f"⏳ Datos en caché de hace {format_age(age)} · actualizando...")
+
+def label_degraded(reply, age):
+    """Mark a reply as cached data served because the marketplace is not responding"""
+    return add_label(reply, f"⚠️ Datos en caché de hace {format_age(age)} · el marketplace no responde")
+
+def label_throttled(reply, age, throttled):
+    """Mark a reply as cached data served because the user is in cooldown"""
+    return add_label(reply, f"⏳ Datos en caché de hace {format_age(age)} · {throttled_message(throttled)}")
+
+def throttled_message(throttled):
+    """Why a user's command did not start a new scrape, in the user's terms"""
+    if throttled.reason == "pending":
+        return "tu búsqueda anterior sigue en cola"
+    return f"podrás buscar de nuevo en {format_age(max(1, throttled.retry_after))}"
+
+def add_label(reply, label):
+    """Append a line to the reply's embed footer (or content)"""
+    embed = reply.get('embed')
+    if embed is not None:
+        footer = embed.footer.text
+        embed.set_footer(text=f"{footer}\n{label}" if footer else label)
+    else:
+        reply['content'] = f"{reply.get('content') or ''}\n{label}".strip()
+    return reply
+
+async def cached_catalog():
+    """Best available catalog snapshot regardless of age, as (items, timestamp)"""
+    if nft_cache:
+        return nft_cache, cache_timestamp
+    for section in SECTIONS:
+        entry = await shared_cache.get_entry(section.cache_key)
+        if entry and entry['items']:
+            section_catalog.update(section.name, entry)
+    if section_catalog.items:
+        return section_catalog.items, section_catalog.oldest_timestamp()
+    return None
+
+def catalog_refreshing():
+    """True while any section of the catalog is being scraped"""
+    return any(shared_cache.refreshing(section.cache_key) for section in SECTIONS)
+
+async def cached_search_results(search_term):
+    """Best available results for a search term regardless of age, as (items, timestamp)"""
+    term = search_term.strip().lower()
+    entry = await shared_cache.get_entry(f"search:{term}")
+    if entry and entry['items']:
+        return entry['items'], entry['timestamp']
+    # Fall back to filtering whatever catalog snapshot we have
+    catalog = await cached_catalog()
+    if catalog:
+        items, timestamp = catalog
+        matches = [nft for nft in items if term in nft['name'].lower()]
+        if matches:
+            return matches, timestamp
+    return None
+
+# Minimum seconds between edits of a progressive reply (Discord rate limits message edits)
+PROGRESS_EDIT_INTERVAL = float(os.getenv('PROGRESS_EDIT_INTERVAL_SECONDS', 1.5))
+
+def label_partial(reply, page):
+    """Mark a reply as partial results while the crawl continues"""
+    return add_label(reply, f"⏳ Resultados parciales · cargando más (página {page})...")
+
+class ProgressiveReply:
+    """One followup message, sent on the first update and edited after that.
+    
+    Intermediate updates closer than PROGRESS_EDIT_INTERVAL to the previous
+    edit are dropped (the next one supersedes them); final updates always go out.
+    """
+    
+    def __init__(self, interaction, command_name):
+        self.interaction = interaction
+        self.command_name = command_name
+        self.message = None
+        self.stale = False
+        self._last_edit = 0.0
+    
+    async def update(self, reply, final=False):
+        now = time.monotonic()
+        if self.message is None:
+            if final:
+                # Nothing shown yet: a plain followup is enough
+                await self.interaction.followup.send(**reply)
+            else:
+                self.message = await self.interaction.followup.send(**reply, wait=True)
+            self._last_edit = now
+            elapsed = seconds_since(self.interaction.created_at)
+            metrics.command_first_result_seconds.observe(elapsed, command=self.command_name)
+            return
+        if not final and now - self._last_edit < PROGRESS_EDIT_INTERVAL:
+            return
+        self._last_edit = now
+        await self.message.edit(content=reply.get('content'), embed=reply.get('embed'))
+
+async def respond_with_deadline(interaction, command_name, fetch, cached, build_reply):
+    """Reply with fresh data, streaming partial results as pages arrive.
+    
+    fetch(on_batch) gets the data; on_batch(items, page) is awaited for every
+    crawled page and shows the partial results right away. If nothing has
+    arrived within COMMAND_DEADLINE, send the best cached answer, labelled
+    with its age, and edit that message in place once the fresh data arrives.
+    build_reply(items) returns followup kwargs; items is None on errors.
+    
+    The ack (interaction created to handler running), fetch, render, send
+    and total time are recorded as "command.<name>.<stage>" spans.
+    """
+    perf.record(f"command.{command_name}.ack", seconds_since(interaction.created_at))
+    reply_message = ProgressiveReply(interaction, command_name)
+    
+    async def on_batch(items, page):
+        # A complete cached answer beats the first pages of a fresh crawl
+        if reply_message.stale:
+            return
+        try:
+            await reply_message.update(label_partial(build_reply(list(items)), page))
+        except Exception as e:
+            print(f"⚠️  Could not show partial results: {e}")
+    
+    fetch_started = time.perf_counter()
+    task = asyncio.ensure_future(fetch(on_batch))
+    task.add_done_callback(
+        lambda _: perf.record(f"command.{command_name}.fetch", time.perf_counter() - fetch_started)
+    )
+    done, _ = await asyncio.wait({task}, timeout=COMMAND_DEADLINE)
+    
+    if not done and reply_message.message is None:
+        fallback = await cached()
+        if fallback is not None:
+            items, timestamp = fallback
+            reply_message.stale = True
+            await reply_message.update(label_stale(build_reply(items), time.time() - timestamp))
+            metrics.deadline_fallbacks.inc(command=command_name)
     
-    # Use the scraper directly with search term in a thread
-    loop = asyncio.get_event_loop()
-    scraper = NFTScraper()
     try:
-        matches = await loop.run_in_executor(None, scraper.scrape_nfts, nombre_item)
+        items = await task
+        with perf.span(f"command.{command_name}.render"):
+            reply = build_reply(items)
+    except Throttled as e:
+        # Cooldown: no new scrape for this user, answer from cache or ask them to wait
+        fallback = await cached()
+        if fallback is not None:
+            items, timestamp = fallback
+            reply = label_throttled(build_reply(items), time.time() - timestamp, e)
+        elif reply_message.stale:
+            return
+        else:
+            reply = {'content': f"⏳ Demasiadas búsquedas seguidas: {throttled_message(e)}."}
     except Exception as e:
         print(f"Error fetching NFT data: {e}")
+        fallback = await cached() if isinstance(e, UpstreamError) else None
+        if fallback is not None:
+            # Marketplace down (or circuit open): old data, labelled as such, beats an error message
+            items, timestamp = fallback
+            reply = label_degraded(build_reply(items), time.time() - timestamp)
+            metrics.upstream_cached_fallbacks.inc(kind=command_name)
+        elif reply_message.stale:
+            # Keep showing the cached answer rather than replacing it with an error
+            return
+        else:
+            reply = build_reply(None)
+    
+    with perf.span(f"command.{command_name}.send"):
+        await reply_message.update(reply, final=True)
+    perf.record(f"command.{command_name}.total", seconds_since(interaction.created_at))
+
+async def nombre_item_autocomplete(interaction: discord.Interaction, current: str):
+    """Suggest known item names while the user types nombre_item"""
+    started = time.perf_counter()
+    names = name_index.complete(current)
+    metrics.autocomplete_seconds.observe(time.perf_counter() - started)
+    if not len(name_index) and not catalog_refreshing():
+        # Nothing indexed yet (fresh start): load the catalog in the background
+        asyncio.ensure_future(get_nft_data_or_cached())
+    return [app_commands.Choice(name=name[:100], value=name[:100]) for name in names]
+
+def build_search_reply(nombre_item, matches):
+    """Reply for /buscar: matches sorted by price, lowest first"""
+    if matches is None:
         embed = discord.Embed(
             title="🔍 Resultados de búsqueda",
             description=f"Error al obtener datos de NFT. Por favor intenta de nuevo más tarde.",
             color=0xff0000
         )
-        await interaction.followup.send(embed=embed)
-        return
+        return {'embed': embed}
     
     if not matches:
         embed = discord.Embed(
@@ -358,8 +1053,7 @@ async def buscar(interaction: discord.Interaction, nombre_item: str):
             description=f"No se encontraron items que coincidan con '{nombre_item}'",
             color=0xff0000
         )
-        await interaction.followup.send(embed=embed)
-        return
+        return {'embed': embed}
     
     # Sort by price (lowest first)
     matches = sorted(matches, key=lambda x: int(x['price'].replace(',', '')))
@@ -406,31 +1100,32 @@ async def buscar(interaction: discord.Interaction, nombre_item: str):
     else:
         embed.set_footer(text=f"Todos los resultados mostrados (ordenados por precio)")
     
-    await interaction.followup.send(embed=embed)
+    return {'embed': embed}
 
-@bot.tree.command(name="buscar_precio", description="Buscar items NFT ordenados por precio específico")
-@app_commands.describe(
-    nombre_item="Nombre del item que quieres buscar",
-    orden="Orden de precios: 'barato' (más barato primero) o 'caro' (más caro primero)"
-)
-async def buscar_precio(interaction: discord.Interaction, nombre_item: str, orden: str = "barato"):
-    """Search for NFT items with specific price ordering"""
-    await interaction.response.defer()
+@bot.tree.command(name="buscar", description="Buscar items NFT en el marketplace de MSU")
+@app_commands.autocomplete(nombre_item=nombre_item_autocomplete)
+@app_commands.describe(nombre_item="Nombre del item que quieres buscar")
+async def buscar(interaction: discord.Interaction, nombre_item: str):
+    """Slash command to search for NFT items by name"""
+    await interaction.response.defer()  # Let Discord know we're processing
     
-    # Use the scraper directly with search term in a thread
-    loop = asyncio.get_event_loop()
-    scraper = NFTScraper()
-    try:
-        matches = await loop.run_in_executor(None, scraper.scrape_nfts, nombre_item)
-    except Exception as e:
-        print(f"Error fetching NFT data: {e}")
+    # Search results are cached per term (and shared between replicas)
+    await respond_with_deadline(
+        interaction, "buscar",
+        lambda on_batch: get_search_results(nombre_item, on_batch, interaction_requester(interaction)),
+        lambda: cached_search_results(nombre_item),
+        lambda matches: build_search_reply(nombre_item, matches)
+    )
+
+def build_price_search_reply(nombre_item, orden, matches):
+    """Reply for /buscar_precio: matches in the requested price order"""
+    if matches is None:
         embed = discord.Embed(
             title="🔍 Resultados de búsqueda",
             description=f"Error al obtener datos de NFT. Por favor intenta de nuevo más tarde.",
             color=0xff0000
         )
-        await interaction.followup.send(embed=embed)
-        return
+        return {'embed': embed}
     
     if not matches:
         embed = discord.Embed(
@@ -438,8 +1133,7 @@ async def buscar_precio(interaction: discord.Interaction, nombre_item: str, orde
             description=f"No se encontraron items que coincidan con '{nombre_item}'",
             color=0xff0000
         )
-        await interaction.followup.send(embed=embed)
-        return
+        return {'embed': embed}
     
     # Sort by price based on user preference
     if orden.lower() in ["caro", "expensive", "high"]:
@@ -477,23 +1171,32 @@ async def buscar_precio(interaction: discord.Interaction, nombre_item: str, orde
         )
     
     embed.set_footer(text=f"Ordenados por precio ({sort_text})")
-    await interaction.followup.send(embed=embed)
+    return {'embed': embed}
 
-@bot.tree.command(name="listar_items", description="Mostrar algunos items disponibles para búsqueda")
-async def listar_items(interaction: discord.Interaction):
-    """List some available items for search reference"""
+@bot.tree.command(name="buscar_precio", description="Buscar items NFT ordenados por precio específico")
+@app_commands.describe(
+    nombre_item="Nombre del item que quieres buscar",
+    orden="Orden de precios: 'barato' (más barato primero) o 'caro' (más caro primero)"
+)
+@app_commands.autocomplete(nombre_item=nombre_item_autocomplete)
+async def buscar_precio(interaction: discord.Interaction, nombre_item: str, orden: str = "barato"):
+    """Search for NFT items with specific price ordering"""
     await interaction.response.defer()
     
-    try:
-        nfts = await get_nft_data()
-    except Exception as e:
-        print(f"Error fetching NFT data: {e}")
-        await interaction.followup.send("❌ Error al obtener datos de NFT. Por favor intenta de nuevo más tarde.")
-        return
-    
+    # Search results are cached per term (and shared between replicas)
+    await respond_with_deadline(
+        interaction, "buscar_precio",
+        lambda on_batch: get_search_results(nombre_item, on_batch, interaction_requester(interaction)),
+        lambda: cached_search_results(nombre_item),
+        lambda matches: build_price_search_reply(nombre_item, orden, matches)
+    )
+
+CATALOG_ERROR_REPLY = "❌ Error al obtener datos de NFT. Por favor intenta de nuevo más tarde."
+
+def build_listing_reply(nfts):
+    """Reply for /listar_items: the first 20 items"""
     if not nfts:
-        await interaction.followup.send("❌ Error al obtener datos de NFT. Por favor intenta de nuevo más tarde.")
-        return
+        return {'content': CATALOG_ERROR_REPLY}
     
     # Get some sample items
     sample_items = nfts[:20]  # First 20 items
@@ -512,29 +1215,32 @@ async def listar_items(interaction: discord.Interaction):
         )
     
     embed.set_footer(text=f"Total de items disponibles: {len(nfts)}")
-    await interaction.followup.send(embed=embed)
+    return {'embed': embed}
 
-@bot.tree.command(name="top_nfts", description="Mostrar los 10 NFTs más caros del marketplace")
-async def top_nfts(interaction: discord.Interaction):
-    """Slash command to show top 10 most expensive NFTs"""
+@bot.tree.command(name="listar_items", description="Mostrar algunos items disponibles para búsqueda")
+async def listar_items(interaction: discord.Interaction):
+    """List some available items for search reference"""
     await interaction.response.defer()
-    
-    try:
-        nfts = await get_nft_data()
-    except Exception as e:
-        print(f"Error fetching NFT data: {e}")
-        await interaction.followup.send("❌ Error al obtener datos de NFT. Por favor intenta de nuevo más tarde.")
-        return
-    
+    await respond_with_deadline(
+        interaction, "listar_items",
+        lambda on_batch: get_nft_data(on_batch=on_batch),
+        cached_catalog, build_listing_reply
+    )
+
+def build_top_reply(nfts, section=None):
+    """Reply for /top_nfts: the 10 most expensive NFTs (of one section when given)"""
+    error = section_error_reply(section)
+    if error is not None:
+        return error
+    nfts = section_view(nfts, section) if nfts else nfts
     if not nfts:
-        await interaction.followup.send("❌ Error al obtener datos de NFT. Por favor intenta de nuevo más tarde.")
-        return
+        return {'content': CATALOG_ERROR_REPLY}
     
     # Sort by price (highest first)
     sorted_nfts = sorted(nfts, key=lambda x: int(x['price'].replace(',', '')), reverse=True)
     
     embed = discord.Embed(
-        title="🏆 Top 10 NFTs más caros",
+        title=section_title("🏆 Top 10 NFTs más caros", section),
         description="Los items más valiosos del marketplace:",
         color=0xffd700
     )
@@ -550,37 +1256,44 @@ async def top_nfts(interaction: discord.Interaction):
         )
     
     embed.set_footer(text=f"Total de NFTs disponibles: {len(nfts)}")
-    await interaction.followup.send(embed=embed)
+    return {'embed': embed}
 
-@bot.tree.command(name="estadisticas", description="Mostrar estadísticas del marketplace")
-async def estadisticas(interaction: discord.Interaction):
-    """Slash command to show marketplace statistics"""
+@bot.tree.command(name="top_nfts", description="Mostrar los 10 NFTs más caros del marketplace")
+@app_commands.describe(seccion="Sección del marketplace (opcional, por defecto todas)")
+@app_commands.autocomplete(seccion=seccion_autocomplete)
+async def top_nfts(interaction: discord.Interaction, seccion: str = None):
+    """Slash command to show top 10 most expensive NFTs"""
     await interaction.response.defer()
-    
-    try:
-        nfts = await get_nft_data()
-    except Exception as e:
-        print(f"Error fetching NFT data: {e}")
-        await interaction.followup.send("❌ Error al obtener datos de NFT. Por favor intenta de nuevo más tarde.")
-        return
-    
+    section = section_name(seccion)
+    await respond_with_deadline(
+        interaction, "top_nfts",
+        lambda on_batch: get_nft_data(on_batch=on_batch),
+        cached_catalog,
+        lambda nfts: build_top_reply(nfts, section)
+    )
+
+def build_stats_reply(nfts, section=None):
+    """Reply for /estadisticas: marketplace statistics (of one section when given)"""
+    error = section_error_reply(section)
+    if error is not None:
+        return error
+    nfts = section_view(nfts, section) if nfts else nfts
     if not nfts:
-        await interaction.followup.send("❌ Error al obtener datos de NFT. Por favor intenta de nuevo más tarde.")
-        return
+        return {'content': CATALOG_ERROR_REPLY}
     
-    # Calculate statistics
-    prices = [int(nft['price'].replace(',', '')) for nft in nfts]
-    total_nfts = len(nfts)
-    avg_price = sum(prices) / len(prices)
-    min_price = min(prices)
-    max_price = max(prices)
+    # Statistics are maintained incrementally as snapshots change
+    stats = catalog_stats(nfts, section)
+    total_nfts = stats.count
+    avg_price = stats.average_price
+    min_price = stats.min_price
+    max_price = stats.max_price
     
     # Find cheapest and most expensive NFTs
-    cheapest = min(nfts, key=lambda x: int(x['price'].replace(',', '')))
-    most_expensive = max(nfts, key=lambda x: int(x['price'].replace(',', '')))
+    cheapest = stats.cheapest
+    most_expensive = stats.most_expensive
     
     embed = discord.Embed(
-        title="📊 Estadísticas del Marketplace MSU",
+        title=section_title("📊 Estadísticas del Marketplace MSU", section),
         description="Información general del marketplace:",
         color=0x9932cc
     )
@@ -602,7 +1315,178 @@ async def estadisticas(interaction: discord.Interaction):
     )
     
     embed.set_footer(text="Datos actualizados cada 5 minutos")
-    await interaction.followup.send(embed=embed)
+    return {'embed': embed}
+
+@bot.tree.command(name="estadisticas", description="Mostrar estadísticas del marketplace")
+@app_commands.describe(seccion="Sección del marketplace (opcional, por defecto todas)")
+@app_commands.autocomplete(seccion=seccion_autocomplete)
+async def estadisticas(interaction: discord.Interaction, seccion: str = None):
+    """Slash command to show marketplace statistics"""
+    await interaction.response.defer()
+    section = section_name(seccion)
+    await respond_with_deadline(
+        interaction, "estadisticas",
+        lambda on_batch: get_nft_data(on_batch=on_batch),
+        cached_catalog,
+        lambda nfts: build_stats_reply(nfts, section)
+    )
+
+def build_distribution_reply(nombre_item, nfts, section=None):
+    """Reply for /distribucion: price distribution of the catalog (or one section) or of one item"""
+    error = section_error_reply(section)
+    if error is not None:
+        return error
+    # Cached per snapshot version when this is the current catalog
+    version = snapshot_version if nfts is nft_cache else None
+    if nfts and section is not None:
+        version = f"{version}:{section}" if version is not None else None
+        nfts = section_view(nfts, section)
+    if not nfts:
+        return {'content': CATALOG_ERROR_REPLY}
+    
+    result = price_analytics.analyze(nfts, nombre_item, top=5, version=version)
+    if not result['count']:
+        embed = discord.Embed(
+            title="📈 Distribución de precios",
+            description=f"No se encontraron items que coincidan con '{nombre_item}'",
+            color=0xff0000
+        )
+        return {'embed': embed}
+    
+    percentiles = result['percentiles']
+    embed = discord.Embed(
+        title=section_title(
+            f"📈 Distribución de precios para '{nombre_item}'" if nombre_item else "📈 Distribución de precios", section
+        ),
+        description=f"**{result['count']:,}** listados\n"
+                    f"💰 Mediana: **{result['median']:,.0f}**\n"
+                    f"💰 Promedio: **{result['mean']:,.0f}** (desv. estándar {result['std']:,.0f})",
+        color=0x9932cc
+    )
+    embed.add_field(
+        name="Percentiles",
+        value="\n".join(f"p{pct}: **{value:,.0f}**" for pct, value in percentiles.items()),
+        inline=True
+    )
+    
+    # Log-scale histogram as text bars
+    largest = max(row['count'] for row in result['histogram'])
+    bars = [
+        f"{row['low']:>13,} {'█' * max(1, round(row['count'] / largest * 15)) if row['count'] else ''} {row['count']}"
+        for row in result['histogram']
+    ]
+    embed.add_field(name="Histograma (escala log)", value="```" + "\n".join(bars)[:1000] + "```", inline=False)
+    
+    if len(result['breakdown']) > 1:
+        embed.add_field(
+            name="Por item",
+            value="\n".join(
+                f"**{row['item']}** · {row['count']:,} · mediana {row['median']:,.0f}"
+                for row in result['breakdown']
+            )[:1024],
+            inline=False
+        )
+    
+    return {'embed': embed}
+
+@bot.tree.command(name="distribucion", description="Mostrar la distribución de precios del marketplace")
+@app_commands.describe(
+    nombre_item="Filtrar por nombre de item (opcional)",
+    seccion="Sección del marketplace (opcional, por defecto todas)"
+)
+@app_commands.autocomplete(nombre_item=nombre_item_autocomplete, seccion=seccion_autocomplete)
+async def distribucion(interaction: discord.Interaction, nombre_item: str = None, seccion: str = None):
+    """Slash command to show the price distribution (median, percentiles, histogram)"""
+    await interaction.response.defer()
+    section = section_name(seccion)
+    await respond_with_deadline(
+        interaction, "distribucion",
+        lambda on_batch: get_nft_data(on_batch=on_batch),
+        cached_catalog,
+        lambda nfts: build_distribution_reply(nombre_item, nfts, section)
+    )
+
+def describe_listing(nft):
+    """One-line price and attributes of a listing"""
+    details = [f"💰 **{parse_price(nft['price']):,}**"]
+    if nft.get('category'):
+        details.append(nft['category'])
+    if nft.get('level') is not None:
+        details.append(f"Nv. {nft['level']}")
+    if nft.get('star_force') is not None:
+        details.append(f"★ {nft['star_force']}")
+    if nft.get('seller'):
+        details.append(f"👤 {nft['seller']}")
+    return " · ".join(details)
+
+# /filtrar option name for each FacetIndex.query filter
+FILTER_LABELS = {
+    'name': 'nombre_item', 'category': 'categoria', 'level_min': 'nivel_min', 'star_force_min': 'estrellas_min',
+    'seller': 'vendedor', 'price_min': 'precio_min', 'price_max': 'precio_max', 'section': 'seccion',
+}
+
+def build_filter_reply(filters, nfts):
+    """Reply for /filtrar: cheapest listings matching the filters"""
+    error = section_error_reply(filters.get('section'))
+    if error is not None:
+        return error
+    if not nfts:
+        return {'content': CATALOG_ERROR_REPLY}
+    
+    index = catalog_index(nfts)
+    matches = index.query(limit=15, **filters)
+    total = index.count(**filters)
+    applied = ", ".join(
+        f"{FILTER_LABELS[name]}={value}" for name, value in filters.items() if value is not None
+    ) or "ninguno"
+    
+    if not matches:
+        embed = discord.Embed(
+            title="🔎 Filtrar items",
+            description=f"Ningún item coincide con los filtros ({applied})",
+            color=0xff0000
+        )
+        return {'embed': embed}
+    
+    embed = discord.Embed(
+        title="🔎 Items filtrados (más baratos primero)",
+        description=f"**{total:,}** item(s) con filtros: {applied}",
+        color=0x0099ff
+    )
+    for i, nft in enumerate(matches, 1):
+        embed.add_field(name=f"{i}. {nft['name']}", value=describe_listing(nft), inline=False)
+    
+    if total > len(matches):
+        embed.set_footer(text=f"Mostrando los primeros {len(matches)} de {total:,} resultados")
+    return {'embed': embed}
+
+@bot.tree.command(name="filtrar", description="Filtrar items por categoría, nivel, estrellas, vendedor y precio")
+@app_commands.describe(
+    nombre_item="Parte del nombre del item (opcional)",
+    categoria="Categoría exacta (opcional)",
+    nivel_min="Nivel mínimo (opcional)",
+    estrellas_min="Star force mínimo (opcional)",
+    vendedor="Vendedor (opcional)",
+    precio_min="Precio mínimo (opcional)",
+    precio_max="Precio máximo (opcional)",
+    seccion="Sección del marketplace (opcional, por defecto todas)"
+)
+@app_commands.autocomplete(nombre_item=nombre_item_autocomplete, seccion=seccion_autocomplete)
+async def filtrar(interaction: discord.Interaction, nombre_item: str = None, categoria: str = None,
+                  nivel_min: int = None, estrellas_min: int = None, vendedor: str = None,
+                  precio_min: int = None, precio_max: int = None, seccion: str = None):
+    """Filter the cached catalog in memory through the facet index"""
+    await interaction.response.defer()
+    filters = {
+        'name': nombre_item, 'category': categoria, 'level_min': nivel_min, 'star_force_min': estrellas_min,
+        'seller': vendedor, 'price_min': precio_min, 'price_max': precio_max, 'section': section_name(seccion),
+    }
+    await respond_with_deadline(
+        interaction, "filtrar",
+        lambda on_batch: get_nft_data(on_batch=on_batch),
+        cached_catalog,
+        lambda nfts: build_filter_reply(filters, nfts)
+    )
 
 @bot.tree.command(name="clear_sync", description="Limpiar y sincronizar comandos (arregla errores)")
 async def clear_sync_slash(interaction: discord.Interaction):
@@ -610,12 +1494,8 @@ async def clear_sync_slash(interaction: discord.Interaction):
     await interaction.response.defer()
     
     try:
-        # Clear all commands first
-        bot.tree.clear_commands(guild=None)
-        await bot.tree.sync()
-        
-        # Re-sync with current commands
-        synced = await bot.tree.sync()
+        # A sync overwrites all global commands, so one forced sync also clears stale ones
+        synced = await command_sync.sync(bot.tree, application_id=bot.application_id, force=True)
         await interaction.followup.send(f"✅ Comandos limpiados y sincronizados: {len(synced)} comando(s)\n" + "\n".join([f"- /{cmd.name}" for cmd in synced]))
     except Exception as e:
         await interaction.followup.send(f"❌ Error: {e}")
@@ -626,11 +1506,91 @@ async def sync_commands_slash(interaction: discord.Interaction):
     await interaction.response.defer()
     
     try:
-        synced = await bot.tree.sync()
+        synced = await command_sync.sync(bot.tree, application_id=bot.application_id)
+        if synced is None:
+            await interaction.followup.send("✅ Los comandos no cambiaron desde la última sincronización (usa /clear_sync para forzarla)")
+            return
         await interaction.followup.send(f"✅ Sincronizados {len(synced)} comando(s):\n" + "\n".join([f"- /{cmd.name}" for cmd in synced]))
     except Exception as e:
         await interaction.followup.send(f"❌ Error al sincronizar: {e}")
 
+@bot.tree.command(name="lag", description="Ver el retraso del event loop y bloqueos recientes (admin)")
+@app_commands.default_permissions(administrator=True)
+async def lag_slash(interaction: discord.Interaction):
+    """Admin command to show event loop lag and the most recent stalls"""
+    summary = loop_monitor.summary()
+    embed = discord.Embed(
+        title="🐢 Event loop",
+        description=f"Último: **{summary['last_ms']}ms** · p50: **{summary['p50_ms']}ms** · "
+                    f"p99: **{summary['p99_ms']}ms** · máx: **{summary['max_ms']}ms**",
+        color=0x9932cc
+    )
+    
+    for stall in list(reversed(summary['stalls']))[:5]:
+        when = time.strftime('%H:%M:%S', time.localtime(stall['at']))
+        if stall['stacks']:
+            # Keep the innermost frames, that's where the blocking call is
+            stack = stall['stacks'][0]['stack'][-900:]
+            value = f"```{stack}```"
+        else:
+            value = "Activa LOOP_MONITOR_DEBUG=1 para capturar el stack"
+        embed.add_field(name=f"{when} - {stall['lag_ms']}ms", value=value, inline=False)
+    
+    if not summary['stalls']:
+        embed.add_field(name="Sin bloqueos", value=f"Ningún bloqueo mayor a {summary['threshold_ms']:.0f}ms", inline=False)
+    
+    embed.set_footer(text=f"{summary['samples']} muestras · modo debug: {'sí' if summary['debug'] else 'no'}")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+def format_ms(ms):
+    """Compact duration for tables: 850ms, 5.2s"""
+    return f"{ms:.0f}ms" if ms < 1000 else f"{ms / 1000:.1f}s"
+
+def perf_table(summaries, strip=""):
+    """Fixed-width table of stage percentiles for an embed field"""
+    lines = [f"{'etapa':<16}{'n':>5}{'p50':>8}{'p95':>8}{'p99':>8}"]
+    for stage, summary in summaries.items():
+        lines.append(
+            f"{stage[len(strip):][:16]:<16}{summary['count']:>5}{format_ms(summary['p50_ms']):>8}"
+            f"{format_ms(summary['p95_ms']):>8}{format_ms(summary['p99_ms']):>8}"
+        )
+    return "```" + "\n".join(lines)[:1000] + "```"
+
+@bot.tree.command(name="perf", description="Ver el tiempo de cada etapa de scraping y comandos (admin)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(comando="Comando a desglosar (por defecto: total de cada comando)")
+async def perf_slash(interaction: discord.Interaction, comando: str = None):
+    """Admin command to show per-stage timing percentiles"""
+    embed = discord.Embed(
+        title="⏱️ Tiempos por etapa",
+        description=f"Percentiles de las últimas {perf.spans.capacity} mediciones de cada etapa",
+        color=0x9932cc
+    )
+    
+    scrape = perf.spans.summary("scrape.")
+    if scrape:
+        # Show the stages in the order a scrape goes through them
+        order = {f"scrape.{stage}": i for i, stage in enumerate(SCRAPE_STAGES)}
+        scrape = dict(sorted(scrape.items(), key=lambda item: order.get(item[0], len(order))))
+        embed.add_field(name="🌐 Scraping (por página)", value=perf_table(scrape, "scrape."), inline=False)
+    
+    if comando:
+        prefix = f"command.{comando.strip().lstrip('/')}."
+        stages = perf.spans.summary(prefix)
+        title = f"💬 /{prefix[8:-1]}"
+        value = perf_table(stages, prefix) if stages else "Sin mediciones para este comando"
+    else:
+        totals = {
+            stage[:-len(".total")]: summary
+            for stage, summary in perf.spans.summary("command.").items() if stage.endswith(".total")
+        }
+        title = "💬 Comandos (total)"
+        value = perf_table(totals, "command.") if totals else "Sin mediciones todavía"
+    embed.add_field(name=title, value=value, inline=False)
+    
+    embed.set_footer(text="JSON completo en /admin/perf")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 # Run the bot
 if __name__ == "__main__":
     # Get bot token from environment variable
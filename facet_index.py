@@ -0,0 +1,122 @@
+"""Faceted in-memory index over a catalog snapshot.
+
+Listings are numbered in price order, and every facet value (category,
+level, star force, seller, marketplace section) maps to a bitmap (a Python
+int) of the listings that have it. A query ANDs the facet bitmaps with a
+contiguous bit range for the price bounds, so filtering never rescans the
+catalog, and walking the set bits from the lowest yields matches cheapest
+first.
+"""
+
+import bisect
+
+FACETS = ("category", "level", "star_force", "seller", "section")
+
+
+def _bits(bitmap, limit=None):
+    """Indexes of the set bits, lowest first"""
+    # Binary digits least significant first; str.find skips runs of zeros in C
+    digits = bin(bitmap)[:1:-1]
+    indexes = []
+    i = digits.find("1")
+    while i != -1 and (limit is None or len(indexes) < limit):
+        indexes.append(i)
+        i = digits.find("1", i + 1)
+    return indexes
+
+
+def _bitmap(positions, size):
+    """Int bitmap with the given bit positions set"""
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _normalize(value):
+    return value.strip().lower() if isinstance(value, str) else value
+
+
+class FacetIndex:
+    def __init__(self, nfts, price_of):
+        self.items = nfts
+        order = sorted(range(len(nfts)), key=lambda i: price_of(nfts[i]['price']))
+        self.listings = [nfts[i] for i in order]
+        self.prices = [price_of(nft['price']) for nft in self.listings]
+        # facet -> normalized value -> value as displayed
+        self.labels = {facet: {} for facet in FACETS}
+        positions = {facet: {} for facet in FACETS}
+        for position, nft in enumerate(self.listings):
+            for facet in FACETS:
+                value = nft.get(facet)
+                if value is None or value == "":
+                    continue
+                key = _normalize(value)
+                positions[facet].setdefault(key, []).append(position)
+                self.labels[facet].setdefault(key, value)
+        # facet -> normalized value -> bitmap
+        self.postings = {
+            facet: {key: _bitmap(found, len(self.listings)) for key, found in values.items()}
+            for facet, values in positions.items()
+        }
+
+    def values(self, facet):
+        """(value, listing count) pairs for a facet, most common first"""
+        counts = [(self.labels[facet][key], bitmap.bit_count()) for key, bitmap in self.postings[facet].items()]
+        return sorted(counts, key=lambda pair: (-pair[1], str(pair[0])))
+
+    def _price_range(self, price_min, price_max):
+        low = bisect.bisect_left(self.prices, price_min) if price_min is not None else 0
+        high = bisect.bisect_right(self.prices, price_max) if price_max is not None else len(self.prices)
+        if high <= low:
+            return 0
+        return ((1 << high) - 1) ^ ((1 << low) - 1)
+
+    def _at_least(self, facet, minimum):
+        """Union of the bitmaps of every numeric facet value >= minimum"""
+        bitmap = 0
+        for value, postings in self.postings[facet].items():
+            if value >= minimum:
+                bitmap |= postings
+        return bitmap
+
+    def _match(self, price_min=None, price_max=None, level_min=None, star_force_min=None, **facets):
+        """Bitmap of the listings matching every facet value and bound"""
+        bitmap = self._price_range(price_min, price_max)
+        for facet, value in facets.items():
+            if facet not in self.postings:
+                raise ValueError(f"Unknown facet: {facet}")
+            if value is None:
+                continue
+            bitmap &= self.postings[facet].get(_normalize(value), 0)
+            if not bitmap:
+                return 0
+        if level_min is not None:
+            bitmap &= self._at_least("level", level_min)
+        if star_force_min is not None:
+            bitmap &= self._at_least("star_force", star_force_min)
+        return bitmap
+
+    def query(self, name=None, limit=None, **filters):
+        """Listings matching every given facet value and bound, cheapest first.
+
+        Facets are matched exactly (case-insensitive); `name` is a substring
+        filter applied only to the listings left after the bitmap intersection.
+        """
+        bitmap = self._match(**filters)
+        if not name:
+            return [self.listings[i] for i in _bits(bitmap, limit)]
+        term = name.strip().lower()
+        matches = []
+        for i in _bits(bitmap):
+            if term in self.listings[i]['name'].lower():
+                matches.append(self.listings[i])
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    def count(self, name=None, **filters):
+        """Number of listings matching the filters (see query)"""
+        if name:
+            return len(self.query(name=name, **filters))
+        return self._match(**filters).bit_count()
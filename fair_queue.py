@@ -0,0 +1,230 @@
+"""Fair queuing of user-triggered scrapes across guilds and users.
+
+A command that needs a fresh scrape takes a slot from `FairQueue` before
+scraping. When all slots are busy, waiting scrapes are admitted by
+deficit round robin over guilds (a guild's share is proportional to its
+weight, `quantum * weight` per round) and round robin over the users of a
+guild, so one user or one busy server cannot monopolize the scraper.
+
+Cooldowns stop a user (or guild) from triggering scrapes back to back:
+`check()` returns a `Throttled` error with the seconds left, and callers
+answer from cache or ask the user to wait instead of scraping.
+"""
+
+import asyncio
+import collections
+import math
+import time
+
+
+class Throttled(Exception):
+    """A scrape was refused for a user or guild (cooldown or too many pending)"""
+
+    def __init__(self, reason, retry_after=0.0):
+        super().__init__(f"{reason}, retry in {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    def __init__(self, guild, user, cost):
+        self.guild = guild
+        self.user = user
+        self.cost = cost
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.monotonic()
+
+
+class _Flow:
+    """Pending scrapes of one guild, per user in round robin order"""
+
+    def __init__(self):
+        self.deficit = 0.0
+        self.users = collections.OrderedDict()
+
+    def head(self):
+        return next(iter(self.users.values()))[0]
+
+
+class FairQueue:
+    def __init__(self, limit=2, quantum=1.0, weights=None, user_cooldown=0.0, guild_cooldown=0.0,
+                 max_pending_per_user=1, wait_samples=256, max_tracked=10000):
+        # A guild only earns turns with a positive share; zero would stall the round forever
+        for guild, weight in (weights or {}).items():
+            if not (math.isfinite(weight) and weight > 0):
+                raise ValueError(f"Fair queue weight of guild {guild} must be a positive number, got {weight}")
+        if not (math.isfinite(quantum) and quantum > 0):
+            raise ValueError(f"Fair queue quantum must be a positive number, got {quantum}")
+        # Scrapes admitted at once; an int or a callable (e.g. the upstream concurrency limit)
+        self.limit = limit
+        self.quantum = quantum
+        self.weights = weights or {}
+        self.user_cooldown = user_cooldown
+        self.guild_cooldown = guild_cooldown
+        self.max_pending_per_user = max_pending_per_user
+        self.max_tracked = max_tracked
+        self.in_flight = 0
+        self.flows = {}
+        self._active = collections.deque()
+        self._last_user = {}
+        self._last_guild = {}
+        self._pending = collections.Counter()
+        self.admitted = collections.Counter()
+        self.rejected = collections.defaultdict(collections.Counter)
+        self.waits = collections.defaultdict(lambda: collections.deque(maxlen=wait_samples))
+
+    def _limit(self):
+        return max(1, int(self.limit() if callable(self.limit) else self.limit))
+
+    def check(self, guild, user):
+        """The Throttled error this user or guild would get for a new scrape right now, or None"""
+        now = time.monotonic()
+        if self._pending[(guild, user)] >= self.max_pending_per_user:
+            return Throttled("pending", 0.0)
+        if (guild, user) in self._last_user:
+            left = self.user_cooldown - (now - self._last_user[(guild, user)])
+            if left > 0:
+                return Throttled("user_cooldown", left)
+        if guild in self._last_guild:
+            left = self.guild_cooldown - (now - self._last_guild[guild])
+            if left > 0:
+                return Throttled("guild_cooldown", left)
+        return None
+
+    def reject(self, guild, throttled):
+        """Count a refused scrape for the guild and raise its Throttled error"""
+        self.rejected[guild][throttled.reason] += 1
+        raise throttled
+
+    async def acquire(self, guild, user, cost=1.0):
+        """Wait for a scrape slot in fair order; returns the seconds waited"""
+        waiter = _Waiter(guild, user, cost)
+        flow = self.flows.get(guild)
+        if flow is None:
+            flow = self.flows[guild] = _Flow()
+            self._active.append(guild)
+        flow.users.setdefault(user, collections.deque()).append(waiter)
+        self._pending[(guild, user)] += 1
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller gave up
+                self.release()
+            else:
+                self._remove(waiter)
+            raise
+        finally:
+            self._pending[(guild, user)] -= 1
+            if not self._pending[(guild, user)]:
+                del self._pending[(guild, user)]
+        waited = time.monotonic() - waiter.enqueued
+        self.waits[guild].append(waited)
+        return waited
+
+    def release(self):
+        """Free a slot taken by acquire()"""
+        self.in_flight -= 1
+        self._dispatch()
+
+    def slot(self, guild, user, cost=1.0):
+        """async with queue.slot(guild, user): ... holds a slot for the block"""
+        return _Slot(self, guild, user, cost)
+
+    def _dispatch(self):
+        # Deficit round robin: the guild at the head is served while its
+        # deficit covers the next scrape, otherwise it earns its quantum
+        # and goes to the back of the round
+        while self._active and self.in_flight < self._limit():
+            guild = self._active[0]
+            flow = self.flows[guild]
+            waiter = flow.head()
+            if flow.deficit < waiter.cost:
+                flow.deficit += self.quantum * self.weights.get(guild, 1.0)
+                self._active.rotate(-1)
+                continue
+            flow.deficit -= waiter.cost
+            self._pop(flow, waiter)
+            self.in_flight += 1
+            now = time.monotonic()
+            if len(self._last_user) > self.max_tracked:
+                self._forget_expired(now)
+            self._last_user[(waiter.guild, waiter.user)] = now
+            self._last_guild[waiter.guild] = now
+            self.admitted[guild] += 1
+            waiter.future.set_result(None)
+
+    def _forget_expired(self, now):
+        """Drop cooldowns that are over so the bookkeeping stays bounded"""
+        self._last_user = {key: at for key, at in self._last_user.items() if now - at < self.user_cooldown}
+        self._last_guild = {key: at for key, at in self._last_guild.items() if now - at < self.guild_cooldown}
+
+    def _pop(self, flow, waiter):
+        queue = flow.users.pop(waiter.user)
+        queue.popleft()
+        if queue:
+            # Next scrape of this user goes behind the guild's other users
+            flow.users[waiter.user] = queue
+        if not flow.users:
+            del self.flows[waiter.guild]
+            self._active.remove(waiter.guild)
+
+    def _remove(self, waiter):
+        flow = self.flows.get(waiter.guild)
+        queue = flow.users.get(waiter.user) if flow else None
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        if not queue:
+            del flow.users[waiter.user]
+        if not flow.users:
+            del self.flows[waiter.guild]
+            self._active.remove(waiter.guild)
+        self._dispatch()
+
+    def queued(self, guild=None):
+        """Scrapes waiting for a slot, for one guild or overall"""
+        if guild is None:
+            flows = self.flows.values()
+        else:
+            flows = [self.flows[guild]] if guild in self.flows else []
+        return sum(len(queue) for flow in flows for queue in flow.users.values())
+
+    def summary(self):
+        """Slots in use, and per guild: queued, admitted and rejected scrapes and queue waits"""
+        guilds = {}
+        for guild in set(self.admitted) | set(self.rejected) | set(self.flows):
+            waits = sorted(self.waits.get(guild, ()))
+            guilds[guild] = {
+                "queued": self.queued(guild),
+                "admitted": self.admitted[guild],
+                "rejected": dict(self.rejected.get(guild, {})),
+                "wait_p50_seconds": round(waits[len(waits) // 2], 3) if waits else None,
+                "wait_max_seconds": round(waits[-1], 3) if waits else None,
+            }
+        return {
+            "limit": self._limit(),
+            "in_flight": self.in_flight,
+            "queued": self.queued(),
+            "user_cooldown_seconds": self.user_cooldown,
+            "guild_cooldown_seconds": self.guild_cooldown,
+            "guilds": guilds,
+        }
+
+
+class _Slot:
+    def __init__(self, queue, guild, user, cost):
+        self.queue = queue
+        self.guild = guild
+        self.user = user
+        self.cost = cost
+        self.waited = 0.0
+
+    async def __aenter__(self):
+        self.waited = await self.queue.acquire(self.guild, self.user, self.cost)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.queue.release()
+        return False
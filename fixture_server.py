@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Local stand-in for the msu.io marketplace, used by benchmarks and offline tests"""
+
+import json
+import os
+import random
+import threading
+from html import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MARKETPLACE_PATH = "/marketplace/nft"
+API_PATH = "/api/marketplace/items"
+PAGE_SIZE = 24
+
+ITEM_NAMES = [
+    "Unchained Dagger", "Arcane Umbra Bow", "Absolab Staff", "Sweetwater Hat",
+    "Genesis Claw", "Pensalir Battle Mail", "Eagle Eye Shoulder", "Royal Ranger Beret",
+    "Fafnir Mistilteinn", "Utgard Crossbow", "Dark Scarlet Shield", "Crimson Maple Leaf",
+    "Pink Bean Cup", "Lucky Item Scroll", "Zakum Helmet", "Horntail Necklace",
+]
+
+CATEGORIES = ["Weapon", "Armor", "Accessory", "Consumable"]
+LEVELS = [100, 120, 140, 150, 160, 200]
+
+# Stand-ins for the artwork and fonts the real page pulls in, so the
+# resource filtering savings show up in the benchmark numbers
+ASSET_SIZES = {".png": 150_000, ".woff2": 60_000, ".js": 40_000}
+
+
+def build_catalog(size=400, seed=7):
+    """Deterministic list of listings used to fill the fixture pages"""
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(size):
+        name = f"{rng.choice(ITEM_NAMES)} #{i + 1}"
+        price = rng.randint(1_000, 5_000_000)
+        catalog.append({"name": name, "price": f"{price:,}"})
+    # Card attributes come from a separate stream so names and prices stay
+    # the same as in catalogs generated before attributes existed
+    attributes = random.Random(seed + 1)
+    for i, nft in enumerate(catalog):
+        nft["category"] = CATEGORIES[ITEM_NAMES.index(nft["name"].rsplit(" #", 1)[0]) % len(CATEGORIES)]
+        nft["level"] = attributes.choice(LEVELS)
+        nft["star_force"] = attributes.randint(0, 22)
+        nft["seller"] = f"seller{attributes.randrange(40):02d}"
+        nft["listing_id"] = f"{100000 + i}"
+    return catalog
+
+
+def api_payload(listings, page=1):
+    """JSON body of the fixture listings API, shaped like a typical marketplace response"""
+    items = []
+    for nft in listings:
+        item = {"name": nft["name"], "salesInfo": {"price": int(nft["price"].replace(",", ""))}}
+        if "listing_id" in nft:
+            item["tokenId"] = nft["listing_id"]
+        if "category" in nft:
+            item["category"] = {"name": nft["category"]}
+        if "level" in nft:
+            item["requiredLevel"] = nft["level"]
+        if "star_force" in nft:
+            item["starForce"] = nft["star_force"]
+        if "seller" in nft:
+            item["seller"] = {"name": nft["seller"]}
+        items.append(item)
+    return {"data": {"items": items}, "paginationResult": {"page": page, "pageSize": PAGE_SIZE}}
+
+
+def _script_string(value):
+    """JavaScript string literal that is safe inside an inline <script>"""
+    return json.dumps(value).replace("</", "<\\/")
+
+
+def render_page(listings, page=1, api_query=None):
+    """Render listings with the same markup classes the real marketplace uses.
+
+    With api_query the page also fetches its listings from the fixture API,
+    like the real site's client-side requests.
+    """
+    cards = []
+    for i, nft in enumerate(listings):
+        attributes = ""
+        if "category" in nft:
+            attributes += f'<span class="BaseCard_category__k2Lm1">{escape(nft["category"])}</span>'
+        if "level" in nft:
+            attributes += f'<span class="CardLevel_level__a81Qz">Lv. {nft["level"]}</span>'
+        if "star_force" in nft:
+            attributes += f'<span class="StarForce_count__9dJx2">★ {nft["star_force"]}</span>'
+        if "seller" in nft:
+            attributes += f'<span class="CardSeller_name__Vb7tq">{escape(nft["seller"])}</span>'
+        href = f'/marketplace/nft/{escape(nft["listing_id"])}' if "listing_id" in nft else "#"
+        cards.append(
+            f'<a class="BaseCard_link__P0wQe" href="{href}"><div class="BaseCard_card__Xq3vB">'
+            f'<img src="/static/nft-{page}-{i}.png" alt="">'
+            f'<p class="BaseCard_itemName__Z2GfD">{escape(nft["name"])}</p>'
+            f'<span class="CardPrice_number__OYpdb">{escape(nft["price"])}</span>'
+            f'{attributes}</div></a>'
+        )
+    return (
+        "<!DOCTYPE html><html><head><title>MSU Marketplace</title>"
+        '<link rel="preload" href="/static/font.woff2" as="font" crossorigin>'
+        '<script src="/static/analytics.js" async></script>'
+        + (f"<script>fetch({_script_string(f'{API_PATH}?{api_query}')})</script>" if api_query is not None else "")
+        + "</head><body><main>" + "".join(cards) + "</main></body></html>"
+    )
+
+
+class MarketplaceHandler(BaseHTTPRequestHandler):
+    catalog = build_catalog()
+    latency = 0.0
+    # Share of marketplace requests answered with a 503, to simulate a degraded site
+    error_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path.startswith("/static/"):
+            extension = os.path.splitext(parsed.path)[1]
+            self._send(200, b"\0" * ASSET_SIZES.get(extension, 1024), "application/octet-stream")
+            return
+        if parsed.path.rstrip("/") not in (MARKETPLACE_PATH, API_PATH):
+            self._send(404, b"not found", "text/plain")
+            return
+
+        if self.latency:
+            threading.Event().wait(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self._send(503, b"service unavailable", "text/plain")
+            return
+
+        query = parse_qs(parsed.query)
+        keyword = query.get("keyword", [""])[0]
+        page = max(1, int(query.get("page", ["1"])[0] or 1))
+
+        is_api = parsed.path.rstrip("/") == API_PATH
+        recorded = None if is_api else recorded_page(keyword, page)
+        if recorded is not None:
+            self._send(200, recorded, "text/html; charset=utf-8")
+            return
+
+        listings = self.catalog
+        if keyword:
+            listings = [nft for nft in listings if keyword.lower() in nft["name"].lower()]
+        listings = listings[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+        if is_api:
+            self._send(200, json.dumps(api_payload(listings, page)).encode("utf-8"), "application/json")
+            return
+        self._send(200, render_page(listings, page, api_query=parsed.query).encode("utf-8"), "text/html; charset=utf-8")
+
+
+def recorded_page(keyword, page):
+    """Return a recorded page from fixtures/ if one exists for this URL"""
+    slug = keyword.lower().replace(" ", "_") if keyword else "all"
+    path = os.path.join(FIXTURES_DIR, f"{slug}_page{page}.html")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    return None
+
+
+def start_server(host="127.0.0.1", port=0, catalog=None, latency=0.0, error_rate=0.0):
+    """Start the stand-in marketplace in a background thread; returns (server, base_url).
+
+    Latency and error rate can be changed while it runs through
+    server.RequestHandlerClass.
+    """
+    handler = type("Handler", (MarketplaceHandler,), {
+        "catalog": catalog if catalog is not None else build_catalog(),
+        "latency": latency,
+        "error_rate": error_rate,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://{host}:{server.server_address[1]}{MARKETPLACE_PATH}"
+    return server, base_url
+
+
+if __name__ == "__main__":
+    server, base_url = start_server(port=int(os.getenv("FIXTURE_PORT", 8765)))
+    print(f"🧪 Fixture marketplace running at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,193 @@
+"""Upstream governor: how hard the bot may hit msu.io.
+
+Every scrape goes through `await UpstreamGovernor.acquire()` / `release()`:
+- a token bucket caps the rate at which scrapes start,
+- an AIMD limit caps how many run at once (grows by about one per window
+  of fast successes, halves on an error or a slow scrape),
+- a circuit breaker opens after repeated failures so callers fail fast
+  (and answer from cache) instead of tying up browsers; after a cool-down
+  one probe scrape is let through to test the site again,
+- `backoff()` gives exponential retry delays with full jitter.
+"""
+
+import asyncio
+import collections
+import random
+import threading
+import time
+
+
+class UpstreamError(Exception):
+    """The marketplace could not be scraped (every attempt failed)"""
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised instead of scraping while the upstream circuit is open"""
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Delay before retry number `attempt` (0-based): full jitter over an exponential cap"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait for a token"""
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+    def acquire_blocking(self):
+        """Wait for a token from a worker thread"""
+        with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class UpstreamGovernor:
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, rate=0.5, burst=3, min_concurrency=1, max_concurrency=4, slow_threshold=20.0,
+                 failure_threshold=3, error_rate_threshold=0.5, window=20, open_seconds=60,
+                 backoff_base=1.0, backoff_cap=30.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(max_concurrency, max(min_concurrency, 2)))
+        self.slow_threshold = slow_threshold
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.open_seconds = open_seconds
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self._outcomes = collections.deque(maxlen=window)
+        self._probe_in_flight = False
+        self._slots = asyncio.Condition()
+        self.rejected = 0
+        self.trips = 0
+
+    def _check_circuit(self):
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                raise CircuitOpenError(f"upstream circuit open for another {self.retry_after():.0f}s")
+            self.state = self.HALF_OPEN
+            print("🔌 Upstream circuit half-open, sending a probe scrape")
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpenError("upstream circuit half-open, probe in flight")
+            self._probe_in_flight = True
+
+    async def acquire(self):
+        """Wait for a rate token and a concurrency slot; raises CircuitOpenError when degraded"""
+        try:
+            self._check_circuit()
+        except CircuitOpenError:
+            self.rejected += 1
+            raise
+        probe = self.state == self.HALF_OPEN
+        try:
+            await self.bucket.acquire()
+            async with self._slots:
+                await self._slots.wait_for(lambda: self.in_flight < int(self.limit))
+                self.in_flight += 1
+        except BaseException:
+            # Cancelled while waiting (command deadline, shutdown): release() will
+            # never run, so give up the probe or the circuit stays half-open forever
+            if probe:
+                self._probe_in_flight = False
+            raise
+
+    async def release(self, latency, ok):
+        """Report how a scrape went and free its slot"""
+        self.in_flight -= 1
+        slow = latency > self.slow_threshold
+        self._outcomes.append(ok)
+
+        if ok and not slow:
+            # Additive increase: about +1 after `limit` fast successes
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        else:
+            # Multiplicative decrease on errors and slow scrapes
+            self.limit = max(self.min_concurrency, self.limit / 2)
+
+        if ok:
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+
+        if self.state == self.HALF_OPEN and self._probe_in_flight:
+            self._probe_in_flight = False
+            if ok:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+                print("🔌 Upstream circuit closed, probe succeeded")
+            else:
+                self._trip()
+        elif self.state == self.CLOSED and self._should_trip():
+            self._trip()
+
+        async with self._slots:
+            self._slots.notify_all()
+
+    def _should_trip(self):
+        if self.consecutive_failures >= self.failure_threshold:
+            return True
+        if len(self._outcomes) >= self._outcomes.maxlen // 2:
+            return self.error_rate() >= self.error_rate_threshold
+        return False
+
+    def _trip(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        print(f"🔌 Upstream circuit open for {self.open_seconds}s "
+              f"({self.consecutive_failures} consecutive failures, error rate {self.error_rate():.0%})")
+
+    def error_rate(self):
+        if not self._outcomes:
+            return 0.0
+        return 1 - sum(self._outcomes) / len(self._outcomes)
+
+    def retry_after(self):
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+
+    def backoff(self, attempt):
+        """Delay before retry number `attempt` (0-based)"""
+        return backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+
+    def summary(self):
+        return {
+            "state": self.state,
+            "retry_after_seconds": round(self.retry_after(), 1),
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "tokens": round(self.bucket.tokens, 2),
+            "error_rate": round(self.error_rate(), 3),
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+            "trips": self.trips,
+        }
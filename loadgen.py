@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Synthetic slash-command load generator.
+
+Drives the real command callbacks from discord_bot.py with fake
+discord.Interaction objects and a stubbed, local fixture or replayed scraper, so
+caching and coalescing changes can be judged by numbers.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import discord
+from dotenv import load_dotenv
+load_dotenv()
+
+import discord_bot
+import perf
+from bench_scrape import summarize
+from fixture_server import ITEM_NAMES, PAGE_SIZE, build_catalog, start_server
+from governor import UpstreamGovernor
+from replay import Corpus, ReplayScraper
+from scraper import NFTScraper
+
+
+class FakeResponse:
+    """Stand-in for interaction.response"""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    async def defer(self, **kwargs):
+        self._done = True
+        self.interaction.deferred_at = time.perf_counter()
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        self.interaction.record(content, kwargs)
+
+    def is_done(self):
+        return self._done
+
+
+class FakeMessage:
+    """Stand-in for the WebhookMessage returned by followup.send(wait=True)"""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def edit(self, content=None, **kwargs):
+        self.interaction.record(content, kwargs)
+
+
+class FakeFollowup:
+    """Stand-in for interaction.followup"""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, wait=False, **kwargs):
+        self.interaction.record(content, kwargs)
+        return FakeMessage(self.interaction) if wait else None
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"loadgen-{user_id}"
+        self.guild_permissions = discord.Permissions.none()
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the command callbacks"""
+
+    def __init__(self, user_id=0, guild_id=0):
+        self.user = FakeUser(user_id)
+        self.guild_id = guild_id
+        self.created_at = discord.utils.utcnow()
+        self.started = time.perf_counter()
+        self.deferred_at = None
+        self.first_reply_at = None
+        self.replies = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    def record(self, content, kwargs):
+        if self.first_reply_at is None:
+            self.first_reply_at = time.perf_counter()
+        self.replies.append((content, kwargs))
+
+
+class ScrapeCounter:
+    """Thread-safe count of scrapes triggered during a run"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def increment(self):
+        with self._lock:
+            self.count += 1
+
+
+def make_stub_scraper(counter, catalog, latency):
+    """NFTScraper replacement that sleeps instead of launching Chrome"""
+
+    class StubScraper:
+        def __init__(self, *args, **kwargs):
+            self.last_timings = {}
+            self.last_bytes_downloaded = 0
+
+        def scrape_nfts(self, search_term=None, page=None):
+            counter.increment()
+            time.sleep(latency)
+            if not search_term:
+                return [dict(nft) for nft in catalog]
+            term = search_term.lower()
+            return [dict(nft) for nft in catalog if term in nft["name"].lower()]
+
+        def iter_pages(self, search_term=None, max_pages=1):
+            counter.increment()
+            term = (search_term or "").lower()
+            matches = [dict(nft) for nft in catalog if term in nft["name"].lower()]
+            for start in range(0, min(len(matches), max_pages * PAGE_SIZE), PAGE_SIZE):
+                time.sleep(latency)
+                yield matches[start:start + PAGE_SIZE]
+
+    return StubScraper
+
+
+def make_local_scraper(counter, base_url, settle_time):
+    """Real NFTScraper pointed at the fixture marketplace"""
+
+    class LocalScraper(NFTScraper):
+        def __init__(self, *args, **kwargs):
+            kwargs.update(base_url=base_url, settle_time=settle_time)
+            super().__init__(**kwargs)
+
+        def scrape_nfts(self, search_term=None, page=None):
+            counter.increment()
+            return super().scrape_nfts(search_term, page=page)
+
+        def iter_pages(self, search_term=None, max_pages=1):
+            counter.increment()
+            return super().iter_pages(search_term, max_pages=max_pages)
+
+    return LocalScraper
+
+
+def make_replay_scraper(counter, corpus, latency_scale):
+    """Replay scraper serving a recorded corpus"""
+
+    class CountingReplayScraper(ReplayScraper):
+        def __init__(self, *args, **kwargs):
+            super().__init__(corpus, latency_scale=latency_scale)
+
+        def scrape_nfts(self, search_term=None, page=None):
+            counter.increment()
+            return super().scrape_nfts(search_term, page=page)
+
+        def iter_pages(self, search_term=None, max_pages=1, **kwargs):
+            counter.increment()
+            return super().iter_pages(search_term, max_pages=max_pages, **kwargs)
+
+    return CountingReplayScraper
+
+
+COMMANDS = {
+    "buscar": lambda interaction, term: discord_bot.buscar.callback(interaction, term),
+    "top_nfts": lambda interaction, term: discord_bot.top_nfts.callback(interaction),
+    "estadisticas": lambda interaction, term: discord_bot.estadisticas.callback(interaction),
+}
+
+
+async def measure_loop_lag(samples, stop, interval=0.01):
+    """Record how late the event loop wakes up a sleeping task"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+async def run_load(requests=200, concurrency=50, rate=20.0, mix=None, users=50, guilds=5, seed=1, terms=None):
+    """Fire `requests` commands with Poisson arrivals at `rate`/s, at most `concurrency` in flight"""
+    rng = random.Random(seed)
+    mix = mix or {"buscar": 0.6, "top_nfts": 0.2, "estadisticas": 0.2}
+    names, weights = zip(*mix.items())
+    terms = terms or [name.split()[-1].lower() for name in ITEM_NAMES]
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {name: [] for name in names}
+    first_reply = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lag_samples = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(lag_samples, stop))
+
+    async def one(command, term, user_id, guild_id):
+        async with semaphore:
+            interaction = FakeInteraction(user_id, guild_id)
+            try:
+                await COMMANDS[command](interaction, term)
+                latencies[command].append(time.perf_counter() - interaction.started)
+                if interaction.first_reply_at is not None:
+                    first_reply[command].append(interaction.first_reply_at - interaction.started)
+            except Exception as e:
+                errors[command] += 1
+                print(f"❌ {command} failed: {e}")
+
+    started = time.perf_counter()
+    tasks = []
+    for _ in range(requests):
+        command = rng.choices(names, weights)[0]
+        tasks.append(asyncio.create_task(
+            one(command, rng.choice(terms), rng.randrange(users), rng.randrange(guilds))
+        ))
+        if rate > 0:
+            await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await lag_task
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+        "commands": {
+            name: dict(summarize(samples), errors=errors[name])
+            for name, samples in latencies.items()
+        },
+        # Time until the user sees an answer (cached answers count, see COMMAND_DEADLINE_SECONDS)
+        "first_reply": {name: summarize(samples) for name, samples in first_reply.items()},
+        "event_loop_lag": dict(summarize(lag_samples), max_ms=round(max(lag_samples, default=0) * 1000, 2)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=20.0, help="Mean arrivals per second (0 = all at once)")
+    parser.add_argument("--mix", default="buscar=0.6,top_nfts=0.2,estadisticas=0.2")
+    parser.add_argument("--scraper", choices=["stub", "local", "replay"], default="stub")
+    parser.add_argument("--corpus", help="Recorded corpus for --scraper replay (see replay.py)")
+    parser.add_argument(
+        "--replay-latency-scale", type=float, default=0.0,
+        help="Replay recorded stage timings scaled by this factor (0 = full speed)"
+    )
+    parser.add_argument("--scrape-latency", type=float, default=2.0, help="Seconds per stub scrape")
+    parser.add_argument("--catalog-size", type=int, default=400)
+    parser.add_argument("--upstream-rate", type=float, help="Scrapes started per second (default: UPSTREAM_RATE)")
+    parser.add_argument(
+        "--upstream-concurrency", type=int, help="Max concurrent scrapes (default: UPSTREAM_MAX_CONCURRENCY)"
+    )
+    parser.add_argument("--out", default="loadgen_results.json")
+    args = parser.parse_args()
+
+    mix = {}
+    for part in args.mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in COMMANDS:
+            parser.error(f"unknown command in --mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+
+    counter = ScrapeCounter()
+    server = None
+    terms = None
+    if args.scraper == "replay":
+        if not args.corpus:
+            parser.error("--scraper replay needs --corpus")
+        corpus = Corpus.load(args.corpus)
+        discord_bot.NFTScraper = make_replay_scraper(counter, corpus, args.replay_latency_scale)
+        # Search for the terms the corpus has pages for
+        terms = sorted({keyword for keyword, _ in corpus.keys() if keyword}) or None
+    elif args.scraper == "local":
+        server, base_url = start_server(catalog=build_catalog(args.catalog_size))
+        discord_bot.NFTScraper = make_local_scraper(counter, base_url, settle_time=0.5)
+    else:
+        discord_bot.NFTScraper = make_stub_scraper(counter, build_catalog(args.catalog_size), args.scrape_latency)
+    if args.upstream_rate or args.upstream_concurrency:
+        governor = discord_bot.governor
+        discord_bot.governor = UpstreamGovernor(
+            rate=args.upstream_rate or governor.bucket.rate,
+            burst=max(governor.bucket.burst, args.upstream_concurrency or 0),
+            max_concurrency=args.upstream_concurrency or governor.max_concurrency,
+            slow_threshold=max(governor.slow_threshold, args.scrape_latency * 2)
+        )
+
+    print(f"🚦 {args.requests} commands, concurrency {args.concurrency}, {args.rate}/s, {args.scraper} scraper")
+    try:
+        results = asyncio.run(run_load(args.requests, args.concurrency, args.rate, mix, terms=terms))
+    finally:
+        if server:
+            server.shutdown()
+    results["scrapes_triggered"] = counter.count
+    results["upstream"] = discord_bot.governor.summary()
+    results["fair_queue"] = discord_bot.fair_queue.summary()
+    results["stages"] = perf.spans.summary("command.")
+    results["config"] = vars(args)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\n📊 {results['throughput_rps']} commands/s over {results['elapsed_s']}s, {counter.count} scrapes triggered")
+    for name, summary in results["commands"].items():
+        print(f"  /{name:<13} n={summary['count']} p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms errors={summary['errors']}")
+    for name, summary in results["first_reply"].items():
+        print(f"  /{name:<13} first reply p50={summary['p50_ms']}ms p95={summary['p95_ms']}ms")
+    lag = results["event_loop_lag"]
+    print(f"  event loop lag p50={lag['p50_ms']}ms p99={lag['p99_ms']}ms max={lag['max_ms']}ms")
+    upstream = results["upstream"]
+    print(f"  upstream: concurrency limit {upstream['concurrency_limit']}, circuit {upstream['state']}, "
+          f"{upstream['rejected']} rejected")
+    for guild, queue in sorted(results["fair_queue"]["guilds"].items()):
+        print(f"  guild {guild}: {queue['admitted']} scrapes admitted, wait p50={queue['wait_p50_seconds']}s "
+              f"max={queue['wait_max_seconds']}s, rejected {queue['rejected'] or 0}")
+    print(f"💾 Saved results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
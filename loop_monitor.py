@@ -0,0 +1,111 @@
+"""Event-loop lag monitor and blocking-call detector.
+
+The monitor task sleeps for a short interval and measures how late it
+wakes up; that overshoot is the loop lag. In debug mode a watchdog thread
+also samples the loop thread's stack while the loop is stalled, so the
+code holding the loop shows up in the ring buffer.
+"""
+
+import asyncio
+import collections
+import sys
+import threading
+import time
+import traceback
+
+import metrics
+
+
+class LoopMonitor:
+    def __init__(self, interval=0.1, threshold=0.25, debug=False, capacity=50, sample_interval=0.02):
+        self.interval = interval
+        self.threshold = threshold
+        self.debug = debug
+        self.sample_interval = sample_interval
+        # Ring buffer of recent stalls (most recent last)
+        self.stalls = collections.deque(maxlen=capacity)
+        self.samples = 0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._recent_lags = collections.deque(maxlen=600)
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._stall_stacks = collections.Counter()
+        self._task = None
+        self._watchdog = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start monitoring the running loop (and the watchdog thread in debug mode)"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        if self.debug:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._heartbeat = time.monotonic()
+            self._record(max(0.0, loop.time() - expected))
+
+    def _record(self, lag):
+        self.samples += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self._recent_lags.append(lag)
+        metrics.event_loop_lag.set(lag)
+        metrics.event_loop_lag_seconds.observe(lag)
+
+        stacks = self._stall_stacks.most_common(3)
+        self._stall_stacks = collections.Counter()
+        if lag < self.threshold:
+            return
+        self.stalls.append({
+            "at": time.time(),
+            "lag_ms": round(lag * 1000, 1),
+            # (samples, stack) pairs, most frequent first; empty unless debug mode is on
+            "stacks": [{"samples": count, "stack": stack} for stack, count in stacks],
+        })
+        print(f"🐢 Event loop stalled for {lag * 1000:.0f}ms")
+
+    def _watch(self):
+        """Sample the loop thread's stack while it hasn't ticked for longer than the threshold"""
+        while not self._stop.wait(self.sample_interval):
+            if time.monotonic() - self._heartbeat < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame, limit=15))
+            self._stall_stacks[stack] += 1
+
+    def percentile(self, pct):
+        """Lag percentile over the recent samples, in seconds"""
+        if not self._recent_lags:
+            return 0.0
+        ordered = sorted(self._recent_lags)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+    def summary(self):
+        return {
+            "samples": self.samples,
+            "last_ms": round(self.last_lag * 1000, 1),
+            "p50_ms": round(self.percentile(50) * 1000, 1),
+            "p99_ms": round(self.percentile(99) * 1000, 1),
+            "max_ms": round(self.max_lag * 1000, 1),
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "debug": self.debug,
+            "stalls": list(self.stalls),
+        }
@@ -0,0 +1,165 @@
+"""Marketplace statistics maintained incrementally across snapshots.
+
+`MarketStats` keeps a running count and price sum plus two heaps for the
+cheapest and most expensive listing. A new snapshot is applied as a diff
+(listings added and removed), so a refresh costs O(changes * log n) and
+reads are O(1). The diff comes from the scrape itself (the listings of the
+pages that changed); a snapshot without one is diffed against the live
+listings in full.
+"""
+
+import collections
+import heapq
+
+
+def listing_key(nft):
+    """Identity of a listing for diffing snapshots"""
+    return (nft['name'], nft['price'])
+
+
+class MarketStats:
+    def __init__(self, price_of):
+        self.price_of = price_of
+        self.count = 0
+        self.total = 0
+        # Live listings: key -> (multiplicity, listing, price)
+        self._live = {}
+        # Heaps with lazy deletion; entries whose key is no longer live are
+        # popped when they reach the top
+        self._min_heap = []
+        self._max_heap = []
+        # The snapshot list (and its version) the stats currently describe
+        self.items = None
+        self.version = None
+        self.updates = 0
+        self.full_rebuilds = 0
+
+    def sync(self, items, version=None, changes=()):
+        """Make the stats describe `items`; a no-op if they already do.
+
+        `changes` are (from version, to version, added, removed) steps, as
+        kept by SectionCatalog. When they lead from the version the stats
+        describe to `version`, only their listings are applied.
+        """
+        if items is self.items:
+            return False
+        steps = self._steps_to(version, changes)
+        if steps is None:
+            self._diff_all(items)
+        for _, _, added, removed in steps or ():
+            self._diff_changes(added, removed)
+        self.items = items
+        self.version = version
+        return True
+
+    def _steps_to(self, version, changes):
+        """Steps of `changes` from self.version to `version`, or None if they do not connect"""
+        if version is None or self.version is None:
+            return None
+        by_start = {step[0]: step for step in changes}
+        steps = []
+        at = self.version
+        while at != version:
+            step = by_start.get(at)
+            if step is None or len(steps) >= len(by_start):
+                return None
+            steps.append(step)
+            at = step[1]
+        return steps
+
+    def _diff_changes(self, added, removed):
+        """Apply the listings a scrape added and removed (a listing that moved pages cancels out)"""
+        added_counts = collections.Counter(listing_key(nft) for nft in added)
+        removed_counts = collections.Counter(listing_key(nft) for nft in removed)
+        self._apply_counts(added, added_counts - removed_counts, removed_counts - added_counts)
+
+    def _diff_all(self, items):
+        """Diff a whole snapshot against the live listings"""
+        live = collections.Counter({key: entry[0] for key, entry in self._live.items()})
+        counts = collections.Counter(listing_key(nft) for nft in items)
+        self._apply_counts(items, counts - live, live - counts)
+
+    def _apply_counts(self, listings, added, removed):
+        first_seen = {}
+        for nft in listings:
+            key = listing_key(nft)
+            if key in added and key not in first_seen:
+                first_seen[key] = nft
+        self._apply_diff(
+            [(first_seen[key], n) for key, n in added.items()],
+            list(removed.items()),
+        )
+
+    def _apply_diff(self, added, removed):
+        """Apply (listing, multiplicity) additions and (key, multiplicity) removals"""
+        self.updates += 1
+        for key, n in removed:
+            entry = self._live.get(key)
+            if entry is None:
+                continue
+            multiplicity, nft, price = entry
+            n = min(n, multiplicity)
+            self.count -= n
+            self.total -= price * n
+            if multiplicity == n:
+                del self._live[key]
+            else:
+                self._live[key] = (multiplicity - n, nft, price)
+
+        for nft, n in added:
+            key = listing_key(nft)
+            price = self.price_of(nft['price'])
+            entry = self._live.get(key)
+            if entry is None:
+                self._live[key] = (n, nft, price)
+                heapq.heappush(self._min_heap, (price, key))
+                heapq.heappush(self._max_heap, (-price, key))
+            else:
+                self._live[key] = (entry[0] + n, entry[1], price)
+            self.count += n
+            self.total += price * n
+
+        self._prune()
+
+    def _prune(self):
+        """Drop dead heap tops so reads stay O(1); compact heaps that are mostly dead"""
+        if len(self._min_heap) > 2 * len(self._live) + 64:
+            self.full_rebuilds += 1
+            self._min_heap = [(entry[2], key) for key, entry in self._live.items()]
+            self._max_heap = [(-entry[2], key) for key, entry in self._live.items()]
+            heapq.heapify(self._min_heap)
+            heapq.heapify(self._max_heap)
+        while self._min_heap and self._min_heap[0][1] not in self._live:
+            heapq.heappop(self._min_heap)
+        while self._max_heap and self._max_heap[0][1] not in self._live:
+            heapq.heappop(self._max_heap)
+
+    @property
+    def cheapest(self):
+        return self._live[self._min_heap[0][1]][1] if self.count else None
+
+    @property
+    def most_expensive(self):
+        return self._live[self._max_heap[0][1]][1] if self.count else None
+
+    @property
+    def min_price(self):
+        return self._min_heap[0][0] if self.count else None
+
+    @property
+    def max_price(self):
+        return -self._max_heap[0][0] if self.count else None
+
+    @property
+    def average_price(self):
+        return self.total / self.count if self.count else None
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'average_price': self.average_price,
+            'min_price': self.min_price,
+            'max_price': self.max_price,
+            'cheapest': self.cheapest,
+            'most_expensive': self.most_expensive,
+        }
@@ -0,0 +1,256 @@
+"""Tiny OpenMetrics registry for the bot (no prometheus_client dependency)"""
+
+import math
+import threading
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 7.5, 10, 15, 30, 60)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+AGE_BUCKETS = (10, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200)
+LOOKUP_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+_lock = threading.Lock()
+_metrics = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "unknown"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        with _lock:
+            _metrics.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _snapshot(self):
+        with _lock:
+            return sorted(self._values.items())
+
+    def header(self):
+        return [f"# TYPE {self.name} {self.kind}", f"# HELP {self.name} {self.documentation}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        for key, value in self._snapshot():
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        # Optional callable evaluated at exposition time (unlabelled gauges only)
+        self.function = function
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels):
+        if self.function is not None:
+            return self.function()
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception:
+                return
+            if value is not None:
+                yield f"{self.name} {_format_value(value)}"
+            return
+        for key, value in self._snapshot():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def _snapshot(self):
+        with _lock:
+            return sorted((key, {"counts": list(state["counts"]), "sum": state["sum"], "count": state["count"]})
+                          for key, state in self._values.items())
+
+    def samples(self):
+        for key, state in self._snapshot():
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_count{labels} {state['count']}"
+            yield f"{self.name}_sum{labels} {_format_value(state['sum'])}"
+
+
+def render():
+    """Render every registered metric in OpenMetrics text format"""
+    lines = []
+    with _lock:
+        metrics = list(_metrics)
+    for metric in metrics:
+        lines.extend(metric.header())
+        lines.extend(metric.samples())
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def count_chrome_processes():
+    """Number of live Chrome/chromedriver processes spawned by this bot"""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    count = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            name = child.name().lower()
+        except psutil.Error:
+            continue
+        if "chrome" in name or "chromium" in name:
+            count += 1
+    return count
+
+
+# --- Bot metrics -----------------------------------------------------------
+
+scrape_stage_seconds = Histogram(
+    "nft_scrape_stage_duration_seconds", "Time spent in each stage of a marketplace scrape", ["stage"]
+)
+scrape_seconds = Histogram(
+    "nft_scrape_duration_seconds", "End-to-end scrape time including executor queueing", ["kind"]
+)
+scrapes = Counter("nft_scrapes", "Scrapes started, by kind and outcome", ["kind", "outcome"])
+scraper_queue_depth = Gauge(
+    "nft_scraper_queue_depth", "Scrapes requested and not finished yet (running or waiting for a thread)"
+)
+cache_requests = Counter(
+    "nft_cache_requests", "Cache lookups by cache (catalog, search) and result (hit, miss, stale, shared)",
+    ["cache", "result"]
+)
+command_seconds = Histogram(
+    "nft_command_duration_seconds", "Slash command latency from interaction creation to completion", ["command"]
+)
+event_loop_lag = Gauge("nft_event_loop_lag_seconds", "Most recent event loop scheduling lag")
+event_loop_lag_seconds = Histogram(
+    "nft_event_loop_lag_distribution_seconds", "Event loop scheduling lag samples", buckets=LAG_BUCKETS
+)
+chrome_processes = Gauge(
+    "nft_chrome_processes", "Live Chrome and chromedriver processes", function=count_chrome_processes
+)
+deadline_fallbacks = Counter(
+    "nft_command_deadline_fallbacks", "Commands answered from cache because fresh data missed the deadline", ["command"]
+)
+scrape_first_batch_seconds = Histogram(
+    "nft_scrape_first_batch_seconds", "Time from scrape start until the first page of listings is parsed", ["kind"]
+)
+command_first_result_seconds = Histogram(
+    "nft_command_first_result_seconds",
+    "Slash command time from interaction creation to the first visible answer (partial, cached or final)", ["command"]
+)
+prefetches = Counter("nft_prefetches", "Idle-time prefetch scrapes of popular search terms, by outcome", ["outcome"])
+prefetch_hits = Counter("nft_prefetch_hits", "User searches answered from a prefetched cache entry")
+autocomplete_seconds = Histogram(
+    "nft_autocomplete_duration_seconds", "Time to compute item name suggestions for an autocomplete request",
+    buckets=LOOKUP_BUCKETS
+)
+scrape_retries = Counter("nft_scrape_retries", "Scrape attempts retried after an upstream error, by kind", ["kind"])
+upstream_rejections = Counter(
+    "nft_upstream_rejections", "Scrapes refused without contacting the marketplace because its circuit was open"
+)
+upstream_cached_fallbacks = Counter(
+    "nft_upstream_cached_fallbacks",
+    "Answers served from cached data because the marketplace was unavailable, by command (catalog: prefix commands, API)",
+    ["kind"]
+)
+parse_pages = Counter(
+    "nft_parse_pages",
+    "Scraped pages by parse result (parsed, skipped because their content hash was unchanged, "
+    "or decoded from the page's API response)",
+    ["result"]
+)
+parse_cards = Counter(
+    "nft_parse_cards", "Listing cards by parse result (parsed, or reused from an identical card seen before)", ["result"]
+)
+snapshot_reuses = Counter(
+    "nft_snapshot_reuses", "Refreshes that kept the previous snapshot because no page content changed, by kind",
+    ["kind"]
+)
+served_data_age_seconds = Histogram(
+    "nft_served_data_age_seconds", "Age of the snapshot behind each catalog read or search answer, by kind",
+    ["kind"], buckets=AGE_BUCKETS
+)
+fair_queue_wait_seconds = Histogram(
+    "nft_fair_queue_wait_seconds", "Time user-triggered scrapes waited for their fair turn, by guild",
+    ["guild"]
+)
+fair_queue_rejections = Counter(
+    "nft_fair_queue_rejections", "User-triggered scrapes refused by a cooldown or pending limit, by guild and reason",
+    ["guild", "reason"]
+)
@@ -0,0 +1,80 @@
+"""Prefix index of known item names for slash-command autocomplete.
+
+Every word of every name is a key in one sorted array, so "dag" finds
+"Unchained Dagger" as well as names starting with it. A lookup is a
+bisect plus a short scan of the matching range, well under a millisecond
+for tens of thousands of names.
+"""
+
+import bisect
+import heapq
+import re
+
+from price_analytics import item_name
+
+# How many matching keys to rank before cutting to the limit
+SCAN_LIMIT = 500
+# Suggestions kept ready for an empty query (Discord shows at most 25)
+TOP_SIZE = 25
+
+
+class NameIndex:
+    def __init__(self):
+        # display name -> weight (listings seen + searches that returned it)
+        self.weights = {}
+        self._keys = []
+        self._names = []
+        self._top = []
+        self.version = None
+
+    def add_names(self, names, weight=1):
+        """Add (or reinforce) names; rebuilds the sorted keys if any are new"""
+        added = False
+        for name in names:
+            # Suggestions are per item, without the NFT serial number
+            name = item_name(name).strip()
+            if not name:
+                continue
+            if name not in self.weights:
+                added = True
+                self.weights[name] = 0
+            self.weights[name] += weight
+        if added:
+            self._rebuild()
+        self._top = heapq.nsmallest(TOP_SIZE, self.weights, key=lambda name: (-self.weights[name], name))
+
+    def update_snapshot(self, nfts, version):
+        """Index the names of a catalog snapshot once per version"""
+        if version is not None and version == self.version:
+            return
+        self.version = version
+        self.add_names(nft['name'] for nft in nfts)
+
+    def _rebuild(self):
+        entries = []
+        for name in self.weights:
+            lowered = name.lower()
+            # One key per word start: "unchained dagger", "dagger"
+            for match in re.finditer(r"\S+", lowered):
+                entries.append((lowered[match.start():], name))
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._names = [name for _, name in entries]
+
+    def complete(self, prefix, limit=25):
+        """Known names with a word starting with `prefix`, most seen first"""
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return self._top[:limit]
+
+        start = bisect.bisect_left(self._keys, prefix)
+        # Every key starting with prefix sorts before prefix + U+10FFFF
+        end = bisect.bisect_left(self._keys, prefix + "\U0010ffff", start, min(len(self._keys), start + SCAN_LIMIT))
+        candidates = set(self._names[start:end])
+        ranked = sorted(candidates, key=lambda name: (
+            not name.lower().startswith(prefix), -self.weights[name], name
+        ))
+        return ranked[:limit]
+
+    def __len__(self):
+        return len(self.weights)
@@ -0,0 +1,113 @@
+"""Per-stage timing spans for scrapes and slash commands.
+
+Each stage ("scrape.navigation", "command.buscar.fetch", ...) keeps its
+most recent durations in a fixed-size ring buffer, so memory is bounded
+and recording is a lock, a clock read and an array store (about a
+microsecond). Percentiles are only computed when someone asks for them
+(`/perf`, `/admin/perf`).
+"""
+
+import array
+import os
+import threading
+import time
+
+
+class StageRing:
+    """Last `capacity` durations of one stage"""
+
+    def __init__(self, capacity):
+        self.values = array.array("d", bytes(8 * capacity))
+        self.capacity = capacity
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+
+    def add(self, seconds):
+        self.values[self.count % self.capacity] = seconds
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+
+    def window(self):
+        return sorted(self.values[:min(self.count, self.capacity)])
+
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class Span:
+    """`with recorder.span(stage):` times the block into the stage"""
+
+    __slots__ = ("recorder", "stage", "start")
+
+    def __init__(self, recorder, stage):
+        self.recorder = recorder
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class SpanRecorder:
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self._stages = {}
+        # Spans are recorded from scraper threads as well as the event loop
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            ring = self._stages.get(stage)
+            if ring is None:
+                ring = self._stages[stage] = StageRing(self.capacity)
+            ring.add(seconds)
+
+    def span(self, stage):
+        return Span(self, stage)
+
+    def stages(self):
+        return sorted(self._stages)
+
+    def stage_summary(self, stage):
+        """Count, mean and percentiles (over the ring window) of one stage, in ms"""
+        with self._lock:
+            ring = self._stages[stage]
+            ordered = ring.window()
+            count, total, last = ring.count, ring.total, ring.last
+        return {
+            "count": count,
+            "window": len(ordered),
+            "mean_ms": round(total / count * 1000, 2),
+            "last_ms": round(last * 1000, 2),
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 2),
+            "p95_ms": round(_percentile(ordered, 95) * 1000, 2),
+            "p99_ms": round(_percentile(ordered, 99) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+
+    def summary(self, prefix=""):
+        """Per-stage summaries for every stage starting with prefix"""
+        return {stage: self.stage_summary(stage) for stage in self.stages() if stage.startswith(prefix)}
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+
+
+# Process-wide recorder (PERF_SPAN_CAPACITY durations kept per stage)
+spans = SpanRecorder(capacity=int(os.getenv("PERF_SPAN_CAPACITY", 512)))
+
+
+def record(stage, seconds):
+    spans.record(stage, seconds)
+
+
+def span(stage):
+    return spans.span(stage)
@@ -0,0 +1,170 @@
+"""Popularity tracking and idle-time prefetching of hot search terms.
+
+`DecayingCounter` keeps an exponentially decaying hit count per term, so
+what was popular an hour ago fades out. `Prefetcher` uses it to refresh the
+keyword cache for the top terms while the bot is idle, within an hourly
+scrape budget, and tracks how many prefetched entries users actually hit.
+"""
+
+import collections
+import heapq
+import time
+
+import metrics
+
+
+class DecayingCounter:
+    """Per-term counts that halve every `half_life` seconds.
+
+    Scores are stored scaled by 2^(t / half_life) at insertion time, so
+    decaying everything is free and the stored values rank the same way as
+    the decayed ones.
+    """
+
+    def __init__(self, half_life=3600, capacity=1000):
+        self.half_life = half_life
+        self.capacity = capacity
+        self._scores = {}
+        self._epoch = None
+
+    def _weight(self, now):
+        if self._epoch is None:
+            self._epoch = now
+        exponent = (now - self._epoch) / self.half_life
+        if exponent > 500:
+            # Rebase before the scale factor overflows a float
+            factor = 2.0 ** -exponent
+            self._scores = {term: score * factor for term, score in self._scores.items()}
+            self._epoch = now
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def add(self, term, amount=1.0, now=None):
+        now = time.time() if now is None else now
+        self._scores[term] = self._scores.get(term, 0.0) + amount * self._weight(now)
+        if len(self._scores) > self.capacity:
+            # Forget the least popular half
+            keep = heapq.nlargest(self.capacity // 2, self._scores.items(), key=lambda item: item[1])
+            self._scores = dict(keep)
+
+    def score(self, term, now=None):
+        now = time.time() if now is None else now
+        return self._scores.get(term, 0.0) / self._weight(now)
+
+    def top(self, n, now=None):
+        """The n most popular terms with their decayed scores"""
+        now = time.time() if now is None else now
+        weight = self._weight(now)
+        best = heapq.nlargest(n, self._scores.items(), key=lambda item: item[1])
+        return [(term, score / weight) for term, score in best]
+
+    def __len__(self):
+        return len(self._scores)
+
+
+class Prefetcher:
+    """Refreshes the cache for the most searched terms before users ask.
+
+    `fetch(term)` scrapes a term into the cache; `is_due(term)` says whether
+    its cached entry is missing or about to expire. At most
+    `budget_per_hour` prefetch scrapes run in any rolling hour.
+    """
+
+    def __init__(self, counter, fetch, is_due, top_n=5, budget_per_hour=30, min_score=2.0, entry_lifetime=120):
+        self.counter = counter
+        self.fetch = fetch
+        self.is_due = is_due
+        self.top_n = top_n
+        self.budget_per_hour = budget_per_hour
+        self.min_score = min_score
+        self.entry_lifetime = entry_lifetime
+        self.running = False
+        self._recent = collections.deque()
+        # term -> time its prefetched entry was written, until a user hits it or it expires
+        self._unused = {}
+        self.prefetches = 0
+        self.failures = 0
+        self.hits = 0
+        self.expired = 0
+        self.queries = 0
+
+    def remaining_budget(self, now=None):
+        now = time.time() if now is None else now
+        while self._recent and now - self._recent[0] >= 3600:
+            self._recent.popleft()
+        return max(0, self.budget_per_hour - len(self._recent))
+
+    def _expire(self, now):
+        for term, prefetched_at in list(self._unused.items()):
+            if now - prefetched_at >= self.entry_lifetime:
+                del self._unused[term]
+                self.expired += 1
+
+    def record_query(self, term, result):
+        """Count a user search; a cache hit on an unused prefetched entry is a prefetch hit"""
+        self.counter.add(term)
+        self.queries += 1
+        self._expire(time.time())
+        if term in self._unused:
+            del self._unused[term]
+            if result == "hit":
+                self.hits += 1
+                metrics.prefetch_hits.inc()
+            else:
+                # The prefetched entry was already gone (evicted or replaced)
+                self.expired += 1
+
+    async def run(self):
+        """Prefetch due top terms within the budget; returns how many were fetched"""
+        if self.running:
+            return 0
+        self.running = True
+        fetched = 0
+        try:
+            for term, score in self.counter.top(self.top_n):
+                if score < self.min_score:
+                    break
+                if not self.remaining_budget():
+                    print("⏸️  Prefetch budget used up for this hour")
+                    break
+                if not await self.is_due(term):
+                    continue
+                self._recent.append(time.time())
+                try:
+                    await self.fetch(term)
+                except Exception as e:
+                    self.failures += 1
+                    metrics.prefetches.inc(outcome="error")
+                    print(f"⚠️  Prefetch of '{term}' failed: {e}")
+                    continue
+                self.prefetches += 1
+                fetched += 1
+                self._unused[term] = time.time()
+                metrics.prefetches.inc(outcome="ok")
+                print(f"🔮 Prefetched '{term}' (popularity {score:.1f})")
+        finally:
+            self.running = False
+        return fetched
+
+    def hit_rate(self):
+        """Share of prefetched entries that served a user before expiring"""
+        settled = self.hits + self.expired
+        return self.hits / settled if settled else None
+
+    def summary(self):
+        self._expire(time.time())
+        hit_rate = self.hit_rate()
+        return {
+            "prefetches": self.prefetches,
+            "failures": self.failures,
+            "hits": self.hits,
+            "expired_unused": self.expired,
+            "pending": sorted(self._unused),
+            "hit_rate": round(hit_rate, 3) if hit_rate is not None else None,
+            "queries_served_by_prefetch": round(self.hits / self.queries, 3) if self.queries else None,
+            "budget_per_hour": self.budget_per_hour,
+            "budget_remaining": self.remaining_budget(),
+            "top_terms": [
+                {"term": term, "score": round(score, 2)} for term, score in self.counter.top(self.top_n * 2)
+            ],
+        }
@@ -0,0 +1,210 @@
+"""Price distribution analytics over a catalog snapshot.
+
+Prices are parsed once per snapshot into a NumPy array; median,
+percentiles, standard deviation, a log-scale histogram and a per-item
+breakdown then come out of a couple of vectorized sorts of that array, and
+a term filter is a vectorized substring search over the lowercased names.
+Arrays and results are kept in small LRU caches keyed by snapshot version,
+so the catalog and its section views do not evict each other. Without
+NumPy the same numbers are computed with plain Python (see
+`bench_analytics.py` for the difference).
+"""
+
+import bisect
+import collections
+import math
+import re
+
+from scraper import parse_price
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+# Histogram bins per power of ten
+BINS_PER_DECADE = 2
+MAX_CACHED_RESULTS = 256
+# Snapshots (catalog and section views) whose arrays are kept
+MAX_CACHED_ARRAYS = 8
+
+# Serial suffix of individual NFTs ("Zakum Helmet #1234"), dropped when grouping by item
+_SERIAL = re.compile(r"\s*#\d+$")
+
+_cache = collections.OrderedDict()
+_arrays = collections.OrderedDict()
+
+
+def item_name(name):
+    """Item a listing belongs to, for the per-item breakdown"""
+    return _SERIAL.sub("", name)
+
+
+def _log_edges(low, high):
+    """Histogram edges at BINS_PER_DECADE steps per power of ten covering [low, high]"""
+    start = math.floor(math.log10(max(low, 1)) * BINS_PER_DECADE)
+    stop = math.floor(math.log10(max(high, 1)) * BINS_PER_DECADE) + 1
+    return [10 ** (step / BINS_PER_DECADE) for step in range(start, stop + 1)]
+
+
+def _histogram(edges, counts):
+    return [
+        {"low": round(low), "high": round(high), "count": int(count)}
+        for low, high, count in zip(edges, edges[1:], counts)
+    ]
+
+
+def _remember(cache, key, value, capacity):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > capacity:
+        cache.popitem(last=False)
+    return value
+
+
+def _empty():
+    return {"count": 0, "mean": None, "std": None, "median": None,
+            "percentiles": {}, "histogram": [], "breakdown": []}
+
+
+# --- NumPy ------------------------------------------------------------------
+
+def _numpy_arrays(nfts, version):
+    """Price array, per-listing item ids, item names and lowercased names; built once per snapshot"""
+    arrays = _arrays.get(version) if version is not None else None
+    if arrays is not None:
+        _arrays.move_to_end(version)
+    else:
+        prices = np.fromiter((parse_price(nft['price']) for nft in nfts), dtype=np.float64, count=len(nfts))
+        index = {}
+        item_ids = np.fromiter(
+            (index.setdefault(item_name(nft['name']), len(index)) for nft in nfts), dtype=np.int64, count=len(nfts)
+        )
+        lowered = np.array([nft['name'].lower() for nft in nfts], dtype=str)
+        arrays = (prices, item_ids, list(index), lowered)
+        if version is not None:
+            _remember(_arrays, version, arrays, MAX_CACHED_ARRAYS)
+    return arrays
+
+
+def _contains(names, term):
+    """Boolean mask of the names containing term"""
+    strings = getattr(np, "strings", np.char)
+    return strings.find(names, term) >= 0
+
+
+def analyze_numpy(nfts, term=None, top=10, version=None):
+    prices, item_ids, items, lowered = _numpy_arrays(nfts, version)
+    if term:
+        mask = _contains(lowered, term)
+        prices, item_ids = prices[mask], item_ids[mask]
+    if not len(prices):
+        return _empty()
+
+    # One sort by (item, price) gives both the global order statistics and,
+    # per item, contiguous runs whose ends and middles are min/max/median
+    order = np.lexsort((prices, item_ids))
+    grouped_prices = prices[order]
+    grouped_ids = item_ids[order]
+    ordered = np.sort(prices)
+
+    edges = _log_edges(ordered[0], ordered[-1])
+    counts, _ = np.histogram(np.clip(prices, edges[0], edges[-1]), bins=edges)
+
+    present, starts, sizes = np.unique(grouped_ids, return_index=True, return_counts=True)
+    sums = np.add.reduceat(grouped_prices, starts)
+    medians = (grouped_prices[starts + (sizes - 1) // 2] + grouped_prices[starts + sizes // 2]) / 2
+    ranking = np.lexsort((-sums, -sizes))[:top]
+
+    return {
+        "count": int(len(prices)),
+        "mean": float(prices.mean()),
+        "std": float(prices.std()),
+        "median": float(np.median(ordered)),
+        "percentiles": dict(zip(PERCENTILES, np.percentile(ordered, PERCENTILES).tolist())),
+        "histogram": _histogram(edges, counts),
+        "breakdown": [
+            {
+                "item": str(items[present[i]]),
+                "count": int(sizes[i]),
+                "mean": float(sums[i] / sizes[i]),
+                "median": float(medians[i]),
+                "min": float(grouped_prices[starts[i]]),
+                "max": float(grouped_prices[starts[i] + sizes[i] - 1]),
+            }
+            for i in ranking
+        ],
+    }
+
+
+# --- Pure Python -------------------------------------------------------------
+
+def _percentile(ordered, pct):
+    """Linear interpolation between closest ranks (NumPy's default method)"""
+    position = (len(ordered) - 1) * pct / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def analyze_python(nfts, term=None, top=10, version=None):
+    listings = [nft for nft in nfts if term in nft['name'].lower()] if term else nfts
+    if not listings:
+        return _empty()
+    prices = [float(parse_price(nft['price'])) for nft in listings]
+    ordered = sorted(prices)
+    mean = sum(prices) / len(prices)
+
+    edges = _log_edges(ordered[0], ordered[-1])
+    counts = [0] * (len(edges) - 1)
+    for price in prices:
+        index = bisect.bisect_right(edges, price) - 1
+        counts[max(0, min(index, len(counts) - 1))] += 1
+
+    groups = {}
+    for nft, price in zip(listings, prices):
+        groups.setdefault(item_name(nft['name']), []).append(price)
+    ranked = []
+    for item, values in groups.items():
+        values.sort()
+        total = sum(values)
+        ranked.append((-len(values), -total, {
+            "item": item,
+            "count": len(values),
+            "mean": total / len(values),
+            "median": _percentile(values, 50),
+            "min": values[0],
+            "max": values[-1],
+        }))
+    # Most listed items first; stable, so ties keep first-seen order like the NumPy path
+    ranked.sort(key=lambda entry: entry[:2])
+    breakdown = [row for _, _, row in ranked]
+
+    return {
+        "count": len(prices),
+        "mean": mean,
+        "std": math.sqrt(sum((price - mean) ** 2 for price in prices) / len(prices)),
+        "median": _percentile(ordered, 50),
+        "percentiles": {pct: _percentile(ordered, pct) for pct in PERCENTILES},
+        "histogram": _histogram(edges, counts),
+        "breakdown": breakdown[:top],
+    }
+
+
+def analyze(nfts, term=None, top=10, version=None):
+    """Distribution of listing prices (optionally only names containing `term`).
+
+    Pass the snapshot `version` to cache the result until the snapshot changes.
+    """
+    term = term.strip().lower() if term else None
+    if version is None:
+        return (analyze_numpy if np is not None else analyze_python)(nfts, term, top)
+
+    key = (version, term, top)
+    result = _cache.get(key)
+    if result is None:
+        result = (analyze_numpy if np is not None else analyze_python)(nfts, term, top, version)
+        return _remember(_cache, key, result, MAX_CACHED_RESULTS)
+    _cache.move_to_end(key)
+    return result
@@ -0,0 +1,159 @@
+"""Adaptive refresh intervals learned from how often each data source changes.
+
+Every time a source (a catalog section, a search term) is scraped, its
+content version is compared with the previous one. `RefreshScheduler`
+keeps a decaying count of changes per second of observed time for each
+source, so the estimate follows the time of day, and refreshes a source
+once it has probably changed: the interval is the time in which a change
+happens with probability `change_probability`, clamped to
+[min_interval, max_interval] and spread by a random `jitter` so sources
+and replicas do not all refresh at once. Popular sources (e.g. search
+terms many users ask for) get proportionally shorter intervals.
+"""
+
+import collections
+import math
+import random
+import time
+
+
+class Source:
+    """What the scheduler knows about one data source"""
+
+    def __init__(self, version, timestamp, default):
+        self.version = version
+        self.timestamp = timestamp
+        # Decayed number of changes seen and seconds observed
+        self.changes = 0.0
+        self.exposure = 0.0
+        self.last_change = None
+        self.scrapes = 1
+        # Configured interval, the starting point before anything is learned
+        self.default = default
+        # Jittered interval, drawn once per scrape so it is stable until the next one
+        self.interval = default
+
+
+class RefreshScheduler:
+    def __init__(self, default_interval=300, min_interval=60, max_interval=1800, change_probability=0.5,
+                 jitter=0.1, half_life=6 * 3600, adaptive=True, capacity=1000, rng=None):
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.change_probability = change_probability
+        self.jitter = jitter
+        self.half_life = half_life
+        # False: every source refreshes on its default interval, as with a fixed cache duration
+        self.adaptive = adaptive
+        self.capacity = capacity
+        self.rng = rng or random.Random()
+        self.sources = {}
+        self._scrapes = collections.deque()
+
+    def _clamp(self, seconds, default):
+        # A source configured outside the bounds keeps its configured interval as the bound
+        return min(max(self.max_interval, default), max(min(self.min_interval, default), seconds))
+
+    def change_rate(self, source):
+        """Estimated changes per second, starting from one change per default interval"""
+        return (source.changes + 1.0) / (source.exposure + source.default)
+
+    def _learned_interval(self, source):
+        rate = self.change_rate(source)
+        seconds = self._clamp(-math.log(1.0 - self.change_probability) / rate, source.default)
+        seconds *= 1.0 + self.rng.uniform(-self.jitter, self.jitter)
+        return self._clamp(seconds, source.default)
+
+    def observe(self, key, version, timestamp, default=None):
+        """Record the snapshot of a source; returns True if it is a new scrape with different content.
+
+        Snapshots are recognised by their timestamp, so it is fine to call
+        this on every read: only a newer snapshot (scraped here or by another
+        replica) counts.
+        """
+        default = default or self.default_interval
+        source = self.sources.get(key)
+        if source is None:
+            if len(self.sources) >= self.capacity:
+                # Forget the source scraped longest ago
+                del self.sources[min(self.sources, key=lambda k: self.sources[k].timestamp)]
+            source = self.sources[key] = Source(version, timestamp, default)
+            if self.adaptive:
+                source.interval = self._learned_interval(source)
+            self._scrapes.append(timestamp)
+            return False
+        if timestamp <= source.timestamp:
+            return False
+
+        elapsed = timestamp - source.timestamp
+        changed = version != source.version
+        decay = 0.5 ** (elapsed / self.half_life)
+        source.changes = source.changes * decay + (1.0 if changed else 0.0)
+        source.exposure = source.exposure * decay + elapsed
+        if changed:
+            source.last_change = timestamp
+        source.version = version
+        source.timestamp = timestamp
+        source.scrapes += 1
+        source.default = default
+        if self.adaptive:
+            source.interval = self._learned_interval(source)
+        self._scrapes.append(timestamp)
+        return changed
+
+    def interval(self, key, default=None, popularity=0.0):
+        """Seconds a snapshot of the source stays fresh.
+
+        `popularity` (e.g. recent requests for a search term) divides the
+        interval by sqrt(1 + popularity).
+        """
+        default = default or self.default_interval
+        if not self.adaptive:
+            return default
+        source = self.sources.get(key)
+        seconds = source.interval if source is not None else self._clamp(default, default)
+        if popularity > 0:
+            seconds = self._clamp(seconds / math.sqrt(1.0 + popularity), default)
+        return seconds
+
+    def scrapes_per_hour(self, now=None):
+        """Snapshots observed over the last hour"""
+        now = time.time() if now is None else now
+        while self._scrapes and now - self._scrapes[0] >= 3600:
+            self._scrapes.popleft()
+        return len(self._scrapes)
+
+    def staleness(self, key, now=None):
+        """Seconds since the source was last scraped, None if it never was"""
+        source = self.sources.get(key)
+        if source is None:
+            return None
+        return (time.time() if now is None else now) - source.timestamp
+
+    def summary(self, limit=None, now=None):
+        """Interval, change rate and staleness per source (most scraped first), plus totals"""
+        now = time.time() if now is None else now
+        keys = sorted(self.sources, key=lambda k: -self.sources[k].scrapes)
+        ages = [now - source.timestamp for source in self.sources.values()]
+        sources = {}
+        for key in keys[:limit]:
+            source = self.sources[key]
+            rate = self.change_rate(source)
+            age = now - source.timestamp
+            sources[key] = {
+                "interval_seconds": round(self.interval(key, source.default), 1),
+                "changes_per_hour": round(rate * 3600, 2),
+                "age_seconds": round(age, 1),
+                # Changes that probably happened since the last scrape
+                "expected_missed_changes": round(rate * age, 2),
+                "last_change_seconds_ago": round(now - source.last_change, 1) if source.last_change else None,
+                "scrapes": source.scrapes,
+            }
+        return {
+            "adaptive": self.adaptive,
+            "bounds_seconds": [self.min_interval, self.max_interval],
+            "scrapes_per_hour": self.scrapes_per_hour(now),
+            "max_staleness_seconds": round(max(ages), 1) if ages else None,
+            "mean_staleness_seconds": round(sum(ages) / len(ages), 1) if ages else None,
+            "sources": sources,
+        }
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Record/replay of marketplace pages for offline, reproducible runs.
+
+`CorpusRecorder` appends every page an `NFTScraper(recorder=...)` fetches to
+a gzip-compressed JSON Lines corpus: URL, keyword, page number, payload
+(page HTML, or a decoded JSON response) and the time each stage took.
+`ReplayScraper` is a drop-in `NFTScraper` that serves pages from such a
+corpus instead of launching Chrome. It still runs the real parser, and can
+replay the recorded stage timings (scaled by `latency_scale`) or run at
+full speed.
+
+    python replay.py corpus.jsonl.gz      # what a corpus contains
+
+Record with `python app.py --record corpus.jsonl.gz ...`,
+`python bench_scrape.py --record ...` or `SCRAPER_RECORD_PATH` in the bot.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+
+from scraper import NFTScraper, parse_listings
+
+
+def corpus_key(keyword, page):
+    """Corpus lookup key: searches are matched case-insensitively, page 1 by default"""
+    return ((keyword or "").strip().lower(), page or 1)
+
+
+class CorpusRecorder:
+    """Appends fetched pages to a corpus file; safe to share between scraper threads"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = 0
+        self._lock = threading.Lock()
+
+    def record(self, url, keyword, page, payload, timings=None, kind="html"):
+        entry = {
+            "url": url,
+            "keyword": keyword,
+            "page": page,
+            "kind": kind,
+            "payload": payload,
+            "timings": {stage: round(seconds, 4) for stage, seconds in (timings or {}).items()},
+            "fetched_at": time.time(),
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            # Each write is a complete gzip member, so a crash never corrupts
+            # what was recorded before and later sessions can keep appending
+            with open(self.path, "ab") as f:
+                f.write(gzip.compress(line))
+            self.entries += 1
+
+
+class Corpus:
+    """Recorded pages by (keyword, page); the latest recording of a page wins"""
+
+    def __init__(self, entries=()):
+        self.pages = {}
+        for entry in entries:
+            self.pages[corpus_key(entry["keyword"], entry["page"])] = entry
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return cls(json.loads(line) for line in f if line.strip())
+
+    def get(self, keyword, page):
+        return self.pages.get(corpus_key(keyword, page))
+
+    def keys(self):
+        return sorted(self.pages)
+
+    def __len__(self):
+        return len(self.pages)
+
+
+def parse_payload(entry):
+    """Listings of a recorded page"""
+    if entry["kind"] == "json":
+        payload = entry["payload"]
+        return [dict(nft) for nft in payload] if isinstance(payload, list) else []
+    return parse_listings(entry["payload"])
+
+
+class ReplayScraper(NFTScraper):
+    """NFTScraper that serves pages from a recorded corpus instead of the live site.
+
+    latency_scale=0 replays at full speed; 1.0 sleeps for the recorded time
+    of each stage (0.1 for a tenth of it). A page missing from the corpus
+    is an empty page, or an error when `strict` is set.
+    """
+
+    def __init__(self, corpus, latency_scale=0.0, strict=False, **kwargs):
+        self.corpus = corpus
+        self.latency_scale = latency_scale
+        self.strict = strict
+        super().__init__(**kwargs)
+
+    def setup_driver(self):
+        # No Chrome (or ChromeDriver download) needed to replay
+        pass
+
+    def _start_driver(self):
+        return None
+
+    def _scrape_page(self, driver, url, timer, search_term=None, page=None):
+        entry = self.corpus.get(search_term, page)
+        if entry is None:
+            if self.strict:
+                raise KeyError(f"page not in corpus: {url}")
+            print(f"📼 Not in corpus, replaying an empty page: {url}")
+            timer.end("navigation")
+            return []
+
+        for stage, seconds in entry["timings"].items():
+            if self.latency_scale:
+                time.sleep(seconds * self.latency_scale)
+            timer.end(stage)
+        payload = entry["payload"]
+        self.last_bytes_downloaded = len(payload) if isinstance(payload, str) else 0
+        self.total_bytes_downloaded += self.last_bytes_downloaded
+
+        if entry["kind"] == "json":
+            nfts = self._decoded(parse_payload(entry))
+        else:
+            nfts = self._parse(payload)
+        timer.end("parse")
+        return nfts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="Corpus file (.jsonl.gz)")
+    args = parser.parse_args()
+
+    corpus = Corpus.load(args.corpus)
+    print(f"📼 {args.corpus}: {len(corpus)} pages, {os.path.getsize(args.corpus) / 1024:,.1f} KiB compressed")
+    for keyword, page in corpus.keys():
+        entry = corpus.get(keyword, page)
+        recorded = sum(entry["timings"].values())
+        print(f"  {keyword or '(catalog)'} page {page}: {entry['kind']}, {len(parse_payload(entry))} listings, "
+              f"{recorded:.2f}s when recorded, {time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['fetched_at']))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,704 @@
+import base64
+import bisect
+import collections
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import quote_plus
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from webdriver_manager.chrome import ChromeDriverManager
+from bs4 import BeautifulSoup
+
+import perf
+
+
+def _env_list(name, default=""):
+    """Read a comma separated list from the environment"""
+    value = os.getenv(name, default)
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
+
+# Resource filtering: we only need card names and prices, so artwork,
+# fonts, media and third-party scripts are never downloaded.
+BLOCK_RESOURCES = os.getenv("SCRAPER_BLOCK_RESOURCES", "1") != "0"
+
+# If set, only these domains (and their subdomains) are resolved at all
+ALLOWED_DOMAINS = _env_list("SCRAPER_ALLOWED_DOMAINS")
+
+# Domains that are always blocked (analytics, tag managers, chat widgets...)
+BLOCKED_DOMAINS = _env_list(
+    "SCRAPER_BLOCKED_DOMAINS",
+    "google-analytics.com,googletagmanager.com,doubleclick.net,"
+    "facebook.net,connect.facebook.net,hotjar.com,clarity.ms,"
+    "sentry.io,intercom.io,fonts.googleapis.com,fonts.gstatic.com",
+)
+
+# Extra Chrome flags for the hosting environment (e.g. "--disable-gpu")
+CHROME_EXTRA_ARGUMENTS = os.getenv("CHROME_EXTRA_ARGUMENTS", "").split()
+
+# Seconds before a page load counts as failed
+PAGE_LOAD_TIMEOUT = float(os.getenv("SCRAPER_PAGE_LOAD_TIMEOUT", 30))
+
+# Read listings from the marketplace API responses the page itself fetches
+# (Chrome performance log) instead of waiting for and parsing the rendered DOM
+CAPTURE_XHR = os.getenv("SCRAPER_CAPTURE_XHR", "0") == "1"
+API_URL_PATTERN = re.compile(
+    os.getenv("SCRAPER_API_URL_PATTERN", r"/api/.*(marketplace|nft|item|listing)"), re.IGNORECASE
+)
+
+BLOCKED_URL_PATTERNS = [
+    # Images
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    # Fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # Media
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav", "*.m3u8",
+]
+
+# Sums transfer sizes from the Resource Timing API (navigation + subresources)
+BYTES_DOWNLOADED_SCRIPT = """
+const entries = performance.getEntriesByType('navigation')
+    .concat(performance.getEntriesByType('resource'));
+return entries.reduce((total, e) => total + (e.transferSize || e.encodedBodySize || 0), 0);
+"""
+
+
+def blocked_url_patterns():
+    """URL patterns passed to Network.setBlockedURLs"""
+    patterns = list(BLOCKED_URL_PATTERNS)
+    for domain in BLOCKED_DOMAINS:
+        patterns.append(f"*://{domain}/*")
+        patterns.append(f"*://*.{domain}/*")
+    return patterns
+
+
+def host_resolver_rules():
+    """Chrome host resolver rules that make every non-allowed domain unresolvable"""
+    if not ALLOWED_DOMAINS:
+        return None
+    excludes = []
+    for domain in ALLOWED_DOMAINS:
+        excludes.append(f"EXCLUDE {domain}")
+        excludes.append(f"EXCLUDE *.{domain}")
+    # Always keep the local fixture server reachable
+    excludes.append("EXCLUDE localhost")
+    excludes.append("EXCLUDE 127.0.0.1")
+    return "MAP * ~NOTFOUND, " + ", ".join(excludes)
+
+
+# Stages timed by NFTScraper.scrape_nfts, in order
+SCRAPE_STAGES = ["driver_start", "navigation", "network_capture", "settle", "readiness_wait", "extraction", "parse"]
+
+
+class StageTimer:
+    """Accumulates the time spent in consecutive scrape stages.
+
+    Every stage is also recorded as a "scrape.<stage>" span (see perf.py).
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._start = time.perf_counter()
+
+    def end(self, stage):
+        now = time.perf_counter()
+        elapsed = now - self._start
+        self.timings[stage] = self.timings.get(stage, 0.0) + elapsed
+        perf.record(f"scrape.{stage}", elapsed)
+        self._start = now
+
+
+def parse_price(price):
+    """Turn a scraped price like "1,234,567" into an int"""
+    return int(str(price).replace(',', '').strip() or 0)
+
+
+NAME_CLASS = "BaseCard_itemName__Z2GfD"
+PRICE_CLASS = "CardPrice_number__OYpdb"
+
+# Optional card attributes, matched on the CSS-module class name without its
+# hash suffix (the suffix changes between site deploys)
+ATTRIBUTE_CLASSES = {
+    "category": re.compile(r"category", re.IGNORECASE),
+    "level": re.compile(r"level", re.IGNORECASE),
+    "star_force": re.compile(r"star_?force", re.IGNORECASE),
+    "seller": re.compile(r"seller", re.IGNORECASE),
+}
+NUMERIC_ATTRIBUTES = {"level", "star_force"}
+LISTING_HREF = re.compile(r"/nft/([\w-]+)/?$")
+LISTING_DATA_ATTRIBUTES = ("data-listing-id", "data-token-id", "data-id")
+
+
+def _card_of(name):
+    """Closest ancestor of a name element that also holds its price"""
+    card = name.parent
+    while card is not None and card.find(class_=PRICE_CLASS) is None:
+        card = card.parent
+    if card is None or len(card.find_all(class_=NAME_CLASS, limit=2)) > 1:
+        return None
+    return card
+
+
+def _card_attributes(card):
+    """Category, level, star force, seller and listing id of a card, where present"""
+    attributes = {}
+    for field, pattern in ATTRIBUTE_CLASSES.items():
+        element = card.find(class_=pattern)
+        if element is None:
+            continue
+        value = element.get_text(" ", strip=True)
+        if field in NUMERIC_ATTRIBUTES:
+            digits = re.search(r"\d+", value)
+            if digits is None:
+                continue
+            value = int(digits.group())
+        if value != "":
+            attributes[field] = value
+
+    link = card.find_parent("a")
+    for element in ([link] if link is not None else []) + [card] + card.find_all(True):
+        listing_id = next((element.get(name) for name in LISTING_DATA_ATTRIBUTES if element.get(name)), None)
+        if listing_id is None and element.name == "a":
+            match = LISTING_HREF.search(element.get("href", ""))
+            listing_id = match.group(1) if match else None
+        if listing_id:
+            attributes["listing_id"] = listing_id
+            break
+    return attributes
+
+
+def _extract_listings(page_source):
+    """Listing records and the number of name/price elements found in some HTML"""
+    soup = BeautifulSoup(page_source, 'html.parser')
+
+    # Extract NFT data
+    nft_names = soup.find_all(class_=NAME_CLASS)
+    nft_prices = soup.find_all(class_=PRICE_CLASS)
+
+    nfts = []
+    for name, price in zip(nft_names, nft_prices):
+        nft = {
+            'name': name.get_text().strip(),
+            'price': price.get_text().strip()
+        }
+        card = _card_of(name)
+        if card is not None:
+            nft.update(_card_attributes(card))
+        nfts.append(nft)
+    return nfts, len(nft_names), len(nft_prices)
+
+
+def parse_listings(page_source):
+    """Extract listing records (name, price and any card attributes) from a marketplace page"""
+    nfts, names, prices = _extract_listings(page_source)
+    print(f"📊 Found {names} names and {prices} prices")
+    return nfts
+
+
+# Tags, with script/style bodies and comments skipped whole (they may contain "<")
+TAG = re.compile(
+    r"<!--.*?-->|<(script|style)\b.*?</\1\s*>|<(/?)([a-zA-Z][\w:-]*)(?:[^>\"']|\"[^\"]*\"|'[^']*')*?(/?)>",
+    re.S | re.I
+)
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+
+def split_cards(page_source):
+    """Split a page into one HTML fragment per listing card, without a full parse.
+
+    Cards are the sibling elements that each hold one item name: a cheap
+    tag scan tracks nesting depth, and the cards are cut where the depth
+    drops back to the level of their shared container. Returns None when
+    the page does not look like a list of sibling cards (then it has to be
+    parsed whole).
+    """
+    names = [match.start() for match in re.finditer(re.escape(NAME_CLASS), page_source)]
+    if len(names) < 2:
+        return None
+
+    # (offset after the tag, depth after the tag)
+    events = []
+    depth = 0
+    for match in TAG.finditer(page_source):
+        if match.group(1) is None:
+            closing, tag, self_closing = match.group(2), match.group(3).lower(), match.group(4)
+            if closing:
+                depth -= 1
+            elif not self_closing and tag not in VOID_TAGS:
+                depth += 1
+        events.append((match.end(), depth))
+    offsets = [offset for offset, _ in events]
+
+    def between(start, end):
+        return events[bisect.bisect_left(offsets, start):bisect.bisect_left(offsets, end)]
+
+    # Depth of the card container: the shallowest point between two names
+    gaps = [between(names[i], names[i + 1]) for i in range(len(names) - 1)]
+    if not all(gaps):
+        return None
+    levels = [min(depth for _, depth in gap) for gap in gaps]
+    level = min(levels)
+    if any(gap_level != level for gap_level in levels):
+        return None
+
+    # Cut after the last point at container depth between two cards
+    cuts = [max(offset for offset, depth in gap if depth == level) for gap in gaps]
+    before = [offset for offset, depth in between(0, names[0]) if depth == level]
+    after = [offset for offset, depth in between(names[-1], len(page_source) + 1) if depth == level]
+    if not before or not after:
+        return None
+    bounds = [before[-1]] + cuts + [after[0]]
+    return [page_source[bounds[i]:bounds[i + 1]] for i in range(len(names))]
+
+
+def content_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def listings_hash(nfts):
+    """Content hash of decoded listing records"""
+    return content_hash(json.dumps(nfts, sort_keys=True, ensure_ascii=False))
+
+
+# Keys the marketplace API may use for each listing field, most likely first
+API_FIELDS = {
+    "name": ("name", "itemName", "nftName", "title"),
+    "price": ("price", "salePrice", "priceAmount", "amount"),
+    "category": ("category", "categoryName", "itemCategory"),
+    "level": ("level", "requiredLevel", "reqLevel"),
+    "star_force": ("starForce", "star_force", "starforce"),
+    "seller": ("seller", "sellerName", "owner"),
+    "listing_id": ("listingId", "listing_id", "tokenId", "id"),
+}
+
+
+def _scalar(value):
+    """A nested object's name (e.g. {"name": "Weapon"}) or the value itself"""
+    if isinstance(value, dict):
+        return next((value[key] for key in ("name", "nickname", "value", "amount") if key in value), None)
+    return value
+
+
+def _api_field(raw, keys):
+    """First of `keys` in a record or in one of its nested objects"""
+    for key in keys:
+        if key in raw:
+            return _scalar(raw[key])
+    for value in raw.values():
+        if isinstance(value, dict):
+            for key in keys:
+                if key in value:
+                    return _scalar(value[key])
+    return None
+
+
+def _api_listing(raw):
+    """Listing record (same fields as the DOM parser) of one API item, None if it is not a listing"""
+    name, price = _api_field(raw, API_FIELDS["name"]), _api_field(raw, API_FIELDS["price"])
+    if not isinstance(name, str) or price is None or isinstance(price, (bool, dict, list)):
+        return None
+    if isinstance(price, float) and price.is_integer():
+        price = int(price)
+    nft = {"name": name.strip(), "price": f"{price:,}" if isinstance(price, int) else str(price).strip()}
+    for field in ("category", "level", "star_force", "seller", "listing_id"):
+        value = _api_field(raw, API_FIELDS[field])
+        if value is None or isinstance(value, (dict, list)) or value == "":
+            continue
+        if field in NUMERIC_ATTRIBUTES:
+            digits = re.search(r"\d+", str(value))
+            if digits is None:
+                continue
+            value = int(digits.group())
+        elif field == "listing_id":
+            value = str(value)
+        nft[field] = value
+    return nft
+
+
+def _object_lists(data):
+    """Every list of objects anywhere in a JSON document"""
+    if isinstance(data, dict):
+        for value in data.values():
+            yield from _object_lists(value)
+    elif isinstance(data, list):
+        if data and all(isinstance(item, dict) for item in data):
+            yield data
+        for item in data:
+            yield from _object_lists(item)
+
+
+def decode_api_listings(data):
+    """Listing records from a decoded marketplace API response, None if it holds no listings.
+
+    The response layout is not assumed: the largest list of objects that
+    mostly look like listings (a name and a price) is taken.
+    """
+    best = None
+    for items in _object_lists(data):
+        nfts = [nft for nft in map(_api_listing, items) if nft is not None]
+        if nfts and len(nfts) * 2 >= len(items) and (best is None or len(nfts) > len(best)):
+            best = nfts
+    return best
+
+
+class ListingParser:
+    """parse_listings that skips work it has already done.
+
+    A page whose card HTML hashes the same as a page parsed before returns
+    the listings parsed then. Otherwise each card is hashed on its own and
+    only cards not seen before go through BeautifulSoup, so a page where a
+    few listings changed costs a few small parses.
+    """
+
+    def __init__(self, page_capacity=256, card_capacity=10000):
+        self.page_capacity = page_capacity
+        self.card_capacity = card_capacity
+        self._pages = collections.OrderedDict()
+        self._cards = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.totals = collections.Counter()
+
+    def _remember(self, cache, key, value, capacity):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > capacity:
+                cache.popitem(last=False)
+
+    def _cached(self, cache, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def parse(self, page_source):
+        """(listings, page hash, stats) for a page; stats counts skipped pages and reused cards"""
+        stats = collections.Counter()
+        cards = split_cards(page_source)
+        page_hash = content_hash("".join(cards) if cards is not None else page_source)
+
+        cached = self._cached(self._pages, page_hash)
+        if cached is not None:
+            stats["pages_skipped"] += 1
+            stats["cards_reused"] += len(cached)
+            self.totals.update(stats)
+            return [dict(nft) for nft in cached], page_hash, stats
+
+        stats["pages_parsed"] += 1
+        nfts = [] if cards is not None else None
+        for card in cards or ():
+            card_hash = content_hash(card)
+            listing = self._cached(self._cards, card_hash)
+            if listing is None:
+                found, _, _ = _extract_listings(card)
+                if len(found) != 1:
+                    # Not one listing per fragment after all: parse the page whole
+                    nfts = None
+                    break
+                listing = found[0]
+                self._remember(self._cards, card_hash, listing, self.card_capacity)
+                stats["cards_parsed"] += 1
+            else:
+                stats["cards_reused"] += 1
+            nfts.append(listing)
+        if nfts is None:
+            nfts, _, _ = _extract_listings(page_source)
+            stats["cards_parsed"] = len(nfts)
+            stats["cards_reused"] = 0
+
+        self._remember(self._pages, page_hash, nfts, self.page_capacity)
+        self.totals.update(stats)
+        return [dict(nft) for nft in nfts], page_hash, stats
+
+    def summary(self):
+        totals = self.totals
+        pages = totals["pages_parsed"] + totals["pages_skipped"]
+        cards = totals["cards_parsed"] + totals["cards_reused"]
+        return {
+            "pages_parsed": totals["pages_parsed"],
+            "pages_skipped": totals["pages_skipped"],
+            "cards_parsed": totals["cards_parsed"],
+            "cards_reused": totals["cards_reused"],
+            "page_skip_rate": round(totals["pages_skipped"] / pages, 3) if pages else None,
+            "card_reuse_rate": round(totals["cards_reused"] / cards, 3) if cards else None,
+        }
+
+
+# Shared by every scraper in the process, so a refresh benefits from the last one
+listing_parser = ListingParser()
+
+
+@functools.lru_cache(maxsize=1)
+def chromedriver_path():
+    """Resolve (and download if needed) ChromeDriver once per process"""
+    return ChromeDriverManager().install()
+
+
+class NFTScraper:
+    def __init__(self, base_url="https://msu.io/marketplace/nft", block_resources=None, extra_arguments=None, settle_time=5,
+                 recorder=None, parser=None, capture_xhr=None):
+        self.base_url = base_url
+        # Optional replay.CorpusRecorder that keeps every fetched page
+        self.recorder = recorder
+        # ListingParser that skips unchanged pages and cards (None: the shared one)
+        self.parser = listing_parser if parser is None else parser
+        self.block_resources = BLOCK_RESOURCES if block_resources is None else block_resources
+        self.extra_arguments = CHROME_EXTRA_ARGUMENTS if extra_arguments is None else extra_arguments
+        self.settle_time = settle_time
+        self.capture_xhr = CAPTURE_XHR if capture_xhr is None else capture_xhr
+        self.last_bytes_downloaded = 0
+        self.total_bytes_downloaded = 0
+        # Seconds spent in each stage of the last scrape (see SCRAPE_STAGES)
+        self.last_timings = {}
+        # Content hash of each page of the last scrape, and how much parsing it skipped
+        self.last_page_hashes = []
+        self.last_parse_stats = collections.Counter()
+        # Exception that ended the last scrape, None if it completed
+        self.last_error = None
+        self.setup_driver()
+
+    def setup_driver(self):
+        """Setup Chrome driver with options"""
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        for argument in self.extra_arguments:
+            chrome_options.add_argument(argument)
+        chrome_options.add_argument(
+            "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+        )
+
+        if self.block_resources:
+            # Chrome prefs cover images; fonts, media and domains are blocked
+            # through DevTools once the driver is running (see _apply_network_filters)
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.managed_default_content_settings.media_stream": 2,
+                "profile.managed_default_content_settings.plugins": 2,
+                "profile.managed_default_content_settings.notifications": 2,
+            })
+            rules = host_resolver_rules()
+            if rules:
+                chrome_options.add_argument(f"--host-resolver-rules={rules}")
+        if self.capture_xhr:
+            # Network.* DevTools events end up in driver.get_log("performance")
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+        self.service = Service(chromedriver_path())
+        self.chrome_options = chrome_options
+
+    def _apply_network_filters(self, driver):
+        """Block fonts, media and non-essential domains via DevTools network interception"""
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_url_patterns()})
+        except Exception as e:
+            print(f"⚠️  Could not enable network filtering: {e}")
+
+    def _record_bytes_downloaded(self, driver):
+        """Record how many bytes the page pulled over the network"""
+        try:
+            downloaded = int(driver.execute_script(BYTES_DOWNLOADED_SCRIPT) or 0)
+        except Exception:
+            downloaded = 0
+        self.last_bytes_downloaded = downloaded
+        self.total_bytes_downloaded += downloaded
+        print(f"📦 Downloaded {downloaded / 1024:,.1f} KiB")
+
+    def build_url(self, search_term=None, page=None):
+        """Build the marketplace URL for a search term and page"""
+        params = []
+        if search_term:
+            params.append(f"keyword={quote_plus(search_term)}")
+        if page and page > 1:
+            params.append(f"page={page}")
+        if not params:
+            return self.base_url
+        # Section URLs may already carry a filter (e.g. ?category=weapon)
+        separator = "&" if "?" in self.base_url else "?"
+        return f"{self.base_url}{separator}{'&'.join(params)}"
+
+    def _start_driver(self):
+        """Launch Chrome with the configured options and network filters"""
+        driver = webdriver.Chrome(service=self.service, options=self.chrome_options)
+        # A hung page load becomes an error the governor can count, not a stuck worker
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        if self.block_resources:
+            self._apply_network_filters(driver)
+        if self.capture_xhr:
+            driver.execute_cdp_cmd("Network.enable", {})
+        return driver
+
+    def _capture_listings(self, driver, timeout):
+        """Listings from the first marketplace API response the page receives within timeout, or None.
+
+        Watches the performance log for JSON responses whose URL matches
+        SCRAPER_API_URL_PATTERN and decodes their bodies once loaded.
+        """
+        pending = {}
+        deadline = time.monotonic() + timeout
+        while True:
+            for entry in driver.get_log("performance"):
+                message = json.loads(entry["message"])["message"]
+                params = message.get("params", {})
+                if message.get("method") == "Network.responseReceived":
+                    response = params.get("response", {})
+                    if "json" in response.get("mimeType", "") and API_URL_PATTERN.search(response.get("url", "")):
+                        pending[params["requestId"]] = response["url"]
+                elif message.get("method") == "Network.loadingFinished" and params.get("requestId") in pending:
+                    api_url = pending.pop(params["requestId"])
+                    try:
+                        body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+                        text = body["body"]
+                        if body.get("base64Encoded"):
+                            text = base64.b64decode(text).decode("utf-8")
+                        nfts = decode_api_listings(json.loads(text))
+                    except Exception as e:
+                        print(f"⚠️  Could not decode {api_url}: {e}")
+                        continue
+                    if nfts is not None:
+                        print(f"🛰️  {len(nfts)} listings from {api_url}")
+                        return nfts
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.05)
+
+    def _scrape_page(self, driver, url, timer, search_term=None, page=None):
+        """Load one marketplace page in an open driver and extract its listings"""
+        recorded = dict(timer.timings)
+        if self.capture_xhr:
+            # Drop what the previous page logged
+            driver.get_log("performance")
+        driver.get(url)
+        timer.end("navigation")
+
+        if self.capture_xhr:
+            # The settle time is spent watching for the page's API response instead
+            nfts = self._capture_listings(driver, self.settle_time)
+            timer.end("network_capture")
+            if nfts is not None:
+                self._record_bytes_downloaded(driver)
+                if self.recorder is not None:
+                    stages = {stage: seconds - recorded.get(stage, 0.0) for stage, seconds in timer.timings.items()}
+                    self.recorder.record(url, search_term, page or 1, nfts, stages, kind="json")
+                nfts = self._decoded(nfts)
+                timer.end("parse")
+                return nfts
+            print("⚠️  No marketplace API response seen, reading the page instead")
+        else:
+            # Wait for page to load
+            time.sleep(self.settle_time)
+            timer.end("settle")
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.TAG_NAME, "body"))
+        )
+        timer.end("readiness_wait")
+        self._record_bytes_downloaded(driver)
+
+        page_source = driver.page_source
+        timer.end("extraction")
+        if self.recorder is not None:
+            # Time this page spent in each stage (timer.timings is cumulative)
+            stages = {stage: seconds - recorded.get(stage, 0.0) for stage, seconds in timer.timings.items()}
+            self.recorder.record(url, search_term, page or 1, page_source, stages)
+
+        nfts = self._parse(page_source)
+        timer.end("parse")
+
+        return nfts
+
+    def _parse(self, page_source):
+        """Parse a page through the listing cache, recording its hash and what was reused"""
+        nfts, page_hash, stats = self.parser.parse(page_source)
+        self.last_page_hashes.append(page_hash)
+        self.last_parse_stats.update(stats)
+        if stats["pages_skipped"]:
+            print(f"📊 Unchanged page, reused {len(nfts)} listings")
+        else:
+            print(f"📊 Parsed {stats['cards_parsed']} listings, reused {stats['cards_reused']} unchanged")
+        return nfts
+
+    def _decoded(self, nfts):
+        """Record the hash of listings decoded from an API response (no HTML to parse)"""
+        self.last_page_hashes.append(listings_hash(nfts))
+        self.last_parse_stats["pages_decoded"] += 1
+        return nfts
+
+    def _reset_last(self, timer):
+        self.last_timings = timer.timings
+        self.last_page_hashes = []
+        self.last_parse_stats = collections.Counter()
+        self.last_error = None
+
+    def scrape_nfts(self, search_term=None, page=None):
+        """Scrape NFT data from the marketplace"""
+        driver = None
+        timer = StageTimer()
+        self._reset_last(timer)
+        try:
+            driver = self._start_driver()
+            timer.end("driver_start")
+
+            url = self.build_url(search_term, page)
+            if search_term:
+                print(f"🔍 Searching URL: {url}")
+            else:
+                print(f"📄 Loading general page: {url}")
+
+            return self._scrape_page(driver, url, timer, search_term, page)
+
+        except Exception as e:
+            print(f"Error scraping NFTs: {e}")
+            self.last_error = e
+            return []
+        finally:
+            if driver:
+                driver.quit()
+
+    def iter_pages(self, search_term=None, max_pages=1, start_page=1, step=1, before_page=None):
+        """Crawl up to max_pages pages in one browser session, yielding each page's listings.
+
+        Pages start_page, start_page + step, ... are visited, so several
+        sessions can split one crawl between them. before_page(page) is
+        called before each page load (e.g. to wait for a rate limit). Stops
+        early at an empty page, or when a page repeats the previous one (the
+        site ignoring the page parameter). Stage timings are summed over all
+        pages in last_timings.
+        """
+        driver = None
+        timer = StageTimer()
+        self._reset_last(timer)
+        previous = None
+        try:
+            driver = self._start_driver()
+            timer.end("driver_start")
+
+            for page in range(start_page, start_page + max_pages * step, step):
+                if before_page is not None:
+                    before_page(page)
+                url = self.build_url(search_term, page)
+                print(f"📄 Crawling page {page}: {url}")
+                nfts = self._scrape_page(driver, url, timer, search_term, page)
+                if not nfts or nfts == previous:
+                    break
+                previous = nfts
+                yield nfts
+
+        except Exception as e:
+            print(f"Error scraping NFTs: {e}")
+            self.last_error = e
+        finally:
+            if driver:
+                driver.quit()
@@ -0,0 +1,163 @@
+"""Marketplace sections tracked by the bot and the catalog merged from them.
+
+A section is one marketplace listing URL (the NFT marketplace, another
+part of the site, or a category-filtered view of one) with its own refresh
+interval and page count. Sections are scraped and cached independently;
+`SectionCatalog` merges their snapshots into one catalog where every
+listing carries a "section" field, and keeps a per-section view of it so
+commands can answer within a section without filtering or scraping.
+
+Configure with MARKETPLACE_SECTIONS, a JSON list such as
+
+    [{"name": "nft", "url": "https://msu.io/marketplace/nft", "refresh": 300},
+     {"name": "armas", "url": "https://msu.io/marketplace/nft?category=weapon", "refresh": 900, "pages": 2}]
+"""
+
+import collections
+import hashlib
+import json
+import os
+
+DEFAULT_URL = "https://msu.io/marketplace/nft"
+
+
+class Section:
+    def __init__(self, name, url=DEFAULT_URL, refresh=300, pages=1, label=None):
+        self.name = name
+        self.url = url
+        # Seconds a scraped snapshot of this section stays fresh
+        self.refresh = refresh
+        # Pages crawled per refresh
+        self.pages = pages
+        self.label = label or name
+
+    @property
+    def cache_key(self):
+        return f"catalog:{self.name}"
+
+    def __repr__(self):
+        return f"Section({self.name!r}, {self.url!r}, refresh={self.refresh}, pages={self.pages})"
+
+
+def load_sections(raw=None, refresh=300, pages=1):
+    """Sections from a MARKETPLACE_SECTIONS JSON list; the NFT marketplace alone when unset.
+
+    `refresh` and `pages` are the defaults for entries that leave them out.
+    """
+    raw = os.getenv("MARKETPLACE_SECTIONS", "") if raw is None else raw
+    if not raw.strip():
+        return [Section("nft", DEFAULT_URL, refresh, pages)]
+    sections = []
+    for entry in json.loads(raw):
+        section = Section(
+            entry["name"].strip().lower(), entry.get("url", DEFAULT_URL), float(entry.get("refresh", refresh)),
+            int(entry.get("pages", pages)), entry.get("label")
+        )
+        if any(existing.name == section.name for existing in sections):
+            raise ValueError(f"Duplicate marketplace section: {section.name}")
+        sections.append(section)
+    if not sections:
+        raise ValueError("MARKETPLACE_SECTIONS must list at least one section")
+    return sections
+
+
+class SectionCatalog:
+    """Latest snapshot of every section and the catalog merged from them.
+
+    The merged list and the per-section views are only rebuilt when a
+    section's version changes, so while nothing changed callers keep getting
+    the same list objects (and whatever was derived from them stays valid).
+    When a scrape knows which listings it added and removed, the change is
+    kept as a (from version, to version, added, removed) step of both the
+    section and the merged catalog, for MarketStats to apply incrementally.
+    """
+
+    def __init__(self, sections):
+        self.sections = {section.name: section for section in sections}
+        # name -> {"items", "version", "timestamp"} as stored in the shared cache
+        self.entries = {}
+        self.items = []
+        self.version = None
+        self.by_section = {}
+        self._versions = None
+        # Recent change steps of the merged catalog and of each section
+        self.changes = collections.deque(maxlen=2 * len(self.sections) + 2)
+        self.section_changes = {name: collections.deque(maxlen=2) for name in self.sections}
+
+    def update(self, name, entry, changes=None):
+        """Take a section's cache entry; returns True if the merged catalog changed.
+
+        `changes` is the (from version, to version, added, removed) step the
+        scrape that produced the entry knows about, if any.
+        """
+        self.entries[name] = entry
+        versions = tuple((section, self.entries[section]['version']) for section in self.sections
+                         if section in self.entries)
+        if versions == self._versions:
+            return False
+        previous = dict(self._versions or ())
+        previous_version = self.version
+        self._versions = versions
+        # Sections that did not change keep their list
+        self.by_section = {
+            section: self.by_section[section] if previous.get(section) == version
+            else [dict(nft, section=section) for nft in self.entries[section]['items']]
+            for section, version in versions
+        }
+        self.items = [nft for section, _ in versions for nft in self.by_section[section]]
+        if len(versions) == 1:
+            self.version = versions[0][1]
+        else:
+            payload = json.dumps(versions).encode("utf-8")
+            self.version = hashlib.sha1(payload).hexdigest()[:16]
+        if changes is not None and name in previous and changes[:2] == (previous[name], entry['version']):
+            added = [dict(nft, section=name) for nft in changes[2]]
+            self.section_changes[name].append((changes[0], changes[1], added, changes[3]))
+            self.changes.append((previous_version, self.version, added, changes[3]))
+        return True
+
+    def merged_with(self, name, partial):
+        """The merged catalog with a section's listings replaced by a partial crawl of it"""
+        replaced = [dict(nft, section=name) for nft in partial]
+        merged = []
+        for section in self.sections:
+            merged.extend(replaced if section == name else self.by_section.get(section, []))
+        return merged
+
+    def oldest_timestamp(self):
+        """Scrape time of the stalest section we have (0 before any was scraped)"""
+        return min((entry['timestamp'] for entry in self.entries.values()), default=0)
+
+    def expires_at(self, interval=None):
+        """When the first section needs a refresh; interval(section) overrides the configured refresh"""
+        if len(self.entries) < len(self.sections):
+            return 0
+        return min(
+            self.entries[name]['timestamp'] + (interval(section) if interval else section.refresh)
+            for name, section in self.sections.items()
+        )
+
+    def section_items(self, name):
+        if name not in self.sections:
+            raise KeyError(f"Unknown marketplace section: {name}")
+        return self.by_section.get(name, [])
+
+    def history(self, name=None):
+        """(version, change steps) of the merged catalog, or of one section"""
+        if name is None:
+            return self.version, self.changes
+        return self.entries.get(name, {}).get('version'), self.section_changes.get(name, ())
+
+    def summary(self):
+        """Listings, version and age of every section"""
+        return {
+            name: {
+                "label": section.label,
+                "url": section.url,
+                "refresh_seconds": section.refresh,
+                "listings": len(self.by_section.get(name, [])),
+                "version": self.entries.get(name, {}).get('version'),
+                "scraped_at": self.entries.get(name, {}).get('timestamp'),
+            }
+            for name, section in self.sections.items()
+        }
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Test the shared cache against an in-process Redis stand-in"""
+
+import asyncio
+import time
+
+from cache_backend import DELETE_IF_SCRIPT, EXPIRE_IF_SCRIPT, MemoryCacheBackend, RedisCacheBackend, SharedCache
+
+
+class FakeRedis:
+    """Tiny in-process server speaking enough RESP for RedisCacheBackend"""
+
+    def __init__(self):
+        self.data = {}
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def _get(self, key):
+        item = self.data.get(key)
+        if item and item[1] is not None and time.monotonic() >= item[1]:
+            del self.data[key]
+            return None
+        return item[0] if item else None
+
+    async def _read_command(self, reader):
+        header = await reader.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def _handle(self, reader, writer):
+        while True:
+            args = await self._read_command(reader)
+            if args is None:
+                break
+            command = args[0].decode().upper()
+            if command == "GET":
+                value = self._get(args[1])
+                writer.write(b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+            elif command == "SET":
+                options = [a.decode().upper() for a in args[3:]]
+                if "NX" in options and self._get(args[1]) is not None:
+                    writer.write(b"$-1\r\n")
+                else:
+                    expires = None
+                    if "PX" in options:
+                        expires = time.monotonic() + int(options[options.index("PX") + 1]) / 1000
+                    self.data[args[1]] = (args[2], expires)
+                    writer.write(b"+OK\r\n")
+            elif command == "EVAL" and args[1].decode() == DELETE_IF_SCRIPT:
+                # Compare-and-delete, atomic like a real server script
+                deleted = self._get(args[3]) == args[4]
+                if deleted:
+                    del self.data[args[3]]
+                writer.write(b":%d\r\n" % int(deleted))
+            elif command == "EVAL" and args[1].decode() == EXPIRE_IF_SCRIPT:
+                extended = self._get(args[3]) == args[4]
+                if extended:
+                    self.data[args[3]] = (args[4], time.monotonic() + int(args[5]) / 1000)
+                writer.write(b":%d\r\n" % int(extended))
+            elif command == "DEL":
+                writer.write(b":%d\r\n" % int(self.data.pop(args[1], None) is not None))
+            else:
+                writer.write(b"-ERR unknown command\r\n")
+            await writer.drain()
+        writer.close()
+
+
+async def _replicas_share_one_scrape():
+    redis = FakeRedis()
+    await redis.start()
+    scrapes = 0
+
+    async def scrape():
+        nonlocal scrapes
+        scrapes += 1
+        await asyncio.sleep(0.2)
+        return [{"name": "Unchained Dagger", "price": "1,000"}], "v1"
+
+    replicas = [
+        SharedCache(RedisCacheBackend(port=redis.port), poll_interval=0.05)
+        for _ in range(5)
+    ]
+    try:
+        # Every replica misses at once; only one of them may scrape
+        results = await asyncio.gather(*[
+            replica.get_or_refresh("catalog", 300, scrape) for replica in replicas for _ in range(3)
+        ])
+        assert scrapes == 1, f"expected 1 scrape, got {scrapes}"
+        assert all(entry["items"][0]["name"] == "Unchained Dagger" for entry, _ in results)
+        assert sorted({result for _, result in results}) == ["miss", "shared"]
+
+        # Fresh entry is a hit everywhere, without scraping again
+        entry, result = await replicas[-1].get_or_refresh("catalog", 300, scrape)
+        assert result == "hit" and scrapes == 1
+    finally:
+        for replica in replicas:
+            await replica.backend.close()
+        await redis.stop()
+    return True
+
+
+async def _empty_refresh_keeps_stale_entry():
+    redis = FakeRedis()
+    await redis.start()
+    cache = SharedCache(RedisCacheBackend(port=redis.port))
+    try:
+        async def good():
+            return [{"name": "Absolab Staff", "price": "5,000"}], "v1"
+
+        async def empty():
+            return [], "v2"
+
+        await cache.get_or_refresh("catalog", 300, good)
+        entry, result = await cache.get_or_refresh("catalog", 0, empty)
+        assert result == "stale"
+        assert entry["version"] == "v1"
+    finally:
+        await cache.backend.close()
+        await redis.stop()
+    return True
+
+
+async def _release_keeps_other_replicas_lock():
+    redis = FakeRedis()
+    await redis.start()
+    try:
+        for backend in (RedisCacheBackend(port=redis.port), MemoryCacheBackend()):
+            cache = SharedCache(backend)
+            # Our lock expired and another replica took it before we released
+            await backend.set("lock:catalog", "replica-b:2", ttl=60)
+            await cache._release("lock:catalog", "replica-a:1")
+            holder = await backend.get("lock:catalog")
+            assert holder in ("replica-b:2", b"replica-b:2"), holder
+            await cache._release("lock:catalog", "replica-b:2")
+            assert await backend.get("lock:catalog") is None
+            await backend.close()
+    finally:
+        await redis.stop()
+    return True
+
+
+async def _slow_refresh_keeps_lock():
+    redis = FakeRedis()
+    await redis.start()
+    scrapes = 0
+
+    async def slow_scrape():
+        nonlocal scrapes
+        scrapes += 1
+        # Three lock TTLs: without the heartbeat the lock would expire mid-scrape
+        await asyncio.sleep(0.9)
+        return [{"name": "Unchained Dagger", "price": "1,000"}], "v1"
+
+    first, second = [
+        SharedCache(RedisCacheBackend(port=redis.port), lock_ttl=0.3, poll_interval=0.05)
+        for _ in range(2)
+    ]
+    try:
+        holder = asyncio.ensure_future(first.get_or_refresh("catalog", 300, slow_scrape))
+        await asyncio.sleep(0.05)
+        entry, result = await second.get_or_refresh("catalog", 300, slow_scrape)
+        assert scrapes == 1, f"expected 1 scrape, got {scrapes}"
+        assert result == "shared" and entry["version"] == "v1"
+        assert (await holder)[1] == "miss"
+        assert await first.backend.get("nft:lock:catalog") is None
+
+        # A crashed replica's lock expires; the waiter takes the lock before scraping
+        async def locked_scrape():
+            nonlocal scrapes
+            scrapes += 1
+            token = await second.backend.get("nft:lock:catalog")
+            assert token and token.decode().startswith(second.replica_id), token
+            return [{"name": "Absolab Staff", "price": "5,000"}], "v2"
+
+        await first.backend.set("nft:lock:catalog", "crashed:1", ttl=0.2)
+        entry, result = await second.get_or_refresh("catalog", 0, locked_scrape)
+        assert result == "stale" and entry["version"] == "v2" and scrapes == 2
+    finally:
+        await first.backend.close()
+        await second.backend.close()
+        await redis.stop()
+    return True
+
+
+def test_replicas_share_one_scrape():
+    """Concurrent misses across replicas trigger a single scrape"""
+    assert asyncio.run(_replicas_share_one_scrape())
+    print("✅ Replicas shared one scrape")
+
+
+def test_empty_refresh_keeps_stale_entry():
+    """A failed (empty) refresh keeps serving the previous snapshot"""
+    assert asyncio.run(_empty_refresh_keeps_stale_entry())
+    print("✅ Empty refresh kept the previous snapshot")
+
+
+def test_slow_refresh_keeps_lock():
+    """A refresh longer than the lock TTL keeps its lock, and waiters lock before scraping"""
+    assert asyncio.run(_slow_refresh_keeps_lock())
+    print("✅ Slow refresh kept the lock alive")
+
+
+def test_release_keeps_other_replicas_lock():
+    """Releasing an expired lock never deletes the lock another replica took since"""
+    assert asyncio.run(_release_keeps_other_replicas_lock())
+    print("✅ Lock released only by its holder")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing shared cache backend...")
+    test_replicas_share_one_scrape()
+    test_empty_refresh_keeps_stale_entry()
+    test_slow_refresh_keeps_lock()
+    test_release_keeps_other_replicas_lock()
+    print("🎉 All cache backend tests passed!")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Test the catalog JSON API: ETags, compression, sections and JSON Lines"""
+
+import asyncio
+import gzip
+import json
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import catalog_api
+import discord_bot
+from sections import SectionCatalog, load_sections
+
+SECTIONS = load_sections('[{"name": "nft"}, {"name": "armas", "url": "https://msu.io/marketplace/nft?category=weapon"}]')
+
+
+def _catalog():
+    catalog = SectionCatalog(SECTIONS)
+    catalog.update("nft", {"items": [{"name": f"Pink Bean Cup #{i}", "price": f"{i * 1000:,}"} for i in range(1, 301)],
+                           "version": "n1", "timestamp": 100})
+    catalog.update("armas", {"items": [{"name": "Genesis Claw #1", "price": "9,000,000"}],
+                             "version": "a1", "timestamp": 100})
+    return catalog
+
+
+async def _with_client(check):
+    catalog = _catalog()
+    saved = (discord_bot.get_nft_data_or_cached, discord_bot.snapshot_version, discord_bot.section_catalog)
+
+    async def cached_catalog():
+        return catalog.items
+
+    discord_bot.get_nft_data_or_cached = cached_catalog
+    discord_bot.snapshot_version = catalog.version
+    discord_bot.section_catalog = catalog
+    app = web.Application()
+    catalog_api.register(app)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    try:
+        await check(client, catalog)
+    finally:
+        await client.close()
+        discord_bot.get_nft_data_or_cached, discord_bot.snapshot_version, discord_bot.section_catalog = saved
+
+
+def test_etag_not_modified():
+    """Strong and weak validators for the current version get a 304; each content-coding has its own tag"""
+    async def check(client, catalog):
+        gzipped = {"Accept-Encoding": "gzip"}
+        response = await client.get("/api/nfts", headers=gzipped)
+        etag = response.headers["ETag"]
+        assert response.status == 200 and etag == f'"{catalog.version}-gzip"'
+        for validator in (etag, f"W/{etag}", f'"old", W/{etag}', "*"):
+            response = await client.get("/api/nfts", headers=dict(gzipped, **{"If-None-Match": validator}))
+            assert response.status == 304, validator
+            assert response.headers["ETag"] == etag
+        response = await client.get("/api/nfts", headers=dict(gzipped, **{"If-None-Match": 'W/"old"'}))
+        assert response.status == 200
+
+        # The gzip body's tag does not validate the identity body, and vice versa
+        plain = {"Accept-Encoding": "identity"}
+        response = await client.get("/api/nfts", headers=dict(plain, **{"If-None-Match": etag}))
+        assert response.status == 200 and response.headers["ETag"] == f'"{catalog.version}"'
+        response = await client.get("/api/nfts", headers=dict(gzipped, **{"If-None-Match": response.headers["ETag"]}))
+        assert response.status == 200
+
+    asyncio.run(_with_client(check))
+    print("✅ 304 for strong and weak ETags of the current snapshot")
+
+
+def test_compression_negotiation():
+    """gzip (or br when available) is chosen from Accept-Encoding and decodes to the same body"""
+    async def check(client, catalog):
+        plain = await client.get("/api/nfts", headers={"Accept-Encoding": "identity"})
+        body = await plain.read()
+        assert "Content-Encoding" not in plain.headers and json.loads(body)["count"] == 301
+
+        response = await client.get("/api/nfts", headers={"Accept-Encoding": "gzip"}, auto_decompress=False)
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(await response.read()) == body
+
+        response = await client.get("/api/nfts", headers={"Accept-Encoding": "br, gzip"}, auto_decompress=False)
+        if catalog_api.brotli is not None:
+            assert response.headers["Content-Encoding"] == "br"
+            assert catalog_api.brotli.decompress(await response.read()) == body
+        else:
+            assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+
+    asyncio.run(_with_client(check))
+    print(f"✅ Compression negotiated (brotli {'available' if catalog_api.brotli else 'not installed'})")
+
+
+def test_section_filter():
+    """?section= narrows every endpoint to one section; unknown sections are a 400"""
+    async def check(client, catalog):
+        data = await (await client.get("/api/nfts?section=armas")).json()
+        assert [nft["name"] for nft in data["items"]] == ["Genesis Claw #1"]
+        stats = await (await client.get("/api/stats?section=ARMAS")).json()
+        assert stats["count"] == 1
+        assert (await client.get("/api/nfts?section=nope")).status == 400
+        sections = await (await client.get("/api/sections")).json()
+        assert sections["sections"]["nft"]["listings"] == 300
+
+    asyncio.run(_with_client(check))
+    print("✅ Section filter applied and unknown sections rejected")
+
+
+def test_jsonl_dump():
+    """/api/nfts.jsonl streams one listing per line, honours ETags and ?section="""
+    async def check(client, catalog):
+        response = await client.get("/api/nfts.jsonl")
+        assert response.status == 200 and response.content_type == "application/x-ndjson"
+        lines = (await response.text()).splitlines()
+        assert [json.loads(line) for line in lines] == catalog.items
+        assert response.headers["ETag"] == f'W/"{catalog.version}"'
+        response = await client.get("/api/nfts.jsonl", headers={"If-None-Match": response.headers["ETag"]})
+        assert response.status == 304
+        lines = (await (await client.get("/api/nfts.jsonl?section=armas")).text()).splitlines()
+        assert len(lines) == 1 and json.loads(lines[0])["section"] == "armas"
+
+    asyncio.run(_with_client(check))
+    print("✅ JSON Lines dump streamed every listing")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the catalog API...")
+    test_etag_not_modified()
+    test_compression_negotiation()
+    test_section_filter()
+    test_jsonl_dump()
+    print("🎉 All catalog API tests passed!")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Test slash command replies: deadline fallback to cache, progressive edits and error fallbacks"""
+
+import asyncio
+import time
+
+import discord
+
+import discord_bot
+from fair_queue import Throttled
+from governor import UpstreamError
+
+
+class FakeMessage:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def edit(self, content=None, embed=None):
+        self.interaction.calls.append(("edit", content))
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, embed=None, wait=False):
+        self.interaction.calls.append(("send", content))
+        return FakeMessage(self.interaction) if wait else None
+
+
+class FakeInteraction:
+    """Records followup sends and message edits as ("send"/"edit", content)"""
+
+    def __init__(self):
+        self.created_at = discord.utils.utcnow()
+        self.followup = FakeFollowup(self)
+        self.calls = []
+
+
+def build_reply(items):
+    return {'content': "error" if items is None else f"{len(items)} items"}
+
+
+async def cached():
+    return [{"name": "Old #1", "price": "1"}], time.time() - 120
+
+
+async def _respond(fetch, cached=cached, deadline=0.05):
+    saved = discord_bot.COMMAND_DEADLINE
+    discord_bot.COMMAND_DEADLINE = deadline
+    try:
+        interaction = FakeInteraction()
+        await discord_bot.respond_with_deadline(interaction, "test", fetch, cached, build_reply)
+        return interaction.calls
+    finally:
+        discord_bot.COMMAND_DEADLINE = saved
+
+
+def test_deadline_then_edit():
+    """A slow fetch first shows the cached answer with its age, then edits in the fresh data"""
+    async def slow_fetch(on_batch):
+        await asyncio.sleep(0.2)
+        return [{"name": "New #1", "price": "2"}, {"name": "New #2", "price": "3"}]
+
+    calls = asyncio.run(_respond(slow_fetch))
+    assert [kind for kind, _ in calls] == ["send", "edit"], calls
+    assert calls[0][1].startswith("1 items") and "Datos en caché de hace 2 min" in calls[0][1]
+    assert calls[1] == ("edit", "2 items")
+    print("✅ Cached answer sent at the deadline, edited with fresh data")
+
+
+def test_fast_fetch_skips_cache():
+    """Data within the deadline is sent once, without a stale label"""
+    async def fast_fetch(on_batch):
+        return [{"name": "New #1", "price": "2"}]
+
+    assert asyncio.run(_respond(fast_fetch, deadline=1)) == [("send", "1 items")]
+    print("✅ Fresh data within the deadline sent directly")
+
+
+def test_upstream_and_throttled_fallbacks():
+    """Marketplace errors and cooldowns answer from cache with a label, or with an error/wait message"""
+    async def down(on_batch):
+        raise UpstreamError("circuit open")
+
+    async def throttled(on_batch):
+        raise Throttled("user_cooldown", 12)
+
+    async def nothing():
+        return None
+
+    calls = asyncio.run(_respond(down))
+    assert len(calls) == 1 and "el marketplace no responde" in calls[0][1]
+    assert asyncio.run(_respond(down, cached=nothing)) == [("send", "error")]
+    calls = asyncio.run(_respond(throttled))
+    assert len(calls) == 1 and calls[0][1].startswith("1 items") and "podrás buscar de nuevo en 12 s" in calls[0][1]
+    calls = asyncio.run(_respond(throttled, cached=nothing))
+    assert len(calls) == 1 and calls[0][1].startswith("⏳ Demasiadas búsquedas seguidas")
+    print("✅ Upstream and cooldown fallbacks labelled")
+
+
+def _paged_fetch(pages, delay):
+    async def fetch(on_batch):
+        items = []
+        for page in range(1, pages + 1):
+            await asyncio.sleep(delay)
+            items.append({"name": f"Page #{page}", "price": "1"})
+            await on_batch(items, page)
+        return items
+    return fetch
+
+
+def test_partial_edits_are_throttled():
+    """Pages show up as edits of one message, none closer than PROGRESS_EDIT_INTERVAL, and the final one always"""
+    saved = discord_bot.PROGRESS_EDIT_INTERVAL
+    try:
+        # Pages arrive well within one interval: only the first page and the final result are shown
+        discord_bot.PROGRESS_EDIT_INTERVAL = 60
+        calls = asyncio.run(_respond(_paged_fetch(10, 0), deadline=5))
+        assert calls[0][0] == "send" and "(página 1)" in calls[0][1]
+        assert calls[1:] == [("edit", "10 items")], calls
+        # Without a minimum interval every page is an edit
+        discord_bot.PROGRESS_EDIT_INTERVAL = 0
+        calls = asyncio.run(_respond(_paged_fetch(10, 0), deadline=5))
+        assert [kind for kind, _ in calls] == ["send"] + ["edit"] * 10
+        assert "(página 10)" in calls[-2][1] and calls[-1] == ("edit", "10 items")
+    finally:
+        discord_bot.PROGRESS_EDIT_INTERVAL = saved
+    print("✅ Partial edits throttled to PROGRESS_EDIT_INTERVAL, final edit always sent")
+
+
+def test_cached_answer_not_replaced_by_partials():
+    """Once the cached answer went out at the deadline, partial pages do not replace it"""
+    calls = asyncio.run(_respond(_paged_fetch(3, 0.15), deadline=0.02))
+    assert [kind for kind, _ in calls] == ["send", "edit"], calls
+    assert "Datos en caché" in calls[0][1] and calls[1] == ("edit", "3 items")
+    print("✅ Cached answer kept until the complete fresh data arrived")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing command replies...")
+    test_deadline_then_edit()
+    test_fast_fetch_skips_cache()
+    test_upstream_and_throttled_fallbacks()
+    test_partial_edits_are_throttled()
+    test_cached_answer_not_replaced_by_partials()
+    print("🎉 All command reply tests passed!")
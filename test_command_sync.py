@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Test skipping command tree syncs when the commands did not change"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+from discord import app_commands
+
+import discord_bot
+from cache_backend import MemoryCacheBackend
+from command_sync import CommandSync, tree_fingerprint
+
+
+class FakeCommand:
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+
+    def to_dict(self, tree):
+        return {"name": self.name, "description": self.description, "options": []}
+
+
+class FakeTree:
+    """Command tree whose sync takes as long as a rate-limited Discord call"""
+
+    def __init__(self, commands, latency=0.2):
+        self.commands = commands
+        self.latency = latency
+        self.syncs = 0
+
+    def get_commands(self):
+        return list(self.commands)
+
+    async def sync(self):
+        self.syncs += 1
+        await asyncio.sleep(self.latency)
+        return list(self.commands)
+
+
+def test_fingerprint_tracks_signatures():
+    """The fingerprint changes with a command's signature but not with registration order"""
+    tree = discord_bot.bot.tree
+    fingerprint = tree_fingerprint(tree, 1)
+    assert fingerprint == tree_fingerprint(tree, 1) and fingerprint != tree_fingerprint(tree, 2)
+
+    @app_commands.command(name="test_fingerprint", description="Comando de prueba")
+    async def test_fingerprint(interaction, nombre: str):
+        pass
+
+    tree.add_command(test_fingerprint)
+    try:
+        assert tree_fingerprint(tree, 1) != fingerprint
+    finally:
+        tree.remove_command("test_fingerprint")
+    assert tree_fingerprint(tree, 1) == fingerprint
+
+    a, b = FakeCommand("a", "x"), FakeCommand("b", "y")
+    assert tree_fingerprint(FakeTree([a, b])) == tree_fingerprint(FakeTree([b, a]))
+    print(f"✅ Fingerprint of {len(tree.get_commands())} commands: {fingerprint}")
+
+
+def test_sync_only_when_changed():
+    """Restarts with the same commands skip the sync; a changed command or force syncs again"""
+    commands = [FakeCommand("buscar", "Buscar items"), FakeCommand("top_nfts", "Top NFTs")]
+    tree = FakeTree(commands)
+
+    async def _startup(path, force=False):
+        # A fresh process: state is read back from disk
+        started = time.perf_counter()
+        synced = await CommandSync(path).sync(tree, application_id=42, force=force)
+        return synced, time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sync.json")
+        synced, first = asyncio.run(_startup(path))
+        assert [command.name for command in synced] == ["buscar", "top_nfts"] and tree.syncs == 1
+        synced, restart = asyncio.run(_startup(path))
+        assert synced is None and tree.syncs == 1
+        commands[0].description = "Buscar items NFT"
+        synced, _ = asyncio.run(_startup(path))
+        assert synced is not None and tree.syncs == 2
+        synced, _ = asyncio.run(_startup(path, force=True))
+        assert synced is not None and tree.syncs == 3
+
+        # Unreadable state just means one sync
+        with open(path, "w") as f:
+            f.write("{not json")
+        assert CommandSync(path).state == {}
+    print(f"✅ Startup sync {first * 1000:.0f}ms, restart with unchanged commands {restart * 1000:.1f}ms")
+
+
+def test_state_survives_ephemeral_disk():
+    """With a shared backend, a restart on a fresh disk still skips the sync"""
+    tree = FakeTree([FakeCommand("buscar", "Buscar items")], latency=0)
+    backend = MemoryCacheBackend()
+
+    async def _startup(path):
+        return await CommandSync(path, backend=backend).sync(tree, application_id=42)
+
+    with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+        assert asyncio.run(_startup(os.path.join(first, "sync.json"))) is not None
+        assert asyncio.run(_startup(os.path.join(second, "sync.json"))) is None
+    assert tree.syncs == 1
+    print("✅ Fingerprint kept in the shared backend across a fresh disk")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing command sync...")
+    test_fingerprint_tracks_signatures()
+    test_sync_only_when_changed()
+    test_state_survives_ephemeral_disk()
+    print("🎉 All command sync tests passed!")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Test card attribute extraction and the faceted index"""
+
+import random
+
+from facet_index import FacetIndex
+from fixture_server import build_catalog, render_page
+from scraper import parse_listings, parse_price
+
+
+def test_parse_listings_reads_card_attributes():
+    """Category, level, star force, seller and listing id round-trip through the card markup"""
+    catalog = build_catalog(24)
+    assert parse_listings(render_page(catalog)) == catalog
+
+    bare = [{'name': nft['name'], 'price': nft['price']} for nft in catalog]
+    assert parse_listings(render_page(bare)) == bare
+    print("✅ Card attributes extracted")
+
+
+def test_query_matches_brute_force():
+    """Bitmap intersections return the same listings as a full scan, cheapest first"""
+    catalog = build_catalog(3000)
+    index = FacetIndex(catalog, parse_price)
+    rng = random.Random(5)
+    for _ in range(200):
+        filters = {
+            'category': rng.choice([None, 'Weapon', 'armor', 'Accessory']),
+            'seller': rng.choice([None, 'seller03', 'SELLER17']),
+            'level_min': rng.choice([None, 140, 200]),
+            'star_force_min': rng.choice([None, 10, 22]),
+            'price_min': rng.choice([None, 100_000, 2_000_000]),
+            'price_max': rng.choice([None, 1_000_000, 4_000_000]),
+            'name': rng.choice([None, 'zakum', 'dagger']),
+        }
+
+        def matches(nft):
+            price = parse_price(nft['price'])
+            return (
+                (filters['category'] is None or nft['category'].lower() == filters['category'].lower())
+                and (filters['seller'] is None or nft['seller'].lower() == filters['seller'].lower())
+                and (filters['level_min'] is None or nft['level'] >= filters['level_min'])
+                and (filters['star_force_min'] is None or nft['star_force'] >= filters['star_force_min'])
+                and (filters['price_min'] is None or price >= filters['price_min'])
+                and (filters['price_max'] is None or price <= filters['price_max'])
+                and (filters['name'] is None or filters['name'] in nft['name'].lower())
+            )
+
+        expected = sorted((nft for nft in catalog if matches(nft)), key=lambda nft: parse_price(nft['price']))
+        result = index.query(**filters)
+        assert [parse_price(nft['price']) for nft in result] == [parse_price(nft['price']) for nft in expected]
+        assert sorted(nft['listing_id'] for nft in result) == sorted(nft['listing_id'] for nft in expected)
+        assert index.count(**filters) == len(expected)
+        assert index.query(limit=3, **filters) == result[:3]
+    print("✅ Facet queries matched a full scan")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing facet index...")
+    test_parse_listings_reads_card_attributes()
+    test_query_matches_brute_force()
+    print("🎉 All facet index tests passed!")
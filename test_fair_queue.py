@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Test fair queuing and cooldowns of user-triggered scrapes"""
+
+import asyncio
+import time
+
+import discord_bot
+from fair_queue import FairQueue, Throttled
+from governor import UpstreamGovernor
+
+
+async def _admission_order(queue, requests, hold=0.01):
+    """Queue (guild, user) scrapes while one slot is busy; returns who was admitted in which order"""
+    order = []
+
+    async def scrape(guild, user):
+        async with queue.slot(guild, user):
+            order.append((guild, user))
+            await asyncio.sleep(hold)
+
+    async with queue.slot("busy", "busy"):
+        tasks = [asyncio.ensure_future(scrape(guild, user)) for guild, user in requests]
+        await asyncio.sleep(0)
+        assert queue.queued() == len(requests)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_guilds_take_turns():
+    """A guild flooding the queue does not delay another guild's single scrape"""
+    spam = [("g1", "spammer")] * 8
+    queue = FairQueue(limit=1, max_pending_per_user=10)
+    order = asyncio.run(_admission_order(queue, spam + [("g2", "alice"), ("g3", "bob")]))
+    assert order.index(("g2", "alice")) <= 2 and order.index(("g3", "bob")) <= 2, order
+    summary = queue.summary()
+    assert summary["guilds"]["g1"]["admitted"] == 8 and summary["guilds"]["g1"]["wait_max_seconds"] > 0.05
+    assert summary["guilds"]["g2"]["wait_max_seconds"] < 0.05
+    print(f"✅ Quiet guilds admitted at positions {order.index(('g2', 'alice'))} and {order.index(('g3', 'bob'))}")
+
+
+def test_weights_and_users_round_robin():
+    """Weighted guilds get proportionally more turns; users of a guild alternate"""
+    queue = FairQueue(limit=1, weights={"big": 2}, max_pending_per_user=10)
+    order = asyncio.run(_admission_order(queue, [("big", "a")] * 3 + [("big", "b")] * 3 + [("small", "c")] * 3))
+    guilds = [guild for guild, _ in order]
+    assert guilds[:6].count("big") == 4, guilds
+    big_users = [user for guild, user in order if guild == "big"]
+    assert big_users[:4] == ["a", "b", "a", "b"], big_users
+    print(f"✅ Admission order: {' '.join(guild for guild in guilds)}")
+
+
+def test_cooldown_and_cancel():
+    """Cooldowns and pending limits refuse scrapes; a cancelled waiter leaves the queue"""
+    async def _run():
+        queue = FairQueue(limit=1, user_cooldown=0.2, guild_cooldown=0.05)
+        async with queue.slot("g1", "u1"):
+            waiter = asyncio.ensure_future(queue.acquire("g1", "u2"))
+            await asyncio.sleep(0)
+            assert queue.check("g1", "u2").reason == "pending"
+            waiter.cancel()
+            await asyncio.sleep(0)
+            assert queue.queued() == 0 and queue.check("g1", "u2").reason == "guild_cooldown"
+        throttled = queue.check("g1", "u1")
+        assert throttled.reason == "user_cooldown" and 0 < throttled.retry_after <= 0.2
+        try:
+            queue.reject("g1", throttled)
+            assert False, "reject did not raise"
+        except Throttled:
+            pass
+        await asyncio.sleep(0.06)
+        assert queue.check("g1", "u2") is None and queue.check("g2", "u1") is None
+        assert queue.in_flight == 0 and queue.summary()["guilds"]["g1"]["rejected"] == {"user_cooldown": 1}
+
+    asyncio.run(_run())
+    print("✅ Cooldowns refuse new scrapes and cancelled waiters are dropped")
+
+
+def test_search_cooldown_serves_cache():
+    """Within their cooldown a user still gets fresh cached terms but no new scrape"""
+    scraped = []
+
+    class SearchScraper:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def iter_pages(self, search_term=None, max_pages=1, **kwargs):
+            scraped.append(search_term)
+            time.sleep(0.05)
+            yield [{"name": f"{search_term.title()} #1", "price": "1,000"}]
+
+    saved = (discord_bot.NFTScraper, discord_bot.governor, discord_bot.fair_queue)
+    discord_bot.NFTScraper = SearchScraper
+    discord_bot.governor = UpstreamGovernor(rate=100, burst=10)
+    discord_bot.fair_queue = FairQueue(limit=1, user_cooldown=60)
+
+    async def _searches():
+        spammer, other = ("guild", "spammer"), ("guild", "other")
+        await discord_bot.get_search_results("fairqueue-a", requester=spammer)
+        # Cached term: answered even during the cooldown
+        await discord_bot.get_search_results("fairqueue-a", requester=spammer)
+        try:
+            await discord_bot.get_search_results("fairqueue-b", requester=spammer)
+            assert False, "scrape allowed during cooldown"
+        except Throttled as e:
+            assert e.reason == "user_cooldown" and e.retry_after > 50
+        return await discord_bot.get_search_results("fairqueue-b", requester=other)
+
+    try:
+        results = asyncio.run(_searches())
+        assert scraped == ["fairqueue-a", "fairqueue-b"] and results[0]["name"] == "Fairqueue-B #1"
+        assert discord_bot.fair_queue.summary()["guilds"]["guild"]["rejected"] == {"user_cooldown": 1}
+    finally:
+        discord_bot.NFTScraper, discord_bot.governor, discord_bot.fair_queue = saved
+    print("✅ Cooldown answered from cache and refused a new scrape")
+
+
+def test_queue_wait_outside_refresh_lock():
+    """A search waiting for its turn holds no refresh lock; joining a running scrape needs no turn"""
+    class SearchScraper:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def iter_pages(self, search_term=None, max_pages=1, **kwargs):
+            time.sleep(0.05)
+            yield [{"name": f"{search_term.title()} #1", "price": "1,000"}]
+
+    saved = (discord_bot.NFTScraper, discord_bot.governor, discord_bot.fair_queue)
+    discord_bot.NFTScraper = SearchScraper
+    discord_bot.governor = UpstreamGovernor(rate=100, burst=10)
+    discord_bot.fair_queue = FairQueue(limit=1)
+    queue = discord_bot.fair_queue
+
+    async def _searches():
+        async with queue.slot("other", "busy"):
+            first = asyncio.ensure_future(discord_bot.get_search_results("fairqueue-c", requester=("g", "a")))
+            await asyncio.sleep(0.02)
+            assert queue.queued() == 1 and not discord_bot.shared_cache.refreshing("search:fairqueue-c")
+        await asyncio.sleep(0.01)
+        assert discord_bot.shared_cache.refreshing("search:fairqueue-c")
+        # Same term while it is being scraped: joins without queueing
+        second = await discord_bot.get_search_results("fairqueue-c", requester=("g", "b"))
+        assert queue.admitted["g"] == 1
+        return await first, second
+
+    try:
+        first, second = asyncio.run(_searches())
+        assert first == second and queue.in_flight == 0
+    finally:
+        discord_bot.NFTScraper, discord_bot.governor, discord_bot.fair_queue = saved
+    print("✅ Queue wait taken before the refresh lock")
+
+
+def test_bad_weights_are_rejected():
+    """A zero, negative or NaN guild weight fails at construction instead of stalling the queue"""
+    for weight in (0.0, -1.0, float("nan"), float("inf")):
+        try:
+            FairQueue(limit=1, weights={"g": weight})
+            assert False, f"weight {weight} should be rejected"
+        except ValueError:
+            pass
+    try:
+        FairQueue(limit=1, quantum=0)
+        assert False, "quantum 0 should be rejected"
+    except ValueError:
+        pass
+
+    async def _run():
+        queue = FairQueue(limit=1, weights={"g": 0.5})
+        async with queue.slot("g", "u"):
+            pass
+    asyncio.run(asyncio.wait_for(_run(), timeout=1))
+    print("✅ Non-positive guild weights rejected")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing fair queue...")
+    test_guilds_take_turns()
+    test_weights_and_users_round_robin()
+    test_cooldown_and_cancel()
+    test_search_cooldown_serves_cache()
+    test_queue_wait_outside_refresh_lock()
+    test_bad_weights_are_rejected()
+    print("🎉 All fair queue tests passed!")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Test the upstream governor against the stand-in marketplace with injected latency and errors"""
+
+import asyncio
+import time
+import urllib.error
+import urllib.request
+
+import discord_bot
+from fixture_server import start_server
+from governor import CircuitOpenError, TokenBucket, UpstreamGovernor
+
+
+def _fetch(url):
+    """Blocking page fetch; True on a 200"""
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            response.read()
+            return response.status == 200
+    except urllib.error.HTTPError:
+        return False
+
+
+async def _governed_fetch(governor, url, attempts):
+    """Fetch one page through the governor, as run_scrape does for a crawl"""
+    await governor.acquire()
+    attempts.append(url)
+    started = time.perf_counter()
+    ok = False
+    try:
+        ok = await asyncio.get_running_loop().run_in_executor(None, _fetch, url)
+        return ok
+    finally:
+        await governor.release(time.perf_counter() - started, ok)
+
+
+async def _circuit_opens_and_recovers():
+    server, base_url = start_server(error_rate=1.0)
+    try:
+        governor = UpstreamGovernor(rate=100, burst=10, failure_threshold=3, open_seconds=0.5)
+        attempts = []
+        for _ in range(3):
+            assert not await _governed_fetch(governor, base_url, attempts)
+        assert governor.state == governor.OPEN
+
+        # Fails fast without touching the site
+        started = time.perf_counter()
+        try:
+            await _governed_fetch(governor, base_url, attempts)
+            assert False, "circuit should be open"
+        except CircuitOpenError:
+            pass
+        assert time.perf_counter() - started < 0.05
+        assert len(attempts) == 3 and governor.rejected == 1
+
+        # Site recovers; after the cool-down one probe closes the circuit
+        server.RequestHandlerClass.error_rate = 0.0
+        await asyncio.sleep(0.6)
+        assert await _governed_fetch(governor, base_url, attempts)
+        assert governor.state == governor.CLOSED
+    finally:
+        server.shutdown()
+
+
+def test_circuit_opens_and_recovers():
+    """Repeated 503s open the circuit, callers fail fast, a probe closes it"""
+    asyncio.run(_circuit_opens_and_recovers())
+    print("✅ Circuit opened on errors and closed after a good probe")
+
+
+async def _failed_probe_reopens():
+    server, base_url = start_server(error_rate=1.0)
+    try:
+        governor = UpstreamGovernor(rate=100, burst=10, failure_threshold=2, open_seconds=0.2)
+        attempts = []
+        for _ in range(2):
+            await _governed_fetch(governor, base_url, attempts)
+        await asyncio.sleep(0.3)
+        assert not await _governed_fetch(governor, base_url, attempts)
+        assert governor.state == governor.OPEN and governor.trips == 2
+    finally:
+        server.shutdown()
+
+
+def test_failed_probe_reopens():
+    """A probe that still fails keeps the site cut off for another cool-down"""
+    asyncio.run(_failed_probe_reopens())
+    print("✅ Failed probe reopened the circuit")
+
+
+async def _slow_site_shrinks_concurrency():
+    server, base_url = start_server(latency=0.2)
+    try:
+        governor = UpstreamGovernor(rate=100, burst=10, max_concurrency=4, slow_threshold=0.1)
+        attempts = []
+        start_limit = governor.limit
+        await asyncio.gather(*[_governed_fetch(governor, base_url, attempts) for _ in range(4)])
+        assert governor.limit == governor.min_concurrency < start_limit
+        assert governor.state == governor.CLOSED
+
+        # Fast answers let the limit grow back
+        server.RequestHandlerClass.latency = 0.0
+        for _ in range(10):
+            await _governed_fetch(governor, base_url, attempts)
+        assert governor.limit > 2
+    finally:
+        server.shutdown()
+
+
+def test_slow_site_shrinks_concurrency():
+    """Slow responses halve the concurrency limit, fast ones grow it again"""
+    asyncio.run(_slow_site_shrinks_concurrency())
+    print("✅ AIMD limit followed the site's latency")
+
+
+async def _cancelled_probe_frees_circuit():
+    governor = UpstreamGovernor(rate=100, burst=1, failure_threshold=1, open_seconds=0.05)
+    await governor.acquire()
+    await governor.release(0.0, ok=False)
+    assert governor.state == governor.OPEN
+    await asyncio.sleep(0.06)
+
+    # The probe waits for a rate token and its caller gives up
+    governor.bucket.rate, governor.bucket.tokens = 1, 0.0
+    probe = asyncio.ensure_future(governor.acquire())
+    await asyncio.sleep(0.01)
+    assert governor.state == governor.HALF_OPEN
+    probe.cancel()
+    try:
+        await probe
+    except asyncio.CancelledError:
+        pass
+    assert governor.in_flight == 0
+
+    governor.bucket.rate, governor.bucket.tokens = 100, 1.0
+    await governor.acquire()
+    await governor.release(0.0, ok=True)
+    assert governor.state == governor.CLOSED
+
+
+def test_cancelled_probe_frees_circuit():
+    """A probe cancelled before it got a slot lets the next caller probe instead"""
+    asyncio.run(_cancelled_probe_frees_circuit())
+    print("✅ Cancelled probe did not wedge the circuit half-open")
+
+
+def test_multi_page_crawl_is_not_slow():
+    """The slow threshold applies per page, without the time spent showing partial results"""
+    class SlowPagesScraper:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def iter_pages(self, search_term=None, max_pages=1, **kwargs):
+            for page in range(max_pages):
+                time.sleep(0.06)
+                yield [{"name": f"Dagger #{page}", "price": "1,000"}]
+
+    async def on_batch(results, page):
+        # A Discord edit of the partial reply
+        await asyncio.sleep(0.05)
+
+    async def _crawls():
+        for _ in range(3):
+            await discord_bot.run_scrape("dagger", max_pages=3, on_batch=on_batch)
+
+    saved = (discord_bot.NFTScraper, discord_bot.governor)
+    discord_bot.NFTScraper = SlowPagesScraper
+    # Each crawl takes ~0.33s in total but ~0.06s per page
+    discord_bot.governor = UpstreamGovernor(rate=100, burst=10, max_concurrency=4, slow_threshold=0.15)
+    try:
+        start_limit = discord_bot.governor.limit
+        asyncio.run(_crawls())
+        assert discord_bot.governor.limit > start_limit, discord_bot.governor.limit
+    finally:
+        discord_bot.NFTScraper, discord_bot.governor = saved
+    assert abs(discord_bot.upstream_latency({"timings": {"navigation": 3.0, "parse": 0.3}}, 99.0, 3) - 1.1) < 1e-9
+    print("✅ Multi-page crawls grew the concurrency limit instead of halving it")
+
+
+async def _bucket_paces_requests():
+    bucket = TokenBucket(rate=20, burst=2)
+    started = time.perf_counter()
+    for _ in range(6):
+        await bucket.acquire()
+    # Two from the burst, four more at 20/s
+    return time.perf_counter() - started
+
+
+def test_bucket_paces_requests():
+    """The token bucket lets a burst through, then paces requests at its rate"""
+    elapsed = asyncio.run(_bucket_paces_requests())
+    assert 0.18 <= elapsed < 0.5, elapsed
+    print(f"✅ Token bucket paced 6 requests in {elapsed:.2f}s")
+
+
+def test_backoff_is_jittered_and_capped():
+    """Backoff delays stay within the exponential bound and vary"""
+    governor = UpstreamGovernor(backoff_base=1.0, backoff_cap=8.0)
+    for attempt in range(6):
+        delays = [governor.backoff(attempt) for _ in range(50)]
+        assert all(0 <= delay <= min(8.0, 2 ** attempt) for delay in delays)
+        assert len(set(delays)) > 1
+    print("✅ Backoff is jittered and capped")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the upstream governor...")
+    test_circuit_opens_and_recovers()
+    test_failed_probe_reopens()
+    test_slow_site_shrinks_concurrency()
+    test_cancelled_probe_frees_circuit()
+    test_multi_page_crawl_is_not_slow()
+    test_bucket_paces_requests()
+    test_backoff_is_jittered_and_capped()
+    print("🎉 All governor tests passed!")
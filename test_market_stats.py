@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Test incremental marketplace statistics against a full recompute"""
+
+import asyncio
+import random
+
+import discord_bot
+from governor import UpstreamGovernor
+from market_stats import MarketStats
+from sections import SectionCatalog, load_sections
+
+
+def _price(price):
+    return int(str(price).replace(',', '').strip() or 0)
+
+
+def _random_listing(rng):
+    return {'name': f"Item {rng.randrange(60)}", 'price': f"{rng.randrange(1, 5_000_000):,}"}
+
+
+def test_incremental_matches_full_recompute():
+    """Stats stay exact across many random snapshot changes"""
+    rng = random.Random(3)
+    stats = MarketStats(_price)
+    snapshot = [_random_listing(rng) for _ in range(300)]
+    for _ in range(200):
+        snapshot = list(snapshot)
+        for _ in range(rng.randrange(10)):
+            action = rng.random()
+            if action < 0.3 and snapshot:
+                snapshot.pop(rng.randrange(len(snapshot)))
+            elif action < 0.6:
+                snapshot.append(_random_listing(rng))
+            elif snapshot:
+                # Price change of an existing listing
+                i = rng.randrange(len(snapshot))
+                snapshot[i] = dict(snapshot[i], price=f"{rng.randrange(1, 5_000_000):,}")
+        stats.sync(snapshot)
+
+        prices = [_price(nft['price']) for nft in snapshot]
+        assert stats.count == len(snapshot)
+        assert stats.total == sum(prices)
+        assert stats.min_price == min(prices)
+        assert stats.max_price == max(prices)
+        assert _price(stats.cheapest['price']) == min(prices)
+        assert _price(stats.most_expensive['price']) == max(prices)
+    print("✅ Incremental stats matched a full recompute")
+
+
+class NoFullPass(list):
+    """Snapshot list that fails the test if the stats walk all of it"""
+
+    def __iter__(self):
+        raise AssertionError("stats iterated the whole snapshot")
+
+
+def test_changes_apply_without_full_pass():
+    """Change steps from the pages a scrape saw change are applied without reading the snapshot"""
+    rng = random.Random(5)
+    pages = [[_random_listing(rng) for _ in range(20)] for _ in range(10)]
+    stats = MarketStats(_price)
+    stats.sync([nft for page in pages for nft in page], version="v0")
+    for step in range(1, 100):
+        page = rng.randrange(len(pages))
+        old, pages[page] = pages[page], [_random_listing(rng) for _ in range(rng.randrange(15, 25))]
+        changes = [(f"v{step - 1}", f"v{step}", pages[page], old)]
+        assert stats.sync(NoFullPass(nft for page in pages for nft in page), f"v{step}", changes)
+
+        prices = [_price(nft['price']) for page in pages for nft in page]
+        assert stats.count == len(prices) and stats.total == sum(prices)
+        assert stats.min_price == min(prices) and stats.max_price == max(prices)
+
+    # Steps that do not start at the stats' version fall back to a full diff
+    snapshot = [_random_listing(rng) for _ in range(5)]
+    stats.sync(snapshot, "other", [("unknown", "other", snapshot, [])])
+    assert stats.count == 5 and stats.total == sum(_price(nft['price']) for nft in snapshot)
+    print("✅ Scrape changes applied without a full pass")
+
+
+def test_refresh_applies_scrape_changes():
+    """A catalog refresh where one page changed updates the stats from that page alone"""
+    pages = [[{'name': f"Item {page}-{i}", 'price': f"{(page + 1) * 1000 + i:,}"} for i in range(5)]
+             for page in range(3)]
+
+    class PagedScraper:
+        def __init__(self, *args, **kwargs):
+            self.last_page_hashes = []
+
+        def iter_pages(self, search_term=None, max_pages=1, **kwargs):
+            for page in pages[:max_pages]:
+                self.last_page_hashes.append(discord_bot.compute_snapshot_version(page))
+                yield [dict(nft) for nft in page]
+
+    class CountingStats(MarketStats):
+        full_diffs = 0
+
+        def _diff_all(self, items):
+            CountingStats.full_diffs += 1
+            super()._diff_all(items)
+
+    sections = load_sections('[{"name": "test-paged", "url": "http://market/paged", "pages": 3}]')
+    saved = (discord_bot.NFTScraper, discord_bot.SECTIONS, discord_bot.section_catalog,
+             discord_bot.governor, discord_bot.market_stats)
+    discord_bot.NFTScraper = PagedScraper
+    discord_bot.SECTIONS = sections
+    discord_bot.section_catalog = SectionCatalog(sections)
+    discord_bot.governor = UpstreamGovernor(rate=100, burst=10)
+    discord_bot.market_stats = CountingStats(discord_bot.parse_price)
+
+    async def _forget_section():
+        section = sections[0]
+        await discord_bot.shared_cache.backend.delete(discord_bot.shared_cache._key(section.cache_key))
+        discord_bot.catalog_scheduler.sources.pop(section.cache_key, None)
+        discord_bot.last_snapshots.pop((section.url, ""), None)
+        discord_bot.snapshot_changes.clear()
+
+    try:
+        asyncio.run(discord_bot.get_nft_data(force=True))
+        assert CountingStats.full_diffs == 1 and discord_bot.market_stats.count == 15
+        pages[1] = [{'name': "Zakum Helmet", 'price': "1"}, {'name': "Item 1-0", 'price': "2,000"}]
+        catalog = asyncio.run(discord_bot.get_nft_data(force=True))
+        assert CountingStats.full_diffs == 1, "the second refresh should apply the changed page only"
+        stats = discord_bot.catalog_stats(catalog)
+        prices = [discord_bot.parse_price(nft['price']) for nft in catalog]
+        assert stats.count == len(catalog) == 12 and stats.total == sum(prices)
+        assert stats.cheapest['name'] == "Zakum Helmet" and stats.cheapest['section'] == "test-paged"
+    finally:
+        (discord_bot.NFTScraper, discord_bot.SECTIONS, discord_bot.section_catalog,
+         discord_bot.governor, discord_bot.market_stats) = saved
+        discord_bot.nft_cache, discord_bot.cache_timestamp, discord_bot.snapshot_version = {}, 0, None
+        asyncio.run(_forget_section())
+    print("✅ Refresh updated the stats from the changed page")
+
+
+def test_empty_snapshot():
+    """An empty snapshot clears the stats"""
+    stats = MarketStats(_price)
+    stats.sync([{'name': 'Item', 'price': '1,000'}])
+    stats.sync([])
+    assert stats.count == 0 and stats.cheapest is None and stats.average_price is None
+    print("✅ Empty snapshot cleared the stats")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing incremental market stats...")
+    test_incremental_matches_full_recompute()
+    test_changes_apply_without_full_pass()
+    test_refresh_applies_scrape_changes()
+    test_empty_snapshot()
+    print("🎉 All market stats tests passed!")
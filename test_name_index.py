@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Test the item name autocomplete index"""
+
+import math
+import time
+
+from name_index import NameIndex
+
+
+def test_complete_matches_word_prefixes():
+    """Any word of a name can be typed, serial numbers are grouped, most seen first"""
+    index = NameIndex()
+    index.add_names(["Unchained Dagger #1", "Unchained Dagger #2", "Zakum Helmet #3", "Dark Scarlet Shield #4"])
+    index.add_names(["Zakum Helmet #9"], weight=5)
+
+    assert index.complete("dag") == ["Unchained Dagger"]
+    assert index.complete("  ZAKUM  hel") == ["Zakum Helmet"]
+    assert index.complete("s") == ["Dark Scarlet Shield"]
+    assert index.complete("") == ["Zakum Helmet", "Unchained Dagger", "Dark Scarlet Shield"]
+    assert index.complete("nothing") == []
+    print("✅ Autocomplete matched word prefixes")
+
+
+class CountingList(list):
+    """List that counts element reads (bisect goes through __getitem__ for subclasses)"""
+
+    reads = 0
+
+    def __getitem__(self, index):
+        CountingList.reads += 1
+        return super().__getitem__(index)
+
+
+def test_lookup_is_logarithmic():
+    """Lookups over 50k names read O(log n) keys and rank at most SCAN_LIMIT candidates"""
+    index = NameIndex()
+    index.add_names(f"{word} Item {i}" for i, word in enumerate(["Alpha", "Beta", "Gamma", "Delta"] * 12_500))
+    index._keys = CountingList(index._keys)
+    bound = 2 * (math.ceil(math.log2(len(index._keys))) + 1)
+    prefixes = ["a", "be", "gam", "delta it", "item 12", "zz"]
+    started = time.perf_counter()
+    for prefix in prefixes:
+        CountingList.reads = 0
+        results = index.complete(prefix)
+        assert 0 < CountingList.reads <= bound, (prefix, CountingList.reads, bound)
+        assert len(results) <= 25
+    average = (time.perf_counter() - started) / len(prefixes)
+    assert index.complete("gam")[0].startswith("Gamma")
+    print(f"✅ At most {bound} key reads per lookup over {len(index._keys)} keys ({average * 1e6:.0f}µs each)")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing name index...")
+    test_complete_matches_word_prefixes()
+    test_lookup_is_logarithmic()
+    print("🎉 All name index tests passed!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test reading listings from the page's own API responses (performance log)"""
+
+import base64
+import json
+import os
+import tempfile
+
+from fixture_server import API_PATH, PAGE_SIZE, api_payload, build_catalog, render_page
+from replay import Corpus, CorpusRecorder
+from scraper import NFTScraper, StageTimer, decode_api_listings, parse_listings
+
+CATALOG = build_catalog(60)
+
+
+def _log(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+class CapturingDriver:
+    """WebDriver stand-in whose performance log shows the page's requests"""
+
+    def __init__(self, html, responses=()):
+        self.page_source = html
+        self.bodies = {}
+        self.log = []
+        self.responses = []
+        for i, (url, mime_type, body) in enumerate(responses):
+            request_id = f"req-{i}"
+            self.bodies[request_id] = body
+            self.responses.append(_log("Network.responseReceived", requestId=request_id,
+                                       response={"url": url, "mimeType": mime_type}))
+            self.responses.append(_log("Network.loadingFinished", requestId=request_id))
+
+    def get(self, url):
+        # The page's requests are logged once it loads
+        self.log.extend(self.responses)
+
+    def get_log(self, kind):
+        entries, self.log = self.log, []
+        return entries
+
+    def execute_cdp_cmd(self, command, params):
+        body = self.bodies[params["requestId"]]
+        return {"body": base64.b64encode(body.encode()).decode(), "base64Encoded": True}
+
+    def find_element(self, by, value):
+        return object()
+
+    def execute_script(self, script):
+        return 0
+
+
+class OfflineScraper(NFTScraper):
+    def setup_driver(self):
+        pass
+
+
+def test_decode_api_listings():
+    """API items decode into the same records the DOM parser extracts"""
+    listings = CATALOG[:PAGE_SIZE]
+    assert decode_api_listings(api_payload(listings)) == parse_listings(render_page(listings))
+    assert decode_api_listings({"user": {"name": "x"}, "notifications": []}) is None
+    print("✅ API response decoded into listing records")
+
+
+def test_scrape_from_captured_response():
+    """A matching JSON response is used without waiting for or parsing the DOM"""
+    listings = CATALOG[:PAGE_SIZE]
+    driver = CapturingDriver("<html></html>", [
+        ("https://msu.io/static/config.json", "application/json", "{}"),
+        (f"https://msu.io{API_PATH}?page=1", "application/json", json.dumps(api_payload(listings))),
+    ])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corpus.jsonl.gz")
+        scraper = OfflineScraper(settle_time=5, capture_xhr=True, recorder=CorpusRecorder(path))
+        timer = StageTimer()
+        nfts = scraper._scrape_page(driver, scraper.build_url(), timer)
+        assert nfts == parse_listings(render_page(listings))
+        assert "settle" not in timer.timings and timer.timings["network_capture"] < 1
+        assert scraper.last_parse_stats["pages_decoded"] == 1 and len(scraper.last_page_hashes) == 1
+        entry = Corpus.load(path).get(None, 1)
+        assert entry["kind"] == "json" and entry["payload"] == nfts
+    print("✅ Listings taken from the captured API response")
+
+
+def test_falls_back_to_dom():
+    """Without a matching response the rendered page is parsed as before"""
+    listings = CATALOG[:PAGE_SIZE]
+    driver = CapturingDriver(render_page(listings), [
+        (f"https://msu.io{API_PATH}?page=1", "text/html", "<html></html>"),
+    ])
+    scraper = OfflineScraper(settle_time=0.2, capture_xhr=True)
+    timer = StageTimer()
+    nfts = scraper._scrape_page(driver, scraper.build_url(), timer)
+    assert nfts == parse_listings(render_page(listings))
+    assert timer.timings["network_capture"] >= 0.2 and "parse" in timer.timings
+    assert scraper.last_parse_stats["pages_decoded"] == 0
+    print("✅ Fell back to the DOM without an API response")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing network capture...")
+    test_decode_api_listings()
+    test_scrape_from_captured_response()
+    test_falls_back_to_dom()
+    print("🎉 All network capture tests passed!")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Test skipping the parse of unchanged pages and cards"""
+
+import asyncio
+
+import discord_bot
+from fixture_server import PAGE_SIZE, build_catalog, render_page
+from replay import Corpus
+from scraper import ListingParser, parse_listings, split_cards
+
+CATALOG = build_catalog(60)
+
+
+def test_split_cards():
+    """A page splits into one fragment per listing card"""
+    html = render_page(CATALOG[:PAGE_SIZE])
+    cards = split_cards(html)
+    assert len(cards) == PAGE_SIZE
+    assert [parse_listings(card)[0] for card in cards] == parse_listings(html)
+    assert split_cards(render_page(CATALOG[:1])) is None
+    print("✅ Page split into listing cards")
+
+
+def test_unchanged_page_is_skipped():
+    """The same page parsed twice is only parsed once"""
+    parser = ListingParser()
+    html = render_page(CATALOG[:PAGE_SIZE])
+    first, first_hash, stats = parser.parse(html)
+    assert stats["pages_parsed"] == 1 and stats["cards_parsed"] == PAGE_SIZE
+    second, second_hash, stats = parser.parse(html)
+    assert stats["pages_skipped"] == 1 and stats["cards_parsed"] == 0
+    assert first_hash == second_hash and second == first == parse_listings(html)
+    # Callers get their own copies
+    second[0]["price"] = "0"
+    assert parser.parse(html)[0][0]["price"] == first[0]["price"]
+    print("✅ Unchanged page skipped")
+
+
+def test_changed_cards_are_reparsed():
+    """Only the cards that changed since the last page are parsed again"""
+    parser = ListingParser()
+    parser.parse(render_page(CATALOG[:PAGE_SIZE]))
+    listings = [dict(nft) for nft in CATALOG[:PAGE_SIZE]]
+    listings[3]["price"] = "1,234"
+    html = render_page(listings)
+    nfts, _, stats = parser.parse(html)
+    assert stats["pages_parsed"] == 1 and stats["cards_parsed"] == 1 and stats["cards_reused"] == PAGE_SIZE - 1
+    assert nfts == parse_listings(html)
+    assert parser.summary()["pages_parsed"] == 2
+    print("✅ Changed card reparsed, the rest reused")
+
+
+def test_unchanged_refresh_keeps_snapshot():
+    """A refresh that finds the same pages returns the previous snapshot object"""
+    async def _scrape_twice():
+        first = await discord_bot.scrape_snapshot("dagger")
+        second = await discord_bot.scrape_snapshot("dagger")
+        return first, second
+
+    daggers = [nft for nft in CATALOG if "Dagger" in nft["name"]]
+    corpus = Corpus([{"keyword": "dagger", "page": 1, "kind": "html", "payload": render_page(daggers), "timings": {}}])
+    previous_corpus = discord_bot.replay_corpus
+    discord_bot.replay_corpus = corpus
+    try:
+        (first, first_version), (second, second_version) = asyncio.run(_scrape_twice())
+    finally:
+        discord_bot.replay_corpus = previous_corpus
+    assert second is first and second_version == first_version
+    assert discord_bot.metrics.snapshot_reuses.get(kind="search") >= 1
+    print("✅ Unchanged refresh kept the previous snapshot")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing parse cache...")
+    test_split_cards()
+    test_unchanged_page_is_skipped()
+    test_changed_cards_are_reparsed()
+    test_unchanged_refresh_keeps_snapshot()
+    print("🎉 All parse cache tests passed!")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Test timing spans: ring buffer, percentiles and recording overhead"""
+
+import threading
+import time
+
+from perf import SpanRecorder
+
+
+def test_ring_keeps_recent_durations():
+    """Only the last `capacity` durations count towards the percentiles"""
+    recorder = SpanRecorder(capacity=100)
+    for _ in range(100):
+        recorder.record("scrape.settle", 5.0)
+    for i in range(1, 101):
+        recorder.record("scrape.settle", i / 1000)
+    summary = recorder.stage_summary("scrape.settle")
+    assert summary["count"] == 200 and summary["window"] == 100
+    assert summary["p50_ms"] == 51.0 and summary["p99_ms"] == 100.0 and summary["max_ms"] == 100.0
+    assert summary["last_ms"] == 100.0
+    print("✅ Ring buffer keeps the most recent durations")
+
+
+def test_span_and_prefix_summary():
+    """Spans time their block; summaries filter by stage prefix"""
+    recorder = SpanRecorder()
+    with recorder.span("command.buscar.render"):
+        time.sleep(0.01)
+    recorder.record("scrape.parse", 0.2)
+    summary = recorder.summary("command.")
+    assert list(summary) == ["command.buscar.render"]
+    assert 9 <= summary["command.buscar.render"]["p50_ms"] < 100
+    print("✅ Spans recorded and filtered by prefix")
+
+
+def test_threads_record_safely():
+    """Scraper threads and the event loop can record into the same stage"""
+    recorder = SpanRecorder(capacity=64)
+
+    def work():
+        for _ in range(5000):
+            recorder.record("scrape.navigation", 0.001)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert recorder.stage_summary("scrape.navigation")["count"] == 20000
+    print("✅ Concurrent recording lost no spans")
+
+
+def test_overhead_is_negligible():
+    """A span costs microseconds, nothing next to a multi-second scrape"""
+    recorder = SpanRecorder()
+    iterations = 20000
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with recorder.span("command.buscar.send"):
+            pass
+    per_span = (time.perf_counter() - started) / iterations
+    assert per_span < 50e-6, per_span
+    print(f"✅ Span overhead: {per_span * 1e6:.2f}µs")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing timing spans...")
+    test_ring_keeps_recent_durations()
+    test_span_and_prefix_summary()
+    test_threads_record_safely()
+    test_overhead_is_negligible()
+    print("🎉 All perf tests passed!")
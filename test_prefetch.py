@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Test popularity tracking and the prefetch budget"""
+
+import asyncio
+
+from prefetch import DecayingCounter, Prefetcher
+
+
+def test_counts_decay():
+    """Old popularity fades: a term searched an hour ago counts half"""
+    counter = DecayingCounter(half_life=3600)
+    counter.add("zakum", now=0)
+    counter.add("zakum", now=0)
+    counter.add("dagger", now=3600)
+    assert abs(counter.score("zakum", now=3600) - 1.0) < 1e-9
+    assert abs(counter.score("dagger", now=3600) - 1.0) < 1e-9
+    counter.add("dagger", now=3600)
+    assert [term for term, _ in counter.top(2, now=3600)] == ["dagger", "zakum"]
+    print("✅ Popularity decays")
+
+
+async def _prefetch_respects_budget_and_counts_hits():
+    counter = DecayingCounter()
+    fetched = []
+
+    async def fetch(term):
+        fetched.append(term)
+
+    async def is_due(term):
+        return term not in fetched
+
+    prefetcher = Prefetcher(counter, fetch, is_due, top_n=5, budget_per_hour=2, min_score=2)
+    for term, searches in [("zakum", 5), ("dagger", 4), ("staff", 3), ("rare", 1)]:
+        for _ in range(searches):
+            prefetcher.record_query(term, "miss")
+
+    assert await prefetcher.run() == 2
+    assert fetched == ["zakum", "dagger"]
+    # Budget is spent for this hour
+    assert await prefetcher.run() == 0
+
+    prefetcher.record_query("zakum", "hit")
+    assert prefetcher.hits == 1
+    assert prefetcher.summary()["pending"] == ["dagger"]
+    return True
+
+
+def test_prefetch_respects_budget_and_counts_hits():
+    """Top terms are prefetched within the hourly budget and hits are counted"""
+    assert asyncio.run(_prefetch_respects_budget_and_counts_hits())
+    print("✅ Prefetch stayed within budget and counted hits")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing search prefetching...")
+    test_counts_decay()
+    test_prefetch_respects_budget_and_counts_hits()
+    print("🎉 All prefetch tests passed!")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Test the price distribution analytics"""
+
+import price_analytics
+from fixture_server import build_catalog
+
+
+def test_distribution_values():
+    """Median, percentiles and breakdown on a hand-checked catalog"""
+    catalog = [
+        {'name': 'Zakum Helmet #1', 'price': '1,000'},
+        {'name': 'Zakum Helmet #2', 'price': '3,000'},
+        {'name': 'Zakum Helmet #3', 'price': '2,000'},
+        {'name': 'Pink Bean Cup #1', 'price': '100,000'},
+    ]
+    result = price_analytics.analyze_python(catalog)
+    assert result['count'] == 4
+    assert result['median'] == 2500
+    assert result['percentiles'][50] == 2500
+    assert sum(row['count'] for row in result['histogram']) == 4
+    assert result['breakdown'][0] == {
+        'item': 'Zakum Helmet', 'count': 3, 'mean': 2000, 'median': 2000, 'min': 1000, 'max': 3000
+    }
+    assert price_analytics.analyze_python(catalog, 'nothing')['count'] == 0
+    print("✅ Distribution values are correct")
+
+
+def test_numpy_matches_python():
+    """The vectorized path returns the same numbers as the pure-Python one"""
+    if price_analytics.np is None:
+        print("⚠️  NumPy not installed, skipping")
+        return
+    catalog = build_catalog(2000)
+    for term in (None, 'zakum', 'nothing'):
+        expected = price_analytics.analyze_python(catalog, term)
+        result = price_analytics.analyze_numpy(catalog, term)
+        assert result['count'] == expected['count']
+        assert result['histogram'] == expected['histogram']
+        assert [row['item'] for row in result['breakdown']] == [row['item'] for row in expected['breakdown']]
+        for pct, value in expected['percentiles'].items():
+            assert abs(result['percentiles'][pct] - value) < 1e-6
+    print("✅ NumPy and pure-Python analytics agree")
+
+
+def test_results_cached_per_version():
+    """Results are reused until the snapshot version changes"""
+    catalog = build_catalog(100)
+    first = price_analytics.analyze(catalog, version='v1')
+    assert price_analytics.analyze(catalog, version='v1') is first
+    assert price_analytics.analyze(catalog, version='v2') is not first
+    print("✅ Results cached per snapshot version")
+
+
+def test_views_keep_their_arrays():
+    """The catalog and a section view alternating do not evict each other's arrays or results"""
+    if price_analytics.np is None:
+        print("⚠️  NumPy not installed, skipping")
+        return
+    catalog = build_catalog(200)
+    section = catalog[:50]
+    arrays = price_analytics._numpy_arrays(catalog, 'catalog-v1')
+    section_arrays = price_analytics._numpy_arrays(section, 'section-v1')
+    first = price_analytics.analyze(catalog, 'zakum', version='catalog-v1')
+    price_analytics.analyze(section, 'zakum', version='section-v1')
+    assert price_analytics._numpy_arrays(catalog, 'catalog-v1') is arrays
+    assert price_analytics._numpy_arrays(section, 'section-v1') is section_arrays
+    assert price_analytics.analyze(catalog, 'zakum', version='catalog-v1') is first
+    # Names are a NumPy string array, searched without a Python loop
+    assert isinstance(arrays[3], price_analytics.np.ndarray)
+    expected = sum('zakum' in nft['name'].lower() for nft in catalog)
+    assert first['count'] == expected
+    print("✅ Catalog and section arrays cached side by side")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing price analytics...")
+    test_distribution_values()
+    test_numpy_matches_python()
+    test_results_cached_per_version()
+    test_views_keep_their_arrays()
+    print("🎉 All price analytics tests passed!")
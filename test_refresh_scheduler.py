@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Test refresh intervals learned from how often sources change"""
+
+import random
+
+from refresh_scheduler import RefreshScheduler
+
+
+def _scrape_every(scheduler, key, seconds, count, changes, start=0, popularity=0.0):
+    """Observe `count` scrapes `seconds` apart; changes(i) says whether scrape i saw new content"""
+    now, version = start, 0
+    for i in range(count):
+        if changes(i):
+            version += 1
+        scheduler.observe(key, version, now)
+        now += seconds
+    return now
+
+
+def test_intervals_follow_change_rate():
+    """Sources that change on every scrape refresh at the floor, static ones back off to the ceiling"""
+    scheduler = RefreshScheduler(default_interval=300, min_interval=60, max_interval=1800, jitter=0)
+    _scrape_every(scheduler, "busy", 120, 100, lambda i: True)
+    _scrape_every(scheduler, "quiet", 1800, 100, lambda i: False)
+    _scrape_every(scheduler, "hourly", 300, 200, lambda i: i % 12 == 0)
+    assert scheduler.interval("busy") < 120, scheduler.interval("busy")
+    assert scheduler.interval("quiet") == 1800
+    assert 1200 < scheduler.interval("hourly") < 3600 * 0.8, scheduler.interval("hourly")
+    assert scheduler.interval("never-seen") == 300
+    print(f"✅ Intervals: busy {scheduler.interval('busy'):.0f}s, hourly {scheduler.interval('hourly'):.0f}s, "
+          f"quiet {scheduler.interval('quiet'):.0f}s")
+
+
+def test_jitter_and_bounds():
+    """Jittered intervals spread out but never leave [min, max]"""
+    scheduler = RefreshScheduler(min_interval=60, max_interval=1800, jitter=0.2, rng=random.Random(3))
+    intervals = set()
+    for key in range(50):
+        _scrape_every(scheduler, key, 60, 30, lambda i: True)
+        intervals.add(round(scheduler.interval(key), 3))
+    assert len(intervals) > 10 and min(intervals) >= 60 and max(intervals) <= 1800
+    # A source configured below the floor keeps its own interval as the floor
+    fast = RefreshScheduler(min_interval=60, jitter=0)
+    fast.observe("fast", "a", 0, default=5)
+    assert fast.interval("fast", default=5) == 5
+    print(f"✅ {len(intervals)} distinct intervals between {min(intervals):.0f}s and {max(intervals):.0f}s")
+
+
+def test_popular_terms_refresh_sooner():
+    """Popularity shortens a term's interval, down to the floor"""
+    scheduler = RefreshScheduler(default_interval=300, min_interval=30, max_interval=900, jitter=0)
+    _scrape_every(scheduler, "search:dagger", 300, 20, lambda i: i % 2 == 0)
+    base = scheduler.interval("search:dagger")
+    assert scheduler.interval("search:dagger", popularity=3) == base / 2
+    assert scheduler.interval("search:dagger", popularity=10_000) == 30
+    print(f"✅ Popular term refreshes every {base / 2:.0f}s instead of {base:.0f}s")
+
+
+def test_fixed_when_not_adaptive():
+    """ADAPTIVE_REFRESH=0 keeps the configured interval whatever the source does"""
+    scheduler = RefreshScheduler(default_interval=300, adaptive=False)
+    _scrape_every(scheduler, "busy", 60, 20, lambda i: True)
+    assert scheduler.interval("busy") == 300
+    assert scheduler.interval("busy", default=900, popularity=50) == 900
+    print("✅ Fixed interval when adaptive refresh is off")
+
+
+def test_scrapes_per_hour_and_staleness():
+    """Only snapshots from the last hour count; staleness is the time since the last one"""
+    scheduler = RefreshScheduler(jitter=0)
+    end = _scrape_every(scheduler, "a", 600, 12, lambda i: i % 3 == 0)
+    scheduler.observe("a", 99, 0)  # an older snapshot read back from the cache is not a scrape
+    now = end - 600 + 90
+    assert scheduler.scrapes_per_hour(now) == 6
+    assert scheduler.staleness("a", now) == 90 and scheduler.staleness("b", now) is None
+    summary = scheduler.summary(now=now)
+    assert summary["max_staleness_seconds"] == 90 and summary["sources"]["a"]["scrapes"] == 12
+    assert summary["sources"]["a"]["last_change_seconds_ago"] == 90 + 600 * 2
+    print(f"✅ {summary['scrapes_per_hour']} scrapes in the last hour, {summary['max_staleness_seconds']}s stale")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing adaptive refresh scheduler...")
+    test_intervals_follow_change_rate()
+    test_jitter_and_bounds()
+    test_popular_terms_refresh_sooner()
+    test_fixed_when_not_adaptive()
+    test_scrapes_per_hour_and_staleness()
+    print("🎉 All refresh scheduler tests passed!")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Test recording pages into a corpus and replaying them without Chrome"""
+
+import gzip
+import os
+import tempfile
+import time
+
+from fixture_server import PAGE_SIZE, build_catalog, render_page
+from replay import Corpus, CorpusRecorder, ReplayScraper
+from scraper import NFTScraper, StageTimer
+
+CATALOG = build_catalog(60)
+
+
+class FakeDriver:
+    """Just enough of a WebDriver for NFTScraper._scrape_page"""
+
+    def __init__(self, html):
+        self.page_source = html
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def find_element(self, by, value):
+        return object()
+
+    def execute_script(self, script):
+        return len(self.page_source)
+
+
+class OfflineScraper(NFTScraper):
+    def setup_driver(self):
+        pass
+
+
+def _record_catalog(path):
+    recorder = CorpusRecorder(path)
+    for page in (1, 2, 3):
+        listings = CATALOG[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+        recorder.record(
+            f"https://msu.io/marketplace/nft?page={page}", None, page, render_page(listings, page),
+            {"navigation": 0.2, "settle": 0.5, "readiness_wait": 0.05, "extraction": 0.05}
+        )
+    daggers = [nft for nft in CATALOG if "Dagger" in nft["name"]]
+    recorder.record("https://msu.io/marketplace/nft?keyword=dagger", "Dagger", 1, render_page(daggers), {})
+    return recorder
+
+
+def test_scraper_records_pages():
+    """A scraper with a recorder saves each page with its URL, keyword and stage timings"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corpus.jsonl.gz")
+        scraper = OfflineScraper(settle_time=0, recorder=CorpusRecorder(path))
+        html = render_page(CATALOG[:PAGE_SIZE])
+        url = scraper.build_url("dagger", 2)
+        nfts = scraper._scrape_page(FakeDriver(html), url, StageTimer(), "dagger", 2)
+
+        entry = Corpus.load(path).get("DAGGER ", 2)
+        assert entry["url"] == url and entry["payload"] == html and entry["kind"] == "html"
+        assert set(entry["timings"]) == {"navigation", "settle", "readiness_wait", "extraction"}
+        assert len(nfts) == PAGE_SIZE
+    print("✅ Fetched page recorded into the corpus")
+
+
+def test_replay_serves_recorded_pages():
+    """Replay parses recorded pages the same way as a live scrape, with no Chrome"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corpus.jsonl.gz")
+        _record_catalog(path)
+        # Later sessions append to the same file (one gzip member per page)
+        CorpusRecorder(path).record("https://msu.io/marketplace/nft?keyword=zakum", "zakum", 1, render_page([]), {})
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            assert sum(1 for _ in f) == 5
+
+        scraper = ReplayScraper(Corpus.load(path))
+        pages = list(scraper.iter_pages(max_pages=10))
+        replayed = [nft for page in pages for nft in page]
+        assert [nft["listing_id"] for nft in replayed] == [nft["listing_id"] for nft in CATALOG[:3 * PAGE_SIZE]]
+        assert replayed[0]["category"] == CATALOG[0]["category"]
+
+        matches = scraper.scrape_nfts("dagger")
+        assert matches and all("Dagger" in nft["name"] for nft in matches)
+        assert scraper.scrape_nfts("horntail") == []
+    print("✅ Recorded pages replayed and parsed offline")
+
+
+def test_replay_latency_scale():
+    """latency_scale replays the recorded stage times, scaled"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corpus.jsonl.gz")
+        _record_catalog(path)
+        corpus = Corpus.load(path)
+
+        started = time.perf_counter()
+        ReplayScraper(corpus).scrape_nfts()
+        full_speed = time.perf_counter() - started
+
+        scraper = ReplayScraper(corpus, latency_scale=0.2)
+        started = time.perf_counter()
+        scraper.scrape_nfts()
+        simulated = time.perf_counter() - started
+        # 0.8s recorded for the page, at 20%
+        assert full_speed < 0.1 and 0.15 <= simulated < 0.5, (full_speed, simulated)
+        assert abs(scraper.last_timings["settle"] - 0.1) < 0.05
+    print(f"✅ Replay took {full_speed * 1000:.1f}ms at full speed, {simulated * 1000:.0f}ms simulated")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing record/replay...")
+    test_scraper_records_pages()
+    test_replay_serves_recorded_pages()
+    test_replay_latency_scale()
+    print("🎉 All replay tests passed!")
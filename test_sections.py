@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Test multi-section scraping merged into one catalog"""
+
+import asyncio
+import time
+
+import discord_bot
+from governor import UpstreamGovernor
+from sections import SectionCatalog, load_sections
+
+
+def test_load_sections():
+    """MARKETPLACE_SECTIONS entries fall back to the default refresh and page count"""
+    assert [section.name for section in load_sections("", refresh=300)] == ["nft"]
+    sections = load_sections(
+        '[{"name": "NFT", "url": "https://msu.io/marketplace/nft"},'
+        ' {"name": "armas", "url": "https://msu.io/marketplace/nft?category=weapon", "refresh": 900, "pages": 2}]',
+        refresh=300
+    )
+    assert [(s.name, s.refresh, s.pages) for s in sections] == [("nft", 300, 1), ("armas", 900, 2)]
+    assert sections[1].cache_key == "catalog:armas"
+    try:
+        load_sections('[{"name": "a"}, {"name": "A"}]')
+        assert False, "duplicate section accepted"
+    except ValueError:
+        pass
+    print("✅ Sections loaded from configuration")
+
+
+def test_catalog_keeps_unchanged_sections():
+    """Only the section whose version changed is rebuilt"""
+    catalog = SectionCatalog(load_sections('[{"name": "a"}, {"name": "b"}]'))
+    catalog.update("a", {"items": [{"name": "A #1", "price": "10"}], "version": "a1", "timestamp": 100})
+    assert catalog.expires_at() == 0
+    catalog.update("b", {"items": [{"name": "B #1", "price": "20"}], "version": "b1", "timestamp": 200})
+    merged, section_a = catalog.items, catalog.section_items("a")
+    assert [nft["section"] for nft in merged] == ["a", "b"]
+
+    assert not catalog.update("a", {"items": [{"name": "A #1", "price": "10"}], "version": "a1", "timestamp": 400})
+    assert catalog.items is merged
+    catalog.update("b", {"items": [{"name": "B #2", "price": "30"}], "version": "b2", "timestamp": 500})
+    assert catalog.items is not merged and catalog.section_items("a") is section_a
+    assert [nft["name"] for nft in catalog.items] == ["A #1", "B #2"]
+    assert catalog.oldest_timestamp() == 400 and catalog.expires_at() == 700
+    print("✅ Merged catalog rebuilt only for changed sections")
+
+
+def test_sections_refresh_on_their_own_interval():
+    """Sections are scraped concurrently, each when its own interval expires"""
+    listings = {
+        "http://market/a": [{"name": f"Dagger #{i}", "price": f"{i * 100:,}"} for i in range(1, 4)],
+        "http://market/b?category=hat": [{"name": "Zakum Helmet #9", "price": "5,000"}],
+    }
+    scraped = []
+    events = []
+
+    class SectionScraper:
+        def __init__(self, base_url=None, **kwargs):
+            self.base_url = base_url
+
+        def scrape_nfts(self, search_term=None, page=None):
+            scraped.append(self.base_url)
+            events.append(("start", self.base_url))
+            time.sleep(0.1)
+            events.append(("end", self.base_url))
+            return [dict(nft) for nft in listings[self.base_url]]
+
+    sections = load_sections(
+        '[{"name": "test-a", "url": "http://market/a", "refresh": 300},'
+        ' {"name": "test-b", "url": "http://market/b?category=hat", "refresh": 0.3}]'
+    )
+    saved = (discord_bot.NFTScraper, discord_bot.SECTIONS, discord_bot.section_catalog, discord_bot.governor)
+    discord_bot.NFTScraper = SectionScraper
+    discord_bot.SECTIONS = sections
+    discord_bot.section_catalog = SectionCatalog(sections)
+    discord_bot.governor = UpstreamGovernor(rate=100, burst=10)
+
+    async def _refresh_twice():
+        first = await discord_bot.get_nft_data()
+        await asyncio.sleep(0.4)
+        second = await discord_bot.get_nft_data()
+        return first, second
+
+    async def _forget_sections():
+        for section in sections:
+            await discord_bot.shared_cache.backend.delete(discord_bot.shared_cache._key(section.cache_key))
+            discord_bot.catalog_scheduler.sources.pop(section.cache_key, None)
+            discord_bot.last_snapshots.pop((section.url, ""), None)
+
+    try:
+        first, second = asyncio.run(_refresh_twice())
+        # Both sections were scraped at the same time: each started before either finished
+        assert [kind for kind, _ in events[:2]] == ["start", "start"], events
+        assert sorted(scraped) == ["http://market/a", "http://market/b?category=hat", "http://market/b?category=hat"]
+        assert len(first) == 4 and {nft["section"] for nft in first} == {"test-a", "test-b"}
+        assert second is first, "unchanged sections should keep the same catalog"
+        hats = discord_bot.section_view(second, "test-b")
+        assert [nft["name"] for nft in hats] == ["Zakum Helmet #9"]
+        assert discord_bot.catalog_stats(hats, "test-b").count == 1
+        assert discord_bot.catalog_index(second).count(section="test-a") == 3
+        assert discord_bot.section_error_reply("nope") is not None
+    finally:
+        discord_bot.NFTScraper, discord_bot.SECTIONS, discord_bot.section_catalog, discord_bot.governor = saved
+        discord_bot.nft_cache, discord_bot.cache_timestamp, discord_bot.snapshot_version = {}, 0, None
+        asyncio.run(_forget_sections())
+    print("✅ Two sections scraped concurrently, the fast one refreshed alone")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing marketplace sections...")
+    test_load_sections()
+    test_catalog_keeps_unchanged_sections()
+    test_sections_refresh_on_their_own_interval()
+    print("🎉 All section tests passed!")